@@ -7,6 +7,14 @@ from threading import Thread
 import time
 from cryptography.fernet import Fernet, InvalidToken
 
+from jarvis_core.audio import AudioCapture
+from jarvis_core.backends import RateLimited, make_backend
+from jarvis_core.context import TokenBudget
+from jarvis_core.intents import IntentRouter
+from jarvis_core.phrases import make_phrase_cache
+from jarvis_core.ratelimit import INTERACTIVE, shared_scheduler
+from jarvis_core.tts import SpeechWorker, Utterance
+
 from .iot import IoTClient
 
 __all__ = ["JarvisCore"]
@@ -25,6 +33,7 @@ class JarvisCore:
         
         # Model settings
         self.model = self.config.get("MODEL") or os.getenv("MODEL", "gpt-3.5-turbo")
+        self.backend = make_backend(self.config.get("LLM_BACKEND"))
         
         # Chat history (conversation context)
         self.conversation = [
@@ -36,16 +45,22 @@ class JarvisCore:
                 ),
             }
         ]
+        self.budget = TokenBudget()
         
-        # Initialize text-to-speech (TTS)
-        try:
-            self.tts_engine = pyttsx3.init()
-        except Exception as exc:
-            self.tts_engine = None
-            if self.log_callback:
-                self.log_callback(f"TTS initialization error: {exc}")
+        # Open microphone stream while listening; muted while speaking.
+        self._capture = None
+
+        # Text-to-speech runs on its own thread; see jarvis_core.tts.
+        self.tts = SpeechWorker(
+            engine_factory=pyttsx3.init,
+            log_callback=self.log_callback,
+            on_busy=self._on_tts_busy,
+            phrases=make_phrase_cache(),
+        )
+        self.tts.start()
         # Initialize MQTT client
         self.iot = IoTClient(log_callback=self.log_callback)
+        self.intents = IntentRouter(iot=self.iot, log_callback=self.log_callback)
         self.listening = False
 
     @staticmethod
@@ -72,18 +87,17 @@ class JarvisCore:
                 pass
         return config
 
-    def _speak(self, text: str):
-        """Speak text using text-to-speech."""
-        if self.tts_engine:
-            try:
-                self.tts_engine.say(text)
-                self.tts_engine.runAndWait()
-            except Exception as exc:
-                if self.log_callback:
-                    self.log_callback(f"TTS error: {exc}")
-                print(text)
-        else:
-            print(text)
+    def _speak(self, text: str) -> Utterance:
+        """Queue text for speech and return its handle without waiting."""
+        return self.tts.speak(text)
+
+    def _on_tts_busy(self, busy: bool) -> None:
+        capture = self._capture
+        if capture:
+            if busy:
+                capture.mute()
+            else:
+                capture.unmute()
 
     def listen(self):
         """Continuously listen for voice commands."""
@@ -92,16 +106,19 @@ class JarvisCore:
         if self.log_callback:
             self.log_callback(f"JARVIS: {greeting}")
         self._speak(greeting)
+        capture = None
         while self.listening:
             try:
-                try:
-                    with sr.Microphone() as source:
-                        audio = self.recognizer.listen(source)
-                except Exception as exc:
-                    if self.log_callback:
-                        self.log_callback(f"Microphone error: {exc}")
-                    self._speak("I'm unable to access the microphone, sir.")
-                    time.sleep(1)
+                if capture is None or capture.error:
+                    if capture is not None:
+                        self._speak("I'm unable to access the microphone, sir.").wait()
+                        time.sleep(1)
+                    capture = AudioCapture(log_callback=self.log_callback)
+                    self._capture = capture
+                    self._on_tts_busy(self.tts.busy)
+                    capture.start()
+                audio = capture.get(timeout=0.5)
+                if audio is None:
                     continue
                 try:
                     command = self.recognizer.recognize_google(audio)
@@ -118,6 +135,9 @@ class JarvisCore:
                     self.log_callback(f"Listening error: {exc}")
                 self._speak("An unexpected error occurred, but I will continue assisting.")
                 time.sleep(1)
+        if capture is not None:
+            self._capture = None
+            capture.stop()
 
     def stop_listening(self):
         self.listening = False
@@ -131,10 +151,15 @@ class JarvisCore:
         password = self.config.get("PASSWORD") or os.getenv("JARVIS_PASSWORD")
         if not password:
             return True
-        self._speak("Awaiting password, sir.")
+        self._speak("Awaiting password, sir.").wait()
         try:
-            with sr.Microphone() as source:
-                audio = self.recognizer.listen(source, timeout=5)
+            if self._capture is not None:
+                audio = self._capture.get(timeout=10)
+                if audio is None:
+                    raise sr.WaitTimeoutError("No password heard")
+            else:
+                with sr.Microphone() as source:
+                    audio = self.recognizer.listen(source, timeout=5)
             attempt = self.recognizer.recognize_google(audio).strip().lower()
             if attempt == password.strip().lower():
                 self._speak("Access granted.")
@@ -150,21 +175,7 @@ class JarvisCore:
         command = command.lower()
         if self.log_callback:
             self.log_callback(f"User: {command}")
-        if command.startswith("turn on "):
-            device = command[len("turn on "):].strip()
-            self.iot.publish_command(device, "on")
-            reply = f"Turning on {device}, sir."
-            if self.log_callback:
-                self.log_callback(f"JARVIS: {reply}")
-            self._speak(reply)
-        elif command.startswith("turn off "):
-            device = command[len("turn off "):].strip()
-            self.iot.publish_command(device, "off")
-            reply = f"Turning off {device}, sir."
-            if self.log_callback:
-                self.log_callback(f"JARVIS: {reply}")
-            self._speak(reply)
-        elif "shutdown" in command:
+        if "shutdown" in command:
 
             if self._authenticate():
                 reply = "Shutting down. Goodbye, sir."
@@ -172,6 +183,10 @@ class JarvisCore:
                     self.log_callback(f"JARVIS: {reply}")
                 self._speak(reply)
                 self.stop()
+        elif (reply := self.intents.route(command)) is not None:
+            if self.log_callback:
+                self.log_callback(f"JARVIS: {reply}")
+            self._speak(reply)
         else:
             response = self._chatgpt_response(command)
             if self.log_callback:
@@ -187,8 +202,9 @@ class JarvisCore:
     def _chatgpt_response(self, prompt: str) -> str:
         """Query the OpenAI ChatGPT API for a response."""
         self.conversation.append({"role": "user", "content": prompt})
+        self.budget.trim(self.conversation)
 
-        if not openai.api_key:
+        if not self.backend.available:
             if self.log_callback:
                 self.log_callback("OPENAI_API_KEY not configured.")
             reply = "Apologies, I'm currently unable to access my knowledge base."
@@ -196,12 +212,12 @@ class JarvisCore:
             return reply
         
         max_retries = 3
+        scheduler = shared_scheduler()
+        tokens = self.budget.total_tokens(self.conversation)
         for attempt in range(1, max_retries + 1):
+            scheduler.acquire(tokens, INTERACTIVE)
             try:
-                response = openai.ChatCompletion.create(
-                    model=self.model, messages=self.conversation
-                )
-                reply = response.choices[0].message["content"].strip()
+                reply = self.backend.complete(self.model, self.conversation).strip()
                 break
             except Exception as exc:
                 if self.log_callback:
@@ -211,6 +227,10 @@ class JarvisCore:
                         "Apologies, I'm experiencing difficulties reaching my knowledge base."
                     )
                     break
-                time.sleep(1)
+                if isinstance(exc, RateLimited):
+                    scheduler.throttle(attempt, exc.retry_after)
+                else:
+                    scheduler.sleep(attempt)
         self.conversation.append({"role": "assistant", "content": reply})
+        self.budget.trim(self.conversation)
         return reply
@@ -1,58 +1,756 @@
+import atexit
 import os
+import queue
 import sqlite3
-from typing import Optional
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+BATCH_SIZE = int(os.environ.get("JARVIS_DB_BATCH_SIZE", "100"))
+FLUSH_INTERVAL = float(os.environ.get("JARVIS_DB_FLUSH_INTERVAL", "1.0"))
+QUEUE_SIZE = int(os.environ.get("JARVIS_DB_QUEUE_SIZE", "1000"))
+FETCH_SIZE = 500
+RETENTION_INTERVAL = float(os.environ.get("JARVIS_RETENTION_INTERVAL", "3600"))
+RETENTION_CHUNK = 500
+VACUUM_PAGES = 256
+# How often a blocked caller checks that the writer thread is still alive.
+POLL_INTERVAL = 0.5
+# Version stored in ``PRAGMA user_version`` once all migrations have run.
+SCHEMA_VERSION = 2
+# Where jarvis_core.database used to keep its separate ``history`` table.
+LEGACY_HISTORY_PATH = os.environ.get("JARVIS_DB_PATH", "jarvis.db")
+
+_STOP = object()
+
+# Rollup tables maintained by trigger on every environment insert, finest first.
+ROLLUPS = (
+    ("environment_minute", 60),
+    ("environment_hour", 3600),
+    ("environment_day", 86400),
+)
+_ROLLUP_COLUMNS = {"temperature": "temp", "humidity": "humid"}
+
+
+def _rollup_upsert(table: str, width: int) -> str:
+    """Return the statement folding ``NEW`` into ``table``'s bucket."""
+    return f"""
+        INSERT INTO {table} (
+            bucket, temp_count, temp_sum, temp_min, temp_max,
+            humid_count, humid_sum, humid_min, humid_max
+        ) VALUES (
+            CAST(strftime('%s', NEW.timestamp) AS INTEGER) / {width} * {width},
+            NEW.temperature IS NOT NULL, COALESCE(NEW.temperature, 0),
+            NEW.temperature, NEW.temperature,
+            NEW.humidity IS NOT NULL, COALESCE(NEW.humidity, 0),
+            NEW.humidity, NEW.humidity
+        )
+        ON CONFLICT(bucket) DO UPDATE SET
+            temp_count = temp_count + excluded.temp_count,
+            temp_sum = temp_sum + excluded.temp_sum,
+            temp_min = COALESCE(MIN(temp_min, excluded.temp_min), temp_min, excluded.temp_min),
+            temp_max = COALESCE(MAX(temp_max, excluded.temp_max), temp_max, excluded.temp_max),
+            humid_count = humid_count + excluded.humid_count,
+            humid_sum = humid_sum + excluded.humid_sum,
+            humid_min = COALESCE(MIN(humid_min, excluded.humid_min), humid_min, excluded.humid_min),
+            humid_max = COALESCE(MAX(humid_max, excluded.humid_max), humid_max, excluded.humid_max);
+    """
+
+
+def _create_rollups(cur: sqlite3.Cursor) -> None:
+    """Create the rollup tables and trigger, backfilling new tables."""
+    for table, width in ROLLUPS:
+        exists = cur.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+        ).fetchone()
+        cur.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                bucket INTEGER PRIMARY KEY,
+                temp_count INTEGER NOT NULL DEFAULT 0,
+                temp_sum REAL NOT NULL DEFAULT 0,
+                temp_min REAL,
+                temp_max REAL,
+                humid_count INTEGER NOT NULL DEFAULT 0,
+                humid_sum REAL NOT NULL DEFAULT 0,
+                humid_min REAL,
+                humid_max REAL
+            )
+            """
+        )
+        if not exists:
+            cur.execute(
+                f"""
+                INSERT INTO {table}
+                SELECT CAST(strftime('%s', timestamp) AS INTEGER) / {width} * {width},
+                       COUNT(temperature), TOTAL(temperature),
+                       MIN(temperature), MAX(temperature),
+                       COUNT(humidity), TOTAL(humidity),
+                       MIN(humidity), MAX(humidity)
+                FROM environment
+                WHERE timestamp IS NOT NULL
+                GROUP BY 1
+                """
+            )
+    body = "".join(_rollup_upsert(table, width) for table, width in ROLLUPS)
+    cur.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS environment_rollup
+        AFTER INSERT ON environment
+        BEGIN
+        {body}
+        END
+        """
+    )
+
+
+def _create_fts(cur: sqlite3.Cursor, table: str, column: str) -> bool:
+    """Index ``table.column`` in an FTS5 table kept in sync by triggers.
+
+    Returns ``False`` when this SQLite build lacks FTS5.
+    """
+    fts = f"{table}_fts"
+    exists = cur.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (fts,)
+    ).fetchone()
+    try:
+        cur.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} "
+            f"USING fts5({column}, content='{table}', content_rowid='id')"
+        )
+    except sqlite3.OperationalError:
+        return False
+    cur.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON {table} BEGIN
+            INSERT INTO {fts} (rowid, {column}) VALUES (NEW.id, NEW.{column});
+        END
+        """
+    )
+    cur.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON {table} BEGIN
+            INSERT INTO {fts} ({fts}, rowid, {column})
+            VALUES ('delete', OLD.id, OLD.{column});
+        END
+        """
+    )
+    cur.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {fts}_update AFTER UPDATE ON {table} BEGIN
+            INSERT INTO {fts} ({fts}, rowid, {column})
+            VALUES ('delete', OLD.id, OLD.{column});
+            INSERT INTO {fts} (rowid, {column}) VALUES (NEW.id, NEW.{column});
+        END
+        """
+    )
+    if not exists:
+        cur.execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
+    return True
+
+
+def _fts_query(text: str) -> str:
+    """Quote each word of ``text`` so FTS5 matches them all literally."""
+    words = text.split()
+    return " ".join('"' + word.replace('"', '""') + '"' for word in words)
+
+
+def _like_escape(text: str) -> str:
+    """Escape ``LIKE`` wildcards in ``text`` for use with ``ESCAPE '\\'``."""
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _import_history(conn: sqlite3.Connection, schema: str = "main") -> int:
+    """Copy rows from a legacy ``history`` table into ``conversations``.
+
+    The table lives in ``schema``; when that is the main database the
+    table and its search index are dropped afterwards.
+    """
+    found = conn.execute(
+        f"SELECT 1 FROM {schema}.sqlite_master WHERE type = 'table' AND name = 'history'"
+    ).fetchone()
+    if not found:
+        return 0
+    columns = [row[1] for row in conn.execute(f"PRAGMA {schema}.table_info(history)")]
+    stamp = "COALESCE(timestamp, CURRENT_TIMESTAMP)" if "timestamp" in columns else "CURRENT_TIMESTAMP"
+    cur = conn.execute(
+        f"""
+        INSERT INTO main.conversations (timestamp, speaker, message)
+        SELECT {stamp}, role, content FROM {schema}.history ORDER BY id
+        """
+    )
+    if schema == "main":
+        conn.execute("DROP TABLE IF EXISTS history_fts")
+        conn.execute("DROP TABLE history")
+    return cur.rowcount
+
+
+def _enable_incremental_vacuum(conn: sqlite3.Connection) -> None:
+    """Switch the database to ``auto_vacuum=INCREMENTAL``.
+
+    Once the WAL header has been written the new mode only takes effect
+    after a ``VACUUM``, which is a one-off cost per database file.
+    """
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+        return
+    conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    conn.execute("VACUUM")
+
+
+def _convert_on_writer(conn: sqlite3.Connection) -> bool:
+    """Whether switching to incremental vacuum must wait for the writer.
+
+    Converting an empty file is instant, but an existing database is
+    rewritten by the ``VACUUM``, so that is left to an idle writer rather
+    than holding up startup.
+    """
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+        return False
+    return conn.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchone() is not None
+
+
+def _connect(db_path: str, check_same_thread: bool = True) -> sqlite3.Connection:
+    """Open a connection configured for WAL journaling."""
+    conn = sqlite3.connect(db_path, check_same_thread=check_same_thread)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def _utc_timestamp() -> str:
+    """Return the current UTC time in SQLite's ``CURRENT_TIMESTAMP`` format."""
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime())
+
+
+def _to_utc(value: datetime) -> datetime:
+    """Return ``value`` as a naive UTC datetime; naive input is taken as UTC."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+class _Writer(threading.Thread):
+    """Own the write connection and commit queued statements in batches.
+
+    Besides ``(sql, params)`` statements the queue accepts jobs: callables
+    taking the connection and returning ``True`` while they have more work.
+    Each job step runs in its own transaction and unfinished jobs only
+    resume once the queue is idle, so maintenance never delays logging.
+    ``on_commit`` is called with the seconds each batch of statements took
+    to commit.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        batch_size: int = BATCH_SIZE,
+        flush_interval: float = FLUSH_INTERVAL,
+        max_queue: int = QUEUE_SIZE,
+        maintenance: Optional[Callable[[sqlite3.Connection], bool]] = None,
+        maintenance_interval: float = 0,
+        on_commit: Optional[Callable[[float], None]] = None,
+    ) -> None:
+        super().__init__(name="jarvis-db-writer", daemon=True)
+        self.db_path = db_path
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self.maintenance = maintenance
+        self.maintenance_interval = maintenance_interval
+        self.on_commit = on_commit
+        self.last_error: Optional[Exception] = None
+        self._deferred: Deque[Callable[[sqlite3.Connection], bool]] = deque()
+
+    def submit(self, sql: str, params: tuple = ()) -> None:
+        """Queue a statement, blocking while the queue is full."""
+        self._submit((sql, params))
+
+    def submit_job(self, job: Callable[[sqlite3.Connection], bool]) -> None:
+        """Queue a job to run on the writer connection."""
+        self._submit(job)
+
+    def submit_idle(self, job: Callable[[sqlite3.Connection], bool]) -> None:
+        """Queue a job that only starts once the queue is idle."""
+        started = False
+
+        def idle_job(conn: sqlite3.Connection) -> bool:
+            nonlocal started
+            if not started:
+                started = True
+                return True
+            return job(conn)
+
+        self.submit_job(idle_job)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until everything queued so far has been committed.
+
+        ``timeout`` bounds the whole call, queueing and committing together.
+        Returns ``False`` straight away once the thread has died.
+        """
+        done = threading.Event()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        if not self._put(done, deadline):
+            return False
+        while not done.wait(self._poll(deadline)):
+            if not self.is_alive() or self._expired(deadline):
+                return done.is_set()
+        return True
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Commit outstanding work and stop the thread."""
+        if self._put(_STOP, None if timeout is None else time.monotonic() + timeout):
+            self.join(timeout)
+
+    def _submit(self, item) -> None:
+        if not self._put(item):
+            raise RuntimeError("database writer thread is not running") from self.last_error
+
+    def _put(self, item, deadline: Optional[float] = None) -> bool:
+        """Queue ``item`` unless ``deadline`` passes or the thread dies first."""
+        while self.is_alive():
+            try:
+                self.queue.put(item, timeout=self._poll(deadline))
+                return True
+            except queue.Full:
+                if self._expired(deadline):
+                    return False
+        return False
+
+    @staticmethod
+    def _poll(deadline: Optional[float]) -> float:
+        """Seconds to block before checking again that the thread is alive."""
+        if deadline is None:
+            return POLL_INTERVAL
+        return max(0.0, min(POLL_INTERVAL, deadline - time.monotonic()))
+
+    @staticmethod
+    def _expired(deadline: Optional[float]) -> bool:
+        return deadline is not None and time.monotonic() >= deadline
+
+    def run(self) -> None:
+        conn = _connect(self.db_path)
+        pending = 0
+        deadline = None
+        next_maintenance = None
+        if self.maintenance and self.maintenance_interval > 0:
+            next_maintenance = time.monotonic() + self.maintenance_interval
+        try:
+            while True:
+                if self._deferred:
+                    wait: Optional[float] = 0.0
+                else:
+                    due = [t for t in (deadline, next_maintenance) if t is not None]
+                    wait = max(0.0, min(due) - time.monotonic()) if due else None
+                try:
+                    item = self.queue.get(timeout=wait)
+                except queue.Empty:
+                    item = None
+
+                if item is None or item is _STOP or isinstance(item, threading.Event):
+                    if pending:
+                        self._commit(conn)
+                        pending = 0
+                    deadline = None
+                    if isinstance(item, threading.Event):
+                        item.set()
+                    if item is _STOP:
+                        return
+                    if item is None:
+                        if next_maintenance is not None and time.monotonic() >= next_maintenance:
+                            self._deferred.append(self.maintenance)
+                            next_maintenance = time.monotonic() + self.maintenance_interval
+                        if self._deferred:
+                            self._run_job(conn, self._deferred.popleft())
+                    continue
+
+                if callable(item):
+                    if pending:
+                        self._commit(conn)
+                        pending = 0
+                        deadline = None
+                    self._run_job(conn, item)
+                    continue
+
+                sql, params = item
+                try:
+                    conn.execute(sql, params)
+                    pending += 1
+                except Exception as exc:
+                    self.last_error = exc
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+                if pending >= self.batch_size:
+                    self._commit(conn)
+                    pending = 0
+                    deadline = None
+        finally:
+            conn.close()
+
+    def _run_job(
+        self, conn: sqlite3.Connection, job: Callable[[sqlite3.Connection], bool]
+    ) -> None:
+        # Any failure is contained to the job; the writer must keep running
+        # or every later write would queue for nothing.
+        try:
+            more = job(conn)
+            conn.commit()
+        except Exception as exc:
+            self.last_error = exc
+            try:
+                conn.rollback()
+            except sqlite3.Error:
+                pass
+            return
+        if more:
+            self._deferred.append(job)
+
+    def _commit(self, conn: sqlite3.Connection) -> None:
+        started = time.perf_counter()
+        try:
+            conn.commit()
+        except sqlite3.Error as exc:
+            self.last_error = exc
+            return
+        if self.on_commit is not None:
+            try:
+                self.on_commit(time.perf_counter() - started)
+            except Exception as exc:
+                self.last_error = exc
+
+
+_BOUND: Dict[str, type] = {}
+_BOUND_LOCK = threading.Lock()
 
 
 class DataManager:
-    """Manage persistent data storage for JARVIS."""
+    """Manage persistent data storage for JARVIS.
+
+    This is the single store for conversations and lab readings. Writes
+    are queued to a background thread that owns a single WAL-mode
+    connection and commits in batches, so logging never waits on disk I/O.
+    Call :meth:`flush` to make queued rows visible to readers and
+    :meth:`close` to commit and release the connections.
+    """
 
-    DB_PATH = os.path.join(os.path.dirname(__file__), "jarvis.db")
+    DB_PATH = os.environ.get(
+        "JARVIS_DB_PATH", os.path.join(os.path.dirname(__file__), "jarvis.db")
+    )
+    # Other databases whose ``history`` rows are imported on first open.
+    LEGACY_PATHS: Tuple[str, ...] = (LEGACY_HISTORY_PATH,)
+    # Days to keep per table; ``None`` keeps rows forever.
+    RETENTION_DAYS: Dict[str, Optional[float]] = {
+        "environment": float(os.environ.get("JARVIS_RETENTION_DAYS", "30")),
+        "environment_minute": 30,
+        "environment_hour": 365,
+        "environment_day": None,
+        "conversations": None,
+    }
+    # Called on the writer thread with the seconds each batch commit took.
+    on_commit: Optional[Callable[[float], None]] = None
     _initialized = False
+    _fts = False
+    _writer: Optional[_Writer] = None
+    _local = threading.local()
+    _readers: List[sqlite3.Connection] = []
+    _lock = threading.Lock()
 
     @classmethod
     def init_db(cls) -> None:
         """Create required tables if they don't exist."""
         if cls._initialized:
             return
-        conn = sqlite3.connect(cls.DB_PATH)
-        cur = conn.cursor()
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS conversations (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                speaker TEXT,
-                message TEXT
+        with cls._lock:
+            if cls._initialized:
+                return
+            conn = _connect(cls.DB_PATH)
+            convert_later = _convert_on_writer(conn)
+            if not convert_later:
+                _enable_incremental_vacuum(conn)
+            cur = conn.cursor()
+            cur.execute(
+                """
+                CREATE TABLE IF NOT EXISTS conversations (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    speaker TEXT,
+                    message TEXT
+                )
+                """
             )
-            """
-        )
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS environment (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                temperature REAL,
-                humidity REAL,
-                pump INTEGER,
-                gas_alert INTEGER
+            cur.execute(
+                """
+                CREATE TABLE IF NOT EXISTS environment (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    temperature REAL,
+                    humidity REAL,
+                    pump INTEGER,
+                    gas_alert INTEGER
+                )
+                """
             )
-            """
-        )
+            cur.execute(
+                "CREATE INDEX IF NOT EXISTS idx_environment_timestamp "
+                "ON environment (timestamp)"
+            )
+            cur.execute(
+                """
+                CREATE TABLE IF NOT EXISTS response_cache (
+                    key TEXT PRIMARY KEY,
+                    response TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+                """
+            )
+            _create_rollups(cur)
+            cls._fts = _create_fts(cur, "conversations", "message")
+            conn.commit()
+            cls._migrate(conn)
+            conn.close()
+            cls._writer = _Writer(
+                cls.DB_PATH,
+                maintenance=cls._retention_step,
+                maintenance_interval=RETENTION_INTERVAL,
+                on_commit=cls._report_commit,
+            )
+            cls._writer.start()
+            if convert_later:
+                cls._writer.submit_idle(lambda c: _enable_incremental_vacuum(c) or False)
+            cls._local = threading.local()
+            cls._initialized = True
+
+    @classmethod
+    def _report_commit(cls, seconds: float) -> None:
+        callback = cls.on_commit
+        if callback is not None:
+            callback(seconds)
+
+    @classmethod
+    def _migrate(cls, conn: sqlite3.Connection) -> None:
+        """Bring an older database up to :data:`SCHEMA_VERSION`."""
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version < 1:
+            _import_history(conn)
+            target = os.path.abspath(cls.DB_PATH)
+            for path in cls.LEGACY_PATHS:
+                if os.path.abspath(path) == target or not os.path.exists(path):
+                    continue
+                conn.commit()
+                conn.execute("ATTACH DATABASE ? AS legacy", (path,))
+                try:
+                    _import_history(conn, "legacy")
+                    conn.commit()
+                finally:
+                    conn.execute("DETACH DATABASE legacy")
+        if version < 2:
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(conversations)")]
+            if "session" not in columns:
+                conn.execute("ALTER TABLE conversations ADD COLUMN session TEXT")
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_conversations_session "
+                "ON conversations (session, id)"
+            )
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
         conn.commit()
-        conn.close()
-        cls._initialized = True
 
     @classmethod
-    def log_conversation(cls, speaker: str, message: str) -> None:
-        """Store a conversation entry."""
+    def for_path(cls, db_path: str) -> "type[DataManager]":
+        """Return a manager bound to ``db_path``.
+
+        Every caller asking for the same file shares one writer thread and
+        one set of read connections.
+        """
+        if os.path.abspath(db_path) == os.path.abspath(cls.DB_PATH):
+            return cls
+        key = os.path.abspath(db_path)
+        with _BOUND_LOCK:
+            bound = _BOUND.get(key)
+            if bound is None:
+                bound = type(
+                    cls.__name__,
+                    (cls,),
+                    {
+                        "DB_PATH": db_path,
+                        "LEGACY_PATHS": (),
+                        "on_commit": None,
+                        "_initialized": False,
+                        "_fts": False,
+                        "_writer": None,
+                        "_local": threading.local(),
+                        "_readers": [],
+                        "_lock": threading.Lock(),
+                    },
+                )
+                _BOUND[key] = bound
+                atexit.register(bound.close)
+        return bound
+
+    @classmethod
+    def flush(cls, timeout: Optional[float] = None) -> bool:
+        """Wait until all queued writes are committed."""
+        if not cls._initialized or cls._writer is None:
+            return True
+        return cls._writer.flush(timeout)
+
+    @classmethod
+    def close(cls) -> None:
+        """Commit pending writes and close every open connection."""
+        with cls._lock:
+            if cls._writer is not None:
+                cls._writer.stop()
+                cls._writer = None
+            for conn in cls._readers:
+                conn.close()
+            cls._readers = []
+            cls._local = threading.local()
+            cls._initialized = False
+
+    @classmethod
+    def apply_retention(
+        cls,
+        wait: bool = False,
+        timeout: Optional[float] = None,
+        days: Optional[Dict[str, Optional[float]]] = None,
+    ) -> bool:
+        """Queue a retention pass on the writer thread.
+
+        Rows older than :attr:`RETENTION_DAYS` (or ``days``, which replaces
+        it for this pass) are deleted in chunks of
+        ``RETENTION_CHUNK`` and freed pages are then returned to the file
+        system with ``incremental_vacuum``. Raw environment rows are already
+        summarised in the rollups, so averages are unaffected. The writer
+        also runs this every ``JARVIS_RETENTION_INTERVAL`` seconds.
+        Returns whether the pass finished when ``wait`` is set.
+        """
+        done, _ = cls._queue_retention(days)
+        return done.wait(timeout) if wait else True
+
+    @classmethod
+    def prune(
+        cls, days: Dict[str, Optional[float]], timeout: Optional[float] = None
+    ) -> int:
+        """Run a retention pass over ``days`` and return the rows it deleted.
+
+        Raises ``TimeoutError`` if the pass has not finished in ``timeout``.
+        """
+        done, deleted = cls._queue_retention(days)
+        if not done.wait(timeout):
+            raise TimeoutError("retention pass did not finish in time")
+        return sum(deleted.values())
+
+    @classmethod
+    def _queue_retention(
+        cls, days: Optional[Dict[str, Optional[float]]]
+    ) -> Tuple[threading.Event, Dict[str, int]]:
+        """Queue a retention job; the event is set once its last step commits."""
+        cls.init_db()
+        done = threading.Event()
+        deleted: Dict[str, int] = {}
+
+        def job(conn: sqlite3.Connection) -> bool:
+            try:
+                more = cls._retention_step(conn, days, deleted)
+            except Exception:
+                done.set()
+                raise
+            if not more:
+                conn.commit()
+                done.set()
+            return more
+
+        cls._writer.submit_job(job)
+        return done, deleted
+
+    @classmethod
+    def _retention_step(
+        cls,
+        conn: sqlite3.Connection,
+        days: Optional[Dict[str, Optional[float]]] = None,
+        deleted: Optional[Dict[str, int]] = None,
+    ) -> bool:
+        """Delete one chunk of expired rows or vacuum a batch of pages.
+
+        Deleted row counts are added to ``deleted`` per table when given.
+        """
+        now = time.time()
+        for table, keep in (days or cls.RETENTION_DAYS).items():
+            if keep is None:
+                continue
+            cutoff = now - keep * 86400
+            if table.startswith("environment_"):
+                cur = conn.execute(
+                    f"""
+                    DELETE FROM {table} WHERE bucket IN (
+                        SELECT bucket FROM {table} WHERE bucket < ? LIMIT ?
+                    )
+                    """,
+                    (int(cutoff), RETENTION_CHUNK),
+                )
+            else:
+                cur = conn.execute(
+                    f"""
+                    DELETE FROM {table} WHERE id IN (
+                        SELECT id FROM {table} WHERE timestamp < ? LIMIT ?
+                    )
+                    """,
+                    (
+                        time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(cutoff)),
+                        RETENTION_CHUNK,
+                    ),
+                )
+            if cur.rowcount > 0:
+                if deleted is not None:
+                    deleted[table] = deleted.get(table, 0) + cur.rowcount
+                return True
+        if conn.execute("PRAGMA freelist_count").fetchone()[0]:
+            conn.execute(f"PRAGMA incremental_vacuum({VACUUM_PAGES})").fetchall()
+            return bool(conn.execute("PRAGMA freelist_count").fetchone()[0])
+        return False
+
+    @classmethod
+    def _read_connection(cls) -> sqlite3.Connection:
+        """Return this thread's long-lived read connection."""
         cls.init_db()
-        conn = sqlite3.connect(cls.DB_PATH)
-        conn.execute(
-            "INSERT INTO conversations (speaker, message) VALUES (?, ?)",
-            (speaker, message),
+        conn = getattr(cls._local, "conn", None)
+        if conn is None:
+            conn = _connect(cls.DB_PATH, check_same_thread=False)
+            cls._local.conn = conn
+            with cls._lock:
+                cls._readers.append(conn)
+        return conn
+
+    @classmethod
+    def log_conversation(
+        cls, speaker: str, message: str, session: Optional[str] = None
+    ) -> None:
+        """Store a conversation entry, optionally tagged with a client session."""
+        cls.init_db()
+        cls._writer.submit(
+            "INSERT INTO conversations (timestamp, speaker, message, session) "
+            "VALUES (?, ?, ?, ?)",
+            (_utc_timestamp(), speaker, message, session),
         )
-        conn.commit()
-        conn.close()
+
+    @classmethod
+    def log_conversations(
+        cls, entries: Iterable[Tuple[str, str, str, Optional[str]]]
+    ) -> None:
+        """Store many ``(timestamp, speaker, message, session)`` entries in one transaction."""
+        cls.init_db()
+        rows = list(entries)
+
+        def job(conn: sqlite3.Connection) -> bool:
+            conn.executemany(
+                "INSERT INTO conversations (timestamp, speaker, message, session) "
+                "VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            return False
+
+        cls._writer.submit_job(job)
 
     @classmethod
     def log_environment(
@@ -64,45 +762,294 @@ class DataManager:
     ) -> None:
         """Store environmental measurements."""
         cls.init_db()
-        conn = sqlite3.connect(cls.DB_PATH)
-        conn.execute(
+        cls._writer.submit(
             """
-            INSERT INTO environment (temperature, humidity, pump, gas_alert)
-            VALUES (?, ?, ?, ?)
+            INSERT INTO environment (timestamp, temperature, humidity, pump, gas_alert)
+            VALUES (?, ?, ?, ?, ?)
             """,
             (
+                _utc_timestamp(),
                 temperature,
                 humidity,
                 int(bool(pump)) if pump is not None else None,
                 int(bool(gas_alert)) if gas_alert is not None else None,
             ),
         )
-        conn.commit()
-        conn.close()
 
     @classmethod
-    def average_temperature(cls) -> Optional[float]:
-        """Return the average temperature from logged data."""
+    def store_cached_reply(cls, key: str, response: str, expires_at: float) -> None:
+        """Store a :class:`~jarvis_core.cache.ResponseCache` entry."""
         cls.init_db()
-        conn = sqlite3.connect(cls.DB_PATH)
-        cur = conn.execute(
-            "SELECT AVG(temperature) FROM environment WHERE temperature IS NOT NULL"
+        cls._writer.submit(
+            "INSERT OR REPLACE INTO response_cache (key, response, expires_at) "
+            "VALUES (?, ?, ?)",
+            (key, response, expires_at),
+        )
+
+    @classmethod
+    def delete_cached_replies(cls, key: Optional[str] = None) -> None:
+        """Delete the reply cache entry for ``key``, or every entry."""
+        cls.init_db()
+        if key is None:
+            cls._writer.submit("DELETE FROM response_cache")
+        else:
+            cls._writer.submit("DELETE FROM response_cache WHERE key = ?", (key,))
+
+    @classmethod
+    def fetch_cached_replies(cls, limit: int) -> List[Tuple[str, str, float]]:
+        """Return up to ``limit`` unexpired ``(key, response, expires_at)`` entries.
+
+        Entries expiring last come first; expired ones are deleted.
+        """
+        cls.init_db()
+        now = time.time()
+        cls._writer.submit("DELETE FROM response_cache WHERE expires_at < ?", (now,))
+        cls.flush()
+        cur = cls._read_connection().execute(
+            "SELECT key, response, expires_at FROM response_cache "
+            "WHERE expires_at >= ? ORDER BY expires_at DESC LIMIT ?",
+            (now, limit),
         )
-        value = cur.fetchone()[0]
-        conn.close()
-        return value
+        return cur.fetchall()
 
     @classmethod
-    def average_humidity(cls) -> Optional[float]:
-        """Return the average humidity from logged data."""
+    def fetch_last_messages(
+        cls, limit: int = 10, session: Optional[str] = None
+    ) -> List[Tuple[str, str]]:
+        """Return the newest ``(speaker, message)`` pairs, most recent first.
+
+        With ``session`` only that client session's messages are returned.
+        """
         cls.init_db()
-        conn = sqlite3.connect(cls.DB_PATH)
+        cls.flush()
+        if session is None:
+            cur = cls._read_connection().execute(
+                "SELECT speaker, message FROM conversations ORDER BY id DESC LIMIT ?",
+                (limit,),
+            )
+        else:
+            cur = cls._read_connection().execute(
+                "SELECT speaker, message FROM conversations "
+                "WHERE session = ? ORDER BY id DESC LIMIT ?",
+                (session, limit),
+            )
+        return cur.fetchall()
+
+    @classmethod
+    def search_conversations(
+        cls, query: str, limit: int = 10, since: Optional[datetime] = None
+    ) -> List[Tuple[str, str, str]]:
+        """Return ``(timestamp, speaker, snippet)`` for messages matching ``query``.
+
+        Every word must appear; hits are ranked by BM25 and the snippet
+        brackets the matched terms. ``since`` restricts results to newer
+        messages (naive datetimes are taken as UTC). Falls back to a
+        ``LIKE`` scan, newest first, if SQLite was built without FTS5.
+        """
+        if not query.strip():
+            return []
+        conn = cls._read_connection()
+        after = _to_utc(since).strftime("%Y-%m-%d %H:%M:%S") if since else ""
+        if cls._fts:
+            cur = conn.execute(
+                """
+                SELECT c.timestamp, c.speaker,
+                       snippet(conversations_fts, 0, '[', ']', '...', 12)
+                FROM conversations_fts
+                JOIN conversations AS c ON c.id = conversations_fts.rowid
+                WHERE conversations_fts MATCH ? AND c.timestamp >= ?
+                ORDER BY rank
+                LIMIT ?
+                """,
+                (_fts_query(query), after, limit),
+            )
+            return cur.fetchall()
+        words = query.split()
+        clauses = " AND ".join("message LIKE ? ESCAPE '\\'" for _ in words)
         cur = conn.execute(
-            "SELECT AVG(humidity) FROM environment WHERE humidity IS NOT NULL"
+            f"""
+            SELECT timestamp, speaker, message FROM conversations
+            WHERE {clauses} AND timestamp >= ?
+            ORDER BY id DESC LIMIT ?
+            """,
+            (*[f"%{_like_escape(word)}%" for word in words], after, limit),
+        )
+        return cur.fetchall()
+
+    @classmethod
+    def query_environment(
+        cls,
+        start: datetime,
+        end: Optional[datetime] = None,
+        max_points: Optional[int] = None,
+    ) -> Iterator[Tuple[str, Optional[float], Optional[float], Optional[int], Optional[int]]]:
+        """Yield ``(timestamp, temperature, humidity, pump, gas_alert)`` rows.
+
+        Rows between ``start`` (inclusive) and ``end`` (exclusive, default
+        now) are read through the timestamp index and streamed in chunks.
+        When ``max_points`` is given, SQLite groups the range into at most
+        that many equal-width buckets and returns one averaged row per
+        non-empty bucket, with ``pump``/``gas_alert`` set if they were set
+        at any point in the bucket. Naive datetimes are taken as UTC.
+        """
+        start = _to_utc(start)
+        end = _to_utc(end if end is not None else datetime.now(timezone.utc))
+        bounds = (
+            start.strftime("%Y-%m-%d %H:%M:%S"),
+            end.strftime("%Y-%m-%d %H:%M:%S"),
+        )
+        if max_points:
+            origin = int(start.replace(tzinfo=timezone.utc).timestamp())
+            span = (end - start).total_seconds()
+            width = max(1, -int(-span // max_points))
+            sql = f"""
+                SELECT datetime({origin} + bucket * {width}, 'unixepoch'),
+                       AVG(temperature), AVG(humidity), MAX(pump), MAX(gas_alert)
+                FROM (
+                    SELECT (CAST(strftime('%s', timestamp) AS INTEGER) - {origin})
+                               / {width} AS bucket,
+                           temperature, humidity, pump, gas_alert
+                    FROM environment
+                    WHERE timestamp >= ? AND timestamp < ?
+                )
+                GROUP BY bucket
+                ORDER BY bucket
+            """
+        else:
+            sql = """
+                SELECT timestamp, temperature, humidity, pump, gas_alert
+                FROM environment
+                WHERE timestamp >= ? AND timestamp < ?
+                ORDER BY timestamp
+            """
+        cur = cls._read_connection().execute(sql, bounds)
+        try:
+            while True:
+                rows = cur.fetchmany(FETCH_SIZE)
+                if not rows:
+                    return
+                yield from rows
+        finally:
+            cur.close()
+
+    @classmethod
+    def export_environment(
+        cls,
+        path: str,
+        fmt: str = "csv",
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> int:
+        """Export readings to ``path`` and return the number of rows written.
+
+        ``fmt`` is ``"csv"`` for a single file or ``"npy"`` for a directory
+        of memory-mappable column files (see :mod:`jarvis.export`). Rows are
+        streamed with ``fetchmany`` so memory use stays constant. Naive
+        datetimes are taken as UTC.
+        """
+        from .export import write_csv, write_npy
+
+        writers = {"csv": write_csv, "npy": write_npy}
+        if fmt not in writers:
+            raise ValueError(f"Unsupported export format: {fmt}")
+        stamp = (
+            "CAST(strftime('%s', timestamp) AS INTEGER)" if fmt == "npy" else "timestamp"
+        )
+        bounds = (
+            _to_utc(start or datetime.min).strftime("%Y-%m-%d %H:%M:%S"),
+            _to_utc(end or datetime.max).strftime("%Y-%m-%d %H:%M:%S"),
+        )
+        cls.flush()
+        cur = cls._read_connection().execute(
+            f"""
+            SELECT {stamp}, temperature, humidity, pump, gas_alert
+            FROM environment
+            WHERE timestamp >= ? AND timestamp < ?
+            ORDER BY timestamp
+            """,
+            bounds,
         )
-        value = cur.fetchone()[0]
-        conn.close()
-        return value
+
+        def chunks() -> Iterator[List[tuple]]:
+            while True:
+                rows = cur.fetchmany(FETCH_SIZE)
+                if not rows:
+                    return
+                yield rows
+
+        try:
+            return writers[fmt](path, chunks())
+        finally:
+            cur.close()
+
+    @classmethod
+    def _rollup_stats(cls, column: str, window: Optional[timedelta]) -> tuple:
+        """Aggregate ``column`` from the rollups as ``(count, sum, min, max)``.
+
+        Without a window the daily table covers everything. With one, the
+        window's leading edge is read from minute buckets up to the next
+        hour, then hour buckets up to the next day, then whole days, so the
+        cost depends on the number of buckets rather than stored rows.
+        """
+        prefix = _ROLLUP_COLUMNS[column]
+        select = (
+            f"SELECT {prefix}_count AS c, {prefix}_sum AS s, "
+            f"{prefix}_min AS lo, {prefix}_max AS hi FROM "
+        )
+        if window is None:
+            sql = select + "environment_day"
+            params: tuple = ()
+        else:
+            start = int(time.time() - window.total_seconds())
+            hour = -(-start // 3600) * 3600
+            day = -(-start // 86400) * 86400
+            sql = " UNION ALL ".join(
+                (
+                    select + "environment_minute WHERE bucket >= ? AND bucket < ?",
+                    select + "environment_hour WHERE bucket >= ? AND bucket < ?",
+                    select + "environment_day WHERE bucket >= ?",
+                )
+            )
+            params = (start, hour, hour, day, day)
+        cur = cls._read_connection().execute(
+            f"SELECT SUM(c), SUM(s), MIN(lo), MAX(hi) FROM ({sql})", params
+        )
+        return cur.fetchone()
+
+    @classmethod
+    def _rollup_average(cls, column: str, window: Optional[timedelta]) -> Optional[float]:
+        count, total, _, _ = cls._rollup_stats(column, window)
+        if not count:
+            return None
+        return total / count
+
+    @classmethod
+    def average_temperature(cls, window: Optional[timedelta] = None) -> Optional[float]:
+        """Return the average temperature, optionally over the last ``window``."""
+        return cls._rollup_average("temperature", window)
+
+    @classmethod
+    def average_humidity(cls, window: Optional[timedelta] = None) -> Optional[float]:
+        """Return the average humidity, optionally over the last ``window``."""
+        return cls._rollup_average("humidity", window)
+
+    @classmethod
+    def environment_summary(
+        cls, window: Optional[timedelta] = None
+    ) -> Dict[str, Dict[str, Optional[float]]]:
+        """Return count, mean, min and max for temperature and humidity."""
+        summary = {}
+        for column in _ROLLUP_COLUMNS:
+            count, total, low, high = cls._rollup_stats(column, window)
+            summary[column] = {
+                "count": count or 0,
+                "mean": total / count if count else None,
+                "min": low,
+                "max": high,
+            }
+        return summary
+
+atexit.register(DataManager.close)
 
 
 __all__ = ["DataManager"]
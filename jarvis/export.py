@@ -0,0 +1,120 @@
+"""Stream environment history out of ``jarvis.db`` as CSV or ``.npy`` columns.
+
+Run ``python -m jarvis.export OUTPUT --format npy`` for a command-line export.
+"""
+
+import argparse
+import csv
+import os
+import struct
+import sys
+from array import array
+from datetime import datetime
+from typing import Iterable, List, Optional, Sequence
+
+COLUMNS = ("timestamp", "temperature", "humidity", "pump", "gas_alert")
+
+# NumPy dtype and matching ``array`` typecode per column. Timestamps are
+# Unix seconds; missing floats become NaN and missing flags -1.
+NPY_TYPES = {
+    "timestamp": ("<i8", "q", 0),
+    "temperature": ("<f8", "d", float("nan")),
+    "humidity": ("<f8", "d", float("nan")),
+    "pump": ("|i1", "b", -1),
+    "gas_alert": ("|i1", "b", -1),
+}
+
+_NPY_MAGIC = b"\x93NUMPY\x01\x00"
+_NPY_HEADER_SIZE = 128
+
+
+class NpyColumnWriter:
+    """Append values to a one-dimensional ``.npy`` file of unknown length.
+
+    A fixed-size header is reserved up front and rewritten with the final
+    shape on :meth:`close`, so the data never has to be held in memory.
+    """
+
+    def __init__(self, path: str, descr: str, typecode: str) -> None:
+        self.descr = descr
+        self.typecode = typecode
+        self.count = 0
+        self.file = open(path, "wb")
+        self.file.write(self._header())
+
+    def _header(self) -> bytes:
+        text = "{'descr': '%s', 'fortran_order': False, 'shape': (%d,), }" % (
+            self.descr,
+            self.count,
+        )
+        padding = _NPY_HEADER_SIZE - len(_NPY_MAGIC) - 2 - len(text) - 1
+        header = (text + " " * padding + "\n").encode("latin1")
+        return _NPY_MAGIC + struct.pack("<H", len(header)) + header
+
+    def append(self, values: Sequence) -> None:
+        data = array(self.typecode, values)
+        if sys.byteorder == "big":
+            data.byteswap()
+        data.tofile(self.file)
+        self.count += len(data)
+
+    def close(self) -> None:
+        self.file.seek(0)
+        self.file.write(self._header())
+        self.file.close()
+
+
+def write_csv(path: str, chunks: Iterable[List[tuple]]) -> int:
+    """Write row chunks to ``path`` as CSV and return the row count."""
+    count = 0
+    with open(path, "w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(COLUMNS)
+        for rows in chunks:
+            writer.writerows(rows)
+            count += len(rows)
+    return count
+
+
+def write_npy(directory: str, chunks: Iterable[List[tuple]]) -> int:
+    """Write row chunks to one ``<column>.npy`` file per column in ``directory``.
+
+    The files open with ``numpy.load(path, mmap_mode="r")``.
+    """
+    os.makedirs(directory, exist_ok=True)
+    writers = [
+        NpyColumnWriter(os.path.join(directory, f"{name}.npy"), *NPY_TYPES[name][:2])
+        for name in COLUMNS
+    ]
+    defaults = [NPY_TYPES[name][2] for name in COLUMNS]
+    try:
+        for rows in chunks:
+            for index, writer in enumerate(writers):
+                default = defaults[index]
+                writer.append(
+                    [default if row[index] is None else row[index] for row in rows]
+                )
+    finally:
+        for writer in writers:
+            writer.close()
+    return writers[0].count
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Export JARVIS environment history.")
+    parser.add_argument("output", help="CSV file, or directory for .npy columns")
+    parser.add_argument("--format", choices=("csv", "npy"), default="csv")
+    parser.add_argument("--start", type=datetime.fromisoformat, help="UTC, ISO 8601")
+    parser.add_argument("--end", type=datetime.fromisoformat, help="UTC, ISO 8601")
+    parser.add_argument("--db", help="database file (defaults to jarvis.db)")
+    args = parser.parse_args(argv)
+
+    from .data import DataManager
+
+    store = DataManager.for_path(args.db) if args.db else DataManager
+    count = store.export_environment(args.output, args.format, args.start, args.end)
+    print(f"Exported {count} rows to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 import os
-from PyQt5.QtCore import Qt, QTimer, QObject, QEvent
+from PyQt5.QtCore import Qt, QTimer, QObject, QEvent, pyqtSignal
 from PyQt5.QtGui import QMovie
 from PyQt5.QtWidgets import QApplication
 from PyQt5.QtWidgets import (
@@ -22,6 +22,9 @@ from .lab import LabModule
 class JarvisGUI(QMainWindow):
     """PyQt5 interface for the JARVIS assistant."""
 
+    # Emitted from the core's start-up thread with the error, if any.
+    core_ready = pyqtSignal(object)
+
     def __init__(self) -> None:
         super().__init__()
         self.setWindowTitle("JARVIS Assistant")
@@ -35,9 +38,16 @@ class JarvisGUI(QMainWindow):
 
         self._show_loading()
         self.core = JarvisCore(
-            log_callback=self.log_message, speech_detected_callback=self.indicate_speech
+            log_callback=self.log_message,
+            speech_detected_callback=self.indicate_speech,
+            partial_callback=self.show_partial,
         )
         self.lab_module: LabModule | None = None
+        # The loading screen stays up until the core's resources are ready.
+        self.core_ready.connect(self._on_core_ready)
+        self.core.ready.add_done_callback(
+            lambda future: self.core_ready.emit(future.exception())
+        )
 
     # --------------------------- UI Helpers ---------------------------
     def _show_loading(self) -> None:
@@ -53,7 +63,13 @@ class JarvisGUI(QMainWindow):
             self.loading_label.setText("Loading...")
             self.loading_label.setStyleSheet("color: cyan;")
         self.setCentralWidget(self.loading_label)
-        QTimer.singleShot(2000, self._init_main_screen)
+
+    def _on_core_ready(self, error: Exception | None) -> None:
+        self._init_main_screen()
+        if error is not None:
+            self.start_button.setEnabled(False)
+            self.log_message(f"JARVIS: Failed to start: {error}")
+            QMessageBox.critical(self, "JARVIS", f"Failed to start: {error}")
 
     def _init_main_screen(self) -> None:
         """Create the main interactive interface."""
@@ -128,6 +144,11 @@ class JarvisGUI(QMainWindow):
         self.log_message("JARVIS: Assistant stopped.")
         QMessageBox.information(self, "JARVIS", "Assistant stopped.")
 
+    def closeEvent(self, event) -> None:
+        # Ends the speech thread and, in pipeline mode, the worker processes.
+        self.core.close()
+        super().closeEvent(event)
+
     def open_lab(self) -> None:
         """Launch the Lab module window."""
         if not self.lab_module:
@@ -137,3 +158,7 @@ class JarvisGUI(QMainWindow):
     def indicate_speech(self) -> None:
         """Provide a short cue when speech is detected."""
         QApplication.beep()
+
+    def show_partial(self, text: str) -> None:
+        """Show what has been recognised so far in the status bar."""
+        QTimer.singleShot(0, lambda: self.statusBar().showMessage(text, 3000))
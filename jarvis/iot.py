@@ -57,16 +57,21 @@ class IoTClient:
         if self.log_callback:
             self.log_callback(f"Status update: {self.status}")
 
-    def publish_command(self, device: str, state: str) -> None:
-        """Publish a simple device toggle command."""
+    def publish_command(self, device: str, state: str) -> bool:
+        """Publish a simple device toggle command.
+
+        Returns ``False`` if MQTT is disabled or the publish failed.
+        """
         if not self.client:
-            return
+            return False
         payload = json.dumps({"device": device, "state": state})
         try:
             self.client.publish(COMMAND_TOPIC, payload)
         except Exception as exc:  # pragma: no cover - network dependent
             if self.log_callback:
                 self.log_callback(f"MQTT publish error: {exc}")
+            return False
+        return True
 
     def get_status(self) -> Optional[str]:
         """Return the most recent status message if available."""
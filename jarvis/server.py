@@ -1,28 +1,158 @@
-from flask import Flask, jsonify, request
+import json
+import threading
+import uuid
 
-from jarvis_core import JarvisCore
+from flask import Flask, Response, jsonify, request, stream_with_context
+
+from jarvis_core import ChatGPTModule, JarvisCore
+from jarvis_core.jobs import Job, JobRunner
+from jarvis_core.sessions import SessionStore
+from jarvis_core.singleflight import SingleFlight
+
+from .data import DataManager
+
+SESSION_HEADER = 'X-Session-ID'
+SESSION_COOKIE = 'jarvis_session'
 
 app = Flask(__name__)
-core = JarvisCore()
+_core = None
+_core_lock = threading.Lock()
+# Shared by every session so identical concurrent prompts hit the API once.
+flight = SingleFlight()
+
+
+def get_core() -> JarvisCore:
+    """Return the voice assistant, creating it on first use.
+
+    Creating it starts the speech engine, so it is not done at import.
+    """
+    global _core
+    with _core_lock:
+        if _core is None:
+            _core = JarvisCore()
+        return _core
+
+
+def _new_module() -> ChatGPTModule:
+    """Create a conversation for one client, sharing the core's settings."""
+    core = get_core()
+    return ChatGPTModule(
+        api_key=core.chatgpt.api_key,
+        model=core.chatgpt.model,
+        log_callback=core.log_callback,
+        cache=core.chatgpt.cache,
+        flight=flight,
+    )
+
+
+sessions = SessionStore(_new_module)
+jobs = JobRunner()
+
+
+def _session_id() -> str:
+    """Return the caller's session ID from the header or cookie, or a new one."""
+    session_id = request.headers.get(SESSION_HEADER) or request.cookies.get(SESSION_COOKIE)
+    return session_id or uuid.uuid4().hex
 
 @app.route('/start', methods=['POST'])
 def start_listening():
-    core.start()
+    get_core().start()
     return jsonify({'status': 'listening'})
 
 @app.route('/stop', methods=['POST'])
 def stop_listening():
-    core.stop_listening()
+    # Nothing is listening until /start has created the core.
+    with _core_lock:
+        core = _core
+    if core is not None:
+        core.stop_listening()
     return jsonify({'status': 'stopped'})
 
+def _answer(job: Job, session_id: str, prompt: str) -> str:
+    """Stream a reply into ``job`` on a worker thread and log the exchange."""
+    with sessions.acquire(session_id) as module:
+        for token in module.ask_stream(prompt):
+            job.append(token)
+        response = module.conversation[-1]['content']
+    DataManager.log_conversation('user', prompt, session=session_id)
+    DataManager.log_conversation('jarvis', response, session=session_id)
+    return response
+
+def _sse(event: str, data, event_id=None) -> str:
+    lines = [f'event: {event}']
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f'data: {json.dumps(data)}')
+    return '\n'.join(lines) + '\n\n'
+
 @app.route('/ask', methods=['POST'])
 def ask():
+    """Queue a prompt and return the job ID to poll or stream."""
     data = request.get_json() or {}
     prompt = data.get('q', '').strip()
     if not prompt:
         return jsonify({'error': 'No prompt provided'}), 400
-    response = core.chatgpt.ask(prompt)
-    return jsonify({'response': response})
+    session_id = _session_id()
+    # A retry of a prompt still being answered attaches to the running job.
+    job = jobs.submit(
+        lambda job: _answer(job, session_id, prompt), key=(session_id, prompt)
+    )
+    resp = jsonify({
+        'job': job.id,
+        'session': session_id,
+        'stream': f'/ask/{job.id}/stream',
+    })
+    resp.status_code = 202
+    resp.set_cookie(SESSION_COOKIE, session_id, httponly=True)
+    return resp
+
+@app.route('/ask/<job_id>', methods=['GET'])
+def ask_status(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    body = {'status': job.status}
+    if job.done:
+        body['response'] = job.response
+        if job.error:
+            body['error'] = job.error
+    return jsonify(body)
+
+@app.route('/ask/<job_id>/stream', methods=['GET'])
+def ask_stream(job_id):
+    """Stream a job's tokens as Server-Sent Events.
+
+    Each ``token`` event carries its index as the event ID, so a client that
+    reconnects with ``Last-Event-ID`` resumes where it left off. The stream
+    ends with a ``done`` (or ``error``) event holding the full reply.
+    """
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    last_id = request.headers.get('Last-Event-ID', '')
+    start = int(last_id) + 1 if last_id.isdigit() else 0
+
+    def events():
+        index = start
+        while True:
+            tokens, done = job.wait(index, timeout=15)
+            for token in tokens:
+                yield _sse('token', token, index)
+                index += 1
+            if done and index >= len(job.tokens):
+                if job.error:
+                    yield _sse('error', {'error': job.error})
+                else:
+                    yield _sse('done', {'response': job.response})
+                return
+            if not tokens:
+                yield ': keep-alive\n\n'
+
+    return Response(
+        stream_with_context(events()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
 
 def main() -> None:
     app.run(host='0.0.0.0', port=5000)
@@ -0,0 +1,160 @@
+"""Transcribe a directory of WAV recordings into the conversation history.
+
+Run ``python -m jarvis.transcribe RECORDINGS/ --workers 4`` to transcribe
+every ``.wav`` file offline with Vosk and store each one as a ``user``
+entry timestamped with the file's modification time.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import wave
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional, Tuple
+
+from vosk import KaldiRecognizer, Model
+
+CHUNK_FRAMES = 4000
+INSERT_BATCH = 100
+
+# Loaded once per worker process by ``_init_worker``.
+_model = None
+
+
+def _init_worker(model_path: str) -> None:
+    global _model
+    _model = Model(model_path)
+
+
+def transcribe_file(path: str) -> Tuple[str, str, float, Optional[str]]:
+    """Return ``(path, text, audio_seconds, error)`` for one WAV file.
+
+    The file must be 16-bit mono PCM, which is what Vosk accepts.
+    """
+    try:
+        with wave.open(path, "rb") as wav:
+            if wav.getnchannels() != 1 or wav.getsampwidth() != 2 or wav.getcomptype() != "NONE":
+                raise ValueError("expected 16-bit mono PCM")
+            rate = wav.getframerate()
+            seconds = wav.getnframes() / rate
+            recognizer = KaldiRecognizer(_model, rate)
+            parts: List[str] = []
+            while True:
+                data = wav.readframes(CHUNK_FRAMES)
+                if not data:
+                    break
+                if recognizer.AcceptWaveform(data):
+                    parts.append(json.loads(recognizer.Result()).get("text", ""))
+            parts.append(json.loads(recognizer.FinalResult()).get("text", ""))
+    except Exception as exc:
+        return path, "", 0.0, str(exc)
+    return path, " ".join(part for part in parts if part), seconds, None
+
+
+def find_recordings(directory: str) -> List[str]:
+    """Return the ``.wav`` files under ``directory``, oldest first."""
+    paths = [
+        os.path.join(root, name)
+        for root, _, names in os.walk(directory)
+        for name in names
+        if name.lower().endswith(".wav")
+    ]
+    return sorted(paths, key=lambda p: (os.path.getmtime(p), p))
+
+
+def _results(paths: List[str], model_path: str, workers: int) -> Iterator[tuple]:
+    if workers <= 1:
+        _init_worker(model_path)
+        yield from map(transcribe_file, paths)
+        return
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(model_path,)
+    ) as pool:
+        yield from pool.map(transcribe_file, paths, chunksize=1)
+
+
+def transcribe_directory(
+    directory: str,
+    model_path: str,
+    workers: Optional[int] = None,
+    store=None,
+    session: Optional[str] = None,
+    log_callback=None,
+) -> dict:
+    """Transcribe every recording in ``directory`` and store the text.
+
+    Files are spread over ``workers`` processes (one per core by default),
+    each loading the Vosk model once. Transcripts are inserted in batches
+    of ``INSERT_BATCH`` through ``store`` (the
+    :class:`~jarvis.data.DataManager` by default). Returns counts, the
+    seconds of audio and of wall time, and their ratio as ``speed``.
+    """
+    if store is None:
+        from .data import DataManager
+
+        store = DataManager
+    paths = find_recordings(directory)
+    workers = min(workers or os.cpu_count() or 1, max(len(paths), 1))
+    started = time.monotonic()
+    stats = {"files": 0, "failed": 0, "empty": 0, "audio_seconds": 0.0}
+    batch: List[tuple] = []
+    for path, text, seconds, error in _results(paths, model_path, workers):
+        if error:
+            stats["failed"] += 1
+            if log_callback:
+                log_callback(f"{path}: {error}")
+            continue
+        stats["files"] += 1
+        stats["audio_seconds"] += seconds
+        if not text:
+            stats["empty"] += 1
+            continue
+        stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(os.path.getmtime(path)))
+        batch.append((stamp, "user", text, session))
+        if len(batch) >= INSERT_BATCH:
+            store.log_conversations(batch)
+            batch = []
+    if batch:
+        store.log_conversations(batch)
+    store.flush()
+    stats["wall_seconds"] = time.monotonic() - started
+    stats["speed"] = stats["audio_seconds"] / stats["wall_seconds"] if stats["wall_seconds"] else 0.0
+    return stats
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Transcribe WAV recordings into JARVIS history.")
+    parser.add_argument("directory", help="directory searched recursively for .wav files")
+    parser.add_argument(
+        "--model",
+        default=os.getenv("VOSK_MODEL_PATH", "model"),
+        help="Vosk model directory (defaults to VOSK_MODEL_PATH or ./model)",
+    )
+    parser.add_argument("--workers", type=int, help="processes to use (defaults to one per core)")
+    parser.add_argument("--session", help="session tag stored with each entry")
+    parser.add_argument("--db", help="database file (defaults to jarvis.db)")
+    args = parser.parse_args(argv)
+
+    from .data import DataManager
+
+    store = DataManager.for_path(args.db) if args.db else DataManager
+    stats = transcribe_directory(
+        args.directory,
+        args.model,
+        workers=args.workers,
+        store=store,
+        session=args.session,
+        log_callback=lambda message: print(message, file=sys.stderr),
+    )
+    print(
+        f"Transcribed {stats['files']} files ({stats['audio_seconds']:.1f} s of audio) "
+        f"in {stats['wall_seconds']:.1f} s: {stats['speed']:.2f} audio-seconds per second"
+    )
+    if stats["failed"]:
+        print(f"{stats['failed']} files could not be read", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,36 @@
 """Core package for the JARVIS assistant."""
 
-from .core import JarvisCore
-from .chatgpt import ChatGPTModule
-from .database import init_db, insert_message, fetch_last_messages
-
 __all__ = [
     "JarvisCore",
     "ChatGPTModule",
     "init_db",
     "insert_message",
     "fetch_last_messages",
+    "search_history",
+    "prune_history",
 ]
+
+_DATABASE_HELPERS = {
+    "init_db",
+    "insert_message",
+    "fetch_last_messages",
+    "search_history",
+    "prune_history",
+}
+
+
+def __getattr__(name: str):
+    """Lazily import modules so ``import jarvis_core`` stays cheap."""
+    if name == "JarvisCore":
+        from .core import JarvisCore
+
+        return JarvisCore
+    if name == "ChatGPTModule":
+        from .chatgpt import ChatGPTModule
+
+        return ChatGPTModule
+    if name in _DATABASE_HELPERS:
+        from . import database
+
+        return getattr(database, name)
+    raise AttributeError(name)
@@ -0,0 +1,107 @@
+import json
+import os
+import queue
+import threading
+from typing import Callable, Dict, Optional
+
+from vosk import KaldiRecognizer, Model
+
+from .audio import SAMPLE_RATE
+
+_models: Dict[str, Model] = {}
+_models_lock = threading.Lock()
+
+
+def load_model(path: str) -> Model:
+    """Return the Vosk model at ``path``, loading it only once per process."""
+    key = os.path.abspath(path)
+    with _models_lock:
+        model = _models.get(key)
+        if model is None:
+            model = _models[key] = Model(path)
+    return model
+
+
+class StreamingRecognizer(threading.Thread):
+    """Decode audio with one persistent Vosk recognizer as frames arrive.
+
+    Frames handed to :meth:`push` are decoded on this thread, so capture
+    never waits for recognition. Partial hypotheses are passed to
+    ``on_partial`` as they change; when Vosk detects the end of an
+    utterance its final text is queued for :meth:`get`. Callers that
+    already decode on a thread of their own can use :meth:`feed` and
+    :meth:`finish` instead of starting this one.
+    """
+
+    def __init__(
+        self,
+        model,
+        sample_rate: int = SAMPLE_RATE,
+        on_partial: Optional[Callable[[str], None]] = None,
+        log_callback: Optional[Callable[[str], None]] = None,
+        recognizer=None,
+    ) -> None:
+        super().__init__(daemon=True, name="jarvis-asr")
+        self.recognizer = recognizer or KaldiRecognizer(model, sample_rate)
+        self.on_partial = on_partial
+        self.log_callback = log_callback
+        self.partial = ""
+        self.error: Optional[Exception] = None
+        self._frames: "queue.Queue[Optional[bytes]]" = queue.Queue()
+        self._results: "queue.Queue[str]" = queue.Queue()
+
+    def push(self, frame: bytes) -> None:
+        """Queue a captured frame for decoding."""
+        self._frames.put(frame)
+
+    def run(self) -> None:
+        try:
+            while True:
+                frame = self._frames.get()
+                if frame is None:
+                    break
+                self.feed(frame)
+            self.finish()
+        except Exception as exc:
+            self.error = exc
+            if self.log_callback:
+                self.log_callback(f"Speech recognition error: {exc}")
+
+    def feed(self, frame: bytes) -> None:
+        """Decode one frame on the calling thread.
+
+        A changed partial hypothesis goes to ``on_partial``; a finished
+        utterance is queued for :meth:`get`.
+        """
+        if self.recognizer.AcceptWaveform(frame):
+            self._final(self.recognizer.Result())
+            return
+        partial = json.loads(self.recognizer.PartialResult()).get("partial", "")
+        if partial != self.partial:
+            self.partial = partial
+            if self.on_partial and partial:
+                self.on_partial(partial)
+
+    def finish(self) -> None:
+        """Queue whatever is left of the current utterance for :meth:`get`."""
+        self._final(self.recognizer.FinalResult())
+
+    def _final(self, result: str) -> None:
+        self.partial = ""
+        text = json.loads(result).get("text", "")
+        if text:
+            self._results.put(text)
+
+    def get(self, timeout: Optional[float] = None) -> Optional[str]:
+        """Return the next finished utterance, or ``None`` if none arrives in time."""
+        try:
+            return self._results.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def stop(self) -> None:
+        """Finish decoding queued frames and flush the last utterance."""
+        self._frames.put(None)
+
+
+__all__ = ["StreamingRecognizer", "load_model"]
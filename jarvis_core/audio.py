@@ -0,0 +1,263 @@
+import math
+import os
+import queue
+import threading
+from array import array
+from collections import deque
+from typing import TYPE_CHECKING, Callable, Deque, List, Optional
+
+if TYPE_CHECKING:  # imported on use; it is slow to import
+    import speech_recognition as sr
+
+try:
+    import webrtcvad
+except Exception:  # pragma: no cover - optional dependency
+    webrtcvad = None
+
+SAMPLE_RATE = int(os.environ.get("JARVIS_SAMPLE_RATE", "16000"))
+FRAME_MS = 30
+PRE_ROLL_MS = int(os.environ.get("JARVIS_VAD_PRE_ROLL_MS", "300"))
+END_SILENCE_MS = int(os.environ.get("JARVIS_VAD_END_SILENCE_MS", "800"))
+MAX_SEGMENT_SECONDS = float(os.environ.get("JARVIS_VAD_MAX_SECONDS", "15"))
+SEGMENT_QUEUE_SIZE = 8
+
+
+def frame_rms(frame: bytes) -> float:
+    """Root mean square of a frame of 16-bit little-endian samples."""
+    samples = array("h", frame[: len(frame) - len(frame) % 2])
+    if not samples:
+        return 0.0
+    return math.sqrt(sum(s * s for s in samples) / len(samples))
+
+
+class EnergyVAD:
+    """Speech detector comparing frame energy with an adaptive threshold.
+
+    The threshold follows the ambient level during silence the same way
+    ``speech_recognition``'s dynamic energy threshold does.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 300.0,
+        ratio: float = 1.5,
+        damping: float = 0.15,
+        frame_ms: int = FRAME_MS,
+    ) -> None:
+        self.threshold = threshold
+        self.ratio = ratio
+        self._damping = damping ** (frame_ms / 1000)
+
+    def calibrate(self, frames: List[bytes]) -> None:
+        if frames:
+            ambient = sum(frame_rms(f) for f in frames) / len(frames)
+            self.threshold = max(ambient * self.ratio, 50.0)
+
+    def is_speech(self, frame: bytes) -> bool:
+        energy = frame_rms(frame)
+        if energy > self.threshold:
+            return True
+        target = energy * self.ratio
+        self.threshold = self.threshold * self._damping + target * (1 - self._damping)
+        return False
+
+
+class WebRtcVAD:
+    """Speech detector backed by the optional ``webrtcvad`` package."""
+
+    def __init__(self, sample_rate: int = SAMPLE_RATE, aggressiveness: int = 2) -> None:
+        self.sample_rate = sample_rate
+        self._vad = webrtcvad.Vad(aggressiveness)
+
+    def calibrate(self, frames: List[bytes]) -> None:
+        pass
+
+    def is_speech(self, frame: bytes) -> bool:
+        return self._vad.is_speech(frame, self.sample_rate)
+
+
+def make_vad(sample_rate: int = SAMPLE_RATE, frame_ms: int = FRAME_MS):
+    """Use WebRTC's detector when it is installed and supports the format."""
+    supported = sample_rate in (8000, 16000, 32000, 48000) and frame_ms in (10, 20, 30)
+    if webrtcvad is not None and supported:
+        return WebRtcVAD(sample_rate)
+    return EnergyVAD(frame_ms=frame_ms)
+
+
+class Segmenter:
+    """Cut a stream of audio frames into utterances.
+
+    Recent frames are kept in a fixed-size ring so a segment starts
+    ``pre_roll`` frames before speech was detected. Speech starts after
+    ``start_frames`` consecutive voiced frames and ends after
+    ``end_frames`` unvoiced ones, or once ``max_frames`` are collected.
+    """
+
+    def __init__(
+        self,
+        vad,
+        pre_roll: int = PRE_ROLL_MS // FRAME_MS,
+        start_frames: int = 3,
+        end_frames: int = END_SILENCE_MS // FRAME_MS,
+        max_frames: int = int(MAX_SEGMENT_SECONDS * 1000 / FRAME_MS),
+    ) -> None:
+        self.vad = vad
+        self.start_frames = start_frames
+        self.end_frames = end_frames
+        self.max_frames = max_frames
+        self.ring: Deque[bytes] = deque(maxlen=pre_roll + start_frames)
+        self.active = False
+        self._frames: List[bytes] = []
+        self._voiced = 0
+        self._silent = 0
+
+    def feed(self, frame: bytes) -> Optional[bytes]:
+        """Add a frame and return the finished utterance, if this ended one."""
+        speech = self.vad.is_speech(frame)
+        if not self.active:
+            self.ring.append(frame)
+            self._voiced = self._voiced + 1 if speech else 0
+            if self._voiced >= self.start_frames:
+                self.active = True
+                self._frames = list(self.ring)
+                self._silent = 0
+                self.ring.clear()
+            return None
+        self._frames.append(frame)
+        self._silent = 0 if speech else self._silent + 1
+        if self._silent < self.end_frames and len(self._frames) < self.max_frames:
+            return None
+        segment = b"".join(self._frames)
+        self.active = False
+        self._frames = []
+        self._voiced = 0
+        return segment
+
+    def reset(self) -> None:
+        """Drop any half-collected utterance and the pre-roll ring."""
+        self.ring.clear()
+        self.active = False
+        self._frames = []
+        self._voiced = 0
+        self._silent = 0
+
+
+class AudioCapture(threading.Thread):
+    """Keep the microphone open and queue each detected utterance.
+
+    Frames are read continuously, so speech that starts while an earlier
+    utterance is still being recognised is not lost. Segments are queued
+    as :class:`speech_recognition.AudioData`; if recognition falls more
+    than ``SEGMENT_QUEUE_SIZE`` behind, the oldest is dropped. A device
+    error ends the thread and is kept in :attr:`error`.
+
+    With ``on_frame`` every frame is handed to that callback (such as a
+    streaming recognizer) instead, and the detector only drives
+    ``on_speech`` and ``on_speech_end``.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = SAMPLE_RATE,
+        frame_ms: int = FRAME_MS,
+        vad=None,
+        on_speech: Optional[Callable[[], None]] = None,
+        log_callback: Optional[Callable[[str], None]] = None,
+        device_index: Optional[int] = None,
+        on_frame: Optional[Callable[[bytes], None]] = None,
+        on_speech_end: Optional[Callable[[], None]] = None,
+    ) -> None:
+        super().__init__(daemon=True, name="jarvis-capture")
+        self.sample_rate = sample_rate
+        self.frame_samples = sample_rate * frame_ms // 1000
+        self.frame_ms = frame_ms
+        self.segmenter = Segmenter(vad or make_vad(sample_rate, frame_ms))
+        self.on_speech = on_speech
+        self.on_frame = on_frame
+        self.on_speech_end = on_speech_end
+        self.log_callback = log_callback
+        self.device_index = device_index
+        self.sample_width = 2
+        self.segments: "queue.Queue[sr.AudioData]" = queue.Queue(SEGMENT_QUEUE_SIZE)
+        self.error: Optional[Exception] = None
+        self._stopped = threading.Event()
+        self._muted = threading.Event()
+
+    def run(self) -> None:
+        import speech_recognition as sr
+
+        try:
+            with sr.Microphone(
+                device_index=self.device_index,
+                sample_rate=self.sample_rate,
+                chunk_size=self.frame_samples,
+            ) as source:
+                self.sample_width = source.SAMPLE_WIDTH
+                # Calibrate once for the life of the stream, not per utterance.
+                ambient = [
+                    source.stream.read(source.CHUNK) for _ in range(1000 // self.frame_ms)
+                ]
+                self.segmenter.vad.calibrate(ambient)
+                while not self._stopped.is_set():
+                    self.feed(source.stream.read(source.CHUNK))
+        except Exception as exc:
+            self.error = exc
+            if self.log_callback:
+                self.log_callback(f"Microphone error: {exc}")
+
+    def feed(self, frame: bytes) -> None:
+        """Run one captured frame through the segmenter."""
+        if self._muted.is_set():
+            # Reset here rather than in mute(): only this thread may touch
+            # the segmenter while it is running.
+            if self.segmenter.active or self.segmenter.ring:
+                self.segmenter.reset()
+            return
+        if self.on_frame:
+            self.on_frame(frame)
+        was_active = self.segmenter.active
+        segment = self.segmenter.feed(frame)
+        if self.segmenter.active and not was_active and self.on_speech:
+            self.on_speech()
+        if segment is not None and self.on_speech_end:
+            self.on_speech_end()
+        if segment is None or self.on_frame:
+            return
+        import speech_recognition as sr
+
+        audio = sr.AudioData(segment, self.sample_rate, self.sample_width)
+        while True:
+            try:
+                self.segments.put_nowait(audio)
+                return
+            except queue.Full:
+                try:
+                    self.segments.get_nowait()
+                except queue.Empty:
+                    pass
+                if self.log_callback:
+                    self.log_callback("Recognition is falling behind; dropped an utterance.")
+
+    def get(self, timeout: Optional[float] = None) -> "Optional[sr.AudioData]":
+        """Return the next utterance, or ``None`` if none arrives in time."""
+        try:
+            return self.segments.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def mute(self) -> None:
+        """Discard frames, e.g. while JARVIS is speaking, without closing the stream.
+
+        Any half-collected utterance is dropped by the capture thread when
+        it sees the next frame.
+        """
+        self._muted.set()
+
+    def unmute(self) -> None:
+        self._muted.clear()
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+
+__all__ = ["AudioCapture", "EnergyVAD", "Segmenter", "WebRtcVAD", "frame_rms", "make_vad"]
@@ -0,0 +1,209 @@
+import itertools
+import os
+import random
+import sys
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Protocol
+
+from .ratelimit import retry_after
+
+LLM_BACKEND = os.environ.get("JARVIS_LLM_BACKEND", "openai")
+FAKE_LATENCY = float(os.environ.get("JARVIS_FAKE_LATENCY", "0.3"))
+FAKE_TOKENS_PER_SECOND = float(os.environ.get("JARVIS_FAKE_TOKENS_PER_SECOND", "30"))
+FAKE_ERROR_RATE = float(os.environ.get("JARVIS_FAKE_ERROR_RATE", "0"))
+FAKE_SEED = int(os.environ.get("JARVIS_FAKE_SEED", "0"))
+
+Message = Dict[str, str]
+
+_UNSET = object()
+_pending_key = _UNSET
+
+
+def _openai():
+    """Import the OpenAI client on first use; it takes a few hundred ms to import."""
+    global _pending_key
+    import openai
+
+    if _pending_key is not _UNSET:
+        openai.api_key, _pending_key = _pending_key, _UNSET
+    return openai
+
+
+def set_api_key(key: Optional[str]) -> None:
+    """Set ``openai.api_key`` without importing the client before it is used."""
+    global _pending_key
+    openai = sys.modules.get("openai")
+    if openai is not None:
+        openai.api_key, _pending_key = key, _UNSET
+    else:
+        _pending_key = key
+
+
+class BackendError(Exception):
+    """A request failed and retrying is not expected to help."""
+
+
+class BackendUnavailable(BackendError):
+    """The backend could not be reached; the request may be retried."""
+
+
+class RateLimited(BackendError):
+    """The backend refused the request for exceeding its rate limit."""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class LLMBackend(Protocol):
+    """A chat completion service.
+
+    ``stream`` sends the request before returning, so a failure to start
+    raises there; errors later in the reply are raised while iterating.
+    Implementations raise the :class:`BackendError` family.
+    """
+
+    @property
+    def available(self) -> bool: ...
+
+    def complete(self, model: str, messages: List[Message]) -> str: ...
+
+    def stream(self, model: str, messages: List[Message]) -> Iterator[str]: ...
+
+
+class OpenAIBackend:
+    """The OpenAI chat completions API, using the module-level API key."""
+
+    @property
+    def available(self) -> bool:
+        if _pending_key is not _UNSET and "openai" not in sys.modules:
+            return bool(_pending_key)
+        return bool(_openai().api_key)
+
+    @staticmethod
+    def _error(exc: Exception) -> BackendError:
+        openai = _openai()
+        if isinstance(exc, openai.RateLimitError):
+            return RateLimited(str(exc), retry_after(exc))
+        if isinstance(exc, (openai.APIConnectionError, openai.APITimeoutError)):
+            return BackendUnavailable(str(exc))
+        return BackendError(str(exc))
+
+    def complete(self, model: str, messages: List[Message]) -> str:
+        openai = _openai()
+        try:
+            response = openai.ChatCompletion.create(model=model, messages=messages)
+        except openai.OpenAIError as exc:
+            raise self._error(exc) from exc
+        return response.choices[0].message["content"]
+
+    def stream(self, model: str, messages: List[Message]) -> Iterator[str]:
+        openai = _openai()
+        try:
+            response = openai.ChatCompletion.create(
+                model=model, messages=messages, stream=True
+            )
+        except openai.OpenAIError as exc:
+            raise self._error(exc) from exc
+        return self._tokens(response)
+
+    def _tokens(self, response) -> Iterator[str]:
+        openai = _openai()
+        try:
+            for chunk in response:
+                token = chunk.choices[0].delta.get("content")
+                if token:
+                    yield token
+        except openai.OpenAIError as exc:
+            raise self._error(exc) from exc
+
+
+class FakeBackend:
+    """Offline stand-in that answers after a set latency at a set token rate.
+
+    Replies echo the last user message, padded to ``reply_words`` words. A
+    share ``error_rate`` of requests fails, alternating at random between
+    rate limit and connection errors. Failures and replies depend only on
+    ``seed`` and the order of requests, so runs are repeatable.
+    """
+
+    def __init__(
+        self,
+        latency: float = FAKE_LATENCY,
+        tokens_per_second: float = FAKE_TOKENS_PER_SECOND,
+        error_rate: float = FAKE_ERROR_RATE,
+        reply_words: int = 30,
+        seed: int = FAKE_SEED,
+    ) -> None:
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.error_rate = error_rate
+        self.reply_words = reply_words
+        self.requests = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @property
+    def available(self) -> bool:
+        return True
+
+    def _begin(self) -> None:
+        with self._lock:
+            self.requests += 1
+            failed = self._random.random() < self.error_rate
+            rate_limited = self._random.random() < 0.5
+        time.sleep(self.latency)
+        if failed and rate_limited:
+            raise RateLimited("Simulated rate limit", retry_after=1.0)
+        if failed:
+            raise BackendUnavailable("Simulated connection error")
+
+    def _reply(self, messages: List[Message]) -> List[str]:
+        prompt = next(
+            (m["content"] for m in reversed(messages) if m["role"] == "user"), ""
+        )
+        words = prompt.split() or ["nothing"]
+        filler = itertools.islice(itertools.cycle(words), self.reply_words)
+        return ["Understood."] + [f" {word}" for word in filler] + ["."]
+
+    def complete(self, model: str, messages: List[Message]) -> str:
+        self._begin()
+        tokens = self._reply(messages)
+        if self.tokens_per_second > 0:
+            time.sleep(len(tokens) / self.tokens_per_second)
+        return "".join(tokens)
+
+    def stream(self, model: str, messages: List[Message]) -> Iterator[str]:
+        self._begin()
+        return self._tokens(self._reply(messages))
+
+    def _tokens(self, tokens: List[str]) -> Iterator[str]:
+        for token in tokens:
+            if self.tokens_per_second > 0:
+                time.sleep(1 / self.tokens_per_second)
+            yield token
+
+
+BACKENDS = {"openai": OpenAIBackend, "fake": FakeBackend}
+
+
+def make_backend(name: Optional[str] = None) -> LLMBackend:
+    """Create the backend named by ``name`` or ``JARVIS_LLM_BACKEND``."""
+    name = (name or LLM_BACKEND).lower()
+    try:
+        return BACKENDS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown LLM backend: {name}") from None
+
+
+__all__ = [
+    "BackendError",
+    "BackendUnavailable",
+    "FakeBackend",
+    "LLMBackend",
+    "OpenAIBackend",
+    "RateLimited",
+    "make_backend",
+    "set_api_key",
+]
@@ -0,0 +1,102 @@
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from jarvis.data import DataManager
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+
+
+class ResponseCache:
+    """LRU cache of replies with a per-entry time-to-live.
+
+    Keys combine the normalised prompt with a hash of the context the
+    reply depends on (see :meth:`make_key`). When ``db_path`` is given,
+    entries are also written to that database's ``response_cache`` table
+    through the :class:`~jarvis.data.DataManager` writer thread, and
+    reloaded by :meth:`load` (or on first use).
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        ttl: float = 3600.0,
+        db_path: Optional[str] = None,
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._store = DataManager.for_path(db_path) if db_path else None
+        self._loaded = self._store is None
+
+    @staticmethod
+    def make_key(prompt: str, context: str = "") -> str:
+        """Return a key for ``prompt`` that ignores case, punctuation and spacing."""
+        normalised = " ".join(_PUNCTUATION.sub(" ", prompt.lower()).split())
+        digest = hashlib.sha256(context.encode("utf-8")).hexdigest()[:16]
+        return f"{digest}:{normalised}"
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached reply for ``key`` or ``None`` if absent or expired."""
+        with self._lock:
+            self._load()
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.time():
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        """Store ``value`` under ``key``, evicting the least recently used entry."""
+        expires = time.time() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._load()
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            if self._store is not None:
+                self._store.store_cached_reply(key, value, expires)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._loaded = True
+            if self._store is not None:
+                self._store.delete_cached_replies()
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counters and the current size."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+    def load(self) -> None:
+        """Read persisted entries once the database has been initialised."""
+        with self._lock:
+            self._load()
+
+    def _remove(self, key: str) -> None:
+        self._entries.pop(key, None)
+        if self._store is not None:
+            self._store.delete_cached_replies(key)
+
+    def _load(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        rows = self._store.fetch_cached_replies(self.max_entries)
+        for key, response, expires in reversed(rows):
+            self._entries[key] = (expires, response)
+
+
+__all__ = ["ResponseCache"]
@@ -1,17 +1,50 @@
+import json
 import os
-import time
-import openai
-from openai import APIConnectionError, APITimeoutError, RateLimitError, OpenAIError
+from typing import Iterator, Optional, Tuple
+
+from .backends import (
+    BackendError,
+    BackendUnavailable,
+    LLMBackend,
+    RateLimited,
+    make_backend,
+    set_api_key,
+)
+from .cache import ResponseCache
+from .context import TokenBudget
+from .ratelimit import BACKGROUND, RateScheduler, shared_scheduler
+from .singleflight import SingleFlight
 
 
 class ChatGPTModule:
     """Handle ChatGPT API interactions with fallback behavior."""
 
-    def __init__(self, api_key: str | None = None, model: str = "gpt-3.5-turbo", log_callback=None) -> None:
+    def __init__(
+        self,
+        api_key: str | None = None,
+        model: str = "gpt-3.5-turbo",
+        log_callback=None,
+        budget: TokenBudget | None = None,
+        cache: ResponseCache | None = None,
+        flight: SingleFlight | None = None,
+        scheduler: RateScheduler | None = None,
+        priority: int = BACKGROUND,
+        backend: LLMBackend | None = None,
+    ) -> None:
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
-        openai.api_key = self.api_key
+        set_api_key(self.api_key)
         self.model = model
+        self.backend = backend or make_backend()
         self.log_callback = log_callback
+        self.budget = budget or TokenBudget()
+        self.cache = cache
+        self.flight = flight
+        self.scheduler = scheduler or shared_scheduler()
+        self.priority = priority
+        # Retries the latest request needed, or None if the latest reply
+        # came from the cache or another caller's request; read by the
+        # latency metrics.
+        self.retries: Optional[int] = None
         self.conversation = [
             {
                 "role": "system",
@@ -22,48 +55,141 @@ class ChatGPTModule:
             }
         ]
 
-    def ask(self, prompt: str) -> str:
-        """Send a prompt to ChatGPT and return the reply."""
-        self.conversation.append({"role": "user", "content": prompt})
-        if not openai.api_key:
-            if self.log_callback:
-                self.log_callback("OPENAI_API_KEY not configured.")
-            reply = "Apologies, I'm currently unable to access my knowledge base."
-            self.conversation.append({"role": "assistant", "content": reply})
-            return reply
+    def _append(self, role: str, content: str) -> None:
+        """Add a message and evict old turns that no longer fit the budget."""
+        self.conversation.append({"role": role, "content": content})
+        self.budget.trim(self.conversation)
+
+    def _context_key(self, prompt: str) -> str:
+        # Cached and in-flight replies are shared only between
+        # conversations with identical history, so a follow-up such as
+        # "why?" is never answered from another conversation.
+        context = json.dumps([self.model, self.conversation[:-1]])
+        return ResponseCache.make_key(prompt, context)
 
+    def _create(self, stream: bool = False) -> Tuple[Optional[object], Optional[str]]:
+        """Call the backend with retries, paced by :attr:`scheduler`.
+
+        Returns ``(response, None)`` on success, where ``response`` is the
+        reply text or, with ``stream``, an iterator of its tokens. Returns
+        ``(None, reply)`` with the fallback reply to use when every attempt
+        failed.
+        """
         max_retries = 3
+        tokens = self.budget.total_tokens(self.conversation)
         for attempt in range(1, max_retries + 1):
+            self.retries = attempt - 1
+            self.scheduler.acquire(tokens, self.priority)
             try:
-                response = openai.ChatCompletion.create(
-                    model=self.model, messages=self.conversation
-                )
-                reply = response.choices[0].message["content"].strip()
-                break
-            except RateLimitError as exc:
+                request = self.backend.stream if stream else self.backend.complete
+                return request(self.model, self.conversation), None
+            except RateLimited as exc:
                 if self.log_callback:
                     self.log_callback(
                         f"ChatGPT rate limit (attempt {attempt}): {exc}"
                     )
                 if attempt == max_retries:
-                    reply = "Sorry, the network is busy right now."
-                    break
-                time.sleep(2 * attempt)
-            except (APIConnectionError, APITimeoutError) as exc:
+                    return None, "Sorry, the network is busy right now."
+                self.scheduler.throttle(attempt, exc.retry_after)
+            except BackendUnavailable as exc:
                 if self.log_callback:
                     self.log_callback(
                         f"ChatGPT network error (attempt {attempt}): {exc}"
                     )
                 if attempt == max_retries:
-                    reply = "Sorry, the network is busy right now."
-                    break
-                time.sleep(attempt)
-            except OpenAIError as exc:
+                    return None, "Sorry, the network is busy right now."
+                self.scheduler.sleep(attempt)
+            except BackendError as exc:
                 if self.log_callback:
                     self.log_callback(f"ChatGPT error: {exc}")
-                reply = (
+                return None, (
                     "Apologies, I'm experiencing difficulties reaching my knowledge base."
                 )
-                break
-        self.conversation.append({"role": "assistant", "content": reply})
+
+    def _missing_key_reply(self) -> Optional[str]:
+        if self.backend.available:
+            return None
+        if self.log_callback:
+            self.log_callback("OPENAI_API_KEY not configured.")
+        return "Apologies, I'm currently unable to access my knowledge base."
+
+    def _reply(self, key: str) -> str:
+        """Fetch a reply from the API, caching it on success."""
+        reply = self._missing_key_reply()
+        if reply is None:
+            response, reply = self._create()
+            if response is not None:
+                reply = response.strip()
+                if self.cache:
+                    self.cache.put(key, reply)
+        return reply
+
+    def _reply_tokens(self, key: str) -> Iterator[str]:
+        """Yield reply tokens from the API, or a single fallback reply.
+
+        Retries only happen before the first token arrives, and the reply is
+        cached only if the stream runs to completion.
+        """
+        reply = self._missing_key_reply()
+        response = None
+        if reply is None:
+            response, reply = self._create(stream=True)
+        if response is None:
+            yield reply
+            return
+
+        parts = []
+        try:
+            for token in response:
+                parts.append(token)
+                yield token
+        except BackendError as exc:
+            if self.log_callback:
+                self.log_callback(f"ChatGPT stream error: {exc}")
+            if not parts:
+                yield "Apologies, I'm experiencing difficulties reaching my knowledge base."
+            return
+        reply = "".join(parts).strip()
+        if reply and self.cache:
+            self.cache.put(key, reply)
+
+    def ask(self, prompt: str) -> str:
+        """Send a prompt to ChatGPT and return the reply."""
+        self._append("user", prompt)
+        self.retries = None
+        key = self._context_key(prompt)
+        reply = self.cache.get(key) if self.cache else None
+        if reply is None:
+            if self.flight:
+                reply = self.flight.do(key, lambda: self._reply(key))
+            else:
+                reply = self._reply(key)
+        self._append("assistant", reply)
         return reply
+
+    def ask_stream(self, prompt: str) -> Iterator[str]:
+        """Send a prompt to ChatGPT and yield the reply as it is generated.
+
+        Once the stream ends the complete reply is appended to
+        :attr:`conversation`, just as :meth:`ask` does.
+        """
+        self._append("user", prompt)
+        self.retries = None
+        key = self._context_key(prompt)
+        reply = self.cache.get(key) if self.cache else None
+        if reply is not None:
+            self._append("assistant", reply)
+            yield reply
+            return
+
+        if self.flight:
+            tokens = self.flight.stream(key, lambda: self._reply_tokens(key))
+        else:
+            tokens = self._reply_tokens(key)
+        parts = []
+        try:
+            for token in tokens:
+                parts.append(token)
+                yield token
+        finally:
+            self._append("assistant", "".join(parts).strip())
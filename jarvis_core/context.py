@@ -0,0 +1,125 @@
+import os
+from functools import lru_cache
+from typing import Callable, Dict, List
+
+
+MAX_CONTEXT_TOKENS = int(os.environ.get("JARVIS_CONTEXT_TOKENS", "3000"))
+SUMMARY_TOKENS = int(os.environ.get("JARVIS_SUMMARY_TOKENS", "300"))
+SUMMARY_PREFIX = "Summary of the earlier conversation:"
+# Per-message overhead of the chat format (role markers and separators).
+MESSAGE_OVERHEAD = 4
+
+Message = Dict[str, str]
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    # tiktoken is optional and slow to import, so it is loaded on first use.
+    try:
+        import tiktoken
+    except Exception:  # pragma: no cover - optional dependency
+        return None
+    try:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:  # pragma: no cover - encoding files unavailable offline
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """Count tokens with tiktoken, or estimate about four characters per token."""
+    encoding = _encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return (len(text) + 3) // 4
+
+
+def summarize_turns(summary: str, evicted: List[Message]) -> str:
+    """Fold evicted messages into ``summary`` by keeping each one's first sentence."""
+    lines = [summary] if summary else []
+    for message in evicted:
+        text = " ".join(message["content"].split())
+        end = text.find(". ")
+        if end != -1:
+            text = text[: end + 1]
+        lines.append(f"{message['role']}: {text}")
+    return "\n".join(lines)
+
+
+class TokenBudget:
+    """Keep a chat message list within a token budget.
+
+    The leading system prompt and the newest messages are kept; older turns
+    are evicted oldest first and folded into a running summary message
+    placed right after the system prompt. The summary itself is capped at
+    ``summary_tokens`` by dropping its oldest lines.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int = MAX_CONTEXT_TOKENS,
+        summary_tokens: int = SUMMARY_TOKENS,
+        counter: Callable[[str], int] = count_tokens,
+        summarizer: Callable[[str, List[Message]], str] = summarize_turns,
+    ) -> None:
+        self.max_tokens = max_tokens
+        self.summary_tokens = summary_tokens
+        self.counter = counter
+        self.summarizer = summarizer
+
+    def message_tokens(self, message: Message) -> int:
+        return self.counter(message["content"]) + MESSAGE_OVERHEAD
+
+    def total_tokens(self, messages: List[Message]) -> int:
+        return sum(self.message_tokens(message) for message in messages)
+
+    @staticmethod
+    def _has_summary(messages: List[Message]) -> bool:
+        return (
+            len(messages) > 1
+            and messages[1]["role"] == "system"
+            and messages[1]["content"].startswith(SUMMARY_PREFIX)
+        )
+
+    def trim(self, messages: List[Message]) -> List[Message]:
+        """Evict old turns from ``messages`` in place and return them."""
+        summary_at = self._has_summary(messages)
+        first = 2 if summary_at else 1
+        sizes = [self.message_tokens(message) for message in messages]
+        # The summary is rebuilt below, so reserve its full allowance.
+        total = sum(sizes) - (sizes[1] if summary_at else 0)
+        limit = self.max_tokens - self.summary_tokens - MESSAGE_OVERHEAD
+        if total <= self.max_tokens and not summary_at:
+            return []
+        end = first
+        # Always keep the newest message, even if it alone exceeds the budget.
+        while total > limit and end < len(messages) - 1:
+            total -= sizes[end]
+            end += 1
+            # Evict the assistant reply together with the prompt it answers.
+            if (
+                end < len(messages) - 1
+                and messages[end - 1]["role"] == "user"
+                and messages[end]["role"] == "assistant"
+            ):
+                total -= sizes[end]
+                end += 1
+        evicted = messages[first:end]
+        if not evicted:
+            return []
+        del messages[first:end]
+
+        previous = ""
+        if summary_at:
+            previous = messages[1]["content"][len(SUMMARY_PREFIX):].strip()
+        lines = [SUMMARY_PREFIX] + self.summarizer(previous, evicted).splitlines()
+        while len(lines) > 2 and self.counter("\n".join(lines)) > self.summary_tokens:
+            del lines[1]
+        message = {"role": "system", "content": "\n".join(lines)}
+        if summary_at:
+            messages[1] = message
+        else:
+            messages.insert(1, message)
+        return evicted
+
+
+__all__ = ["TokenBudget", "count_tokens", "summarize_turns"]
@@ -1,88 +1,375 @@
 import os
-import json
-import speech_recognition as sr
-import pyttsx3
-from threading import Thread
-from typing import Callable, Optional
-from vosk import Model, KaldiRecognizer
+import re
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import Thread, current_thread
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator, List, Optional
 
+from .cache import ResponseCache
 from .chatgpt import ChatGPTModule
+from .intents import IntentRouter
+from .metrics import LatencyRecorder
+from .phrases import make_phrase_cache
+from .pipeline import PIPELINE, VoicePipeline
+from .ratelimit import INTERACTIVE
+from .tts import BARGE_IN, SpeechWorker, Utterance
+
+if TYPE_CHECKING:
+    from .audio import AudioCapture
+
+# Write the latency histograms here as JSON whenever listening stops.
+LATENCY_DUMP = os.getenv("JARVIS_LATENCY_DUMP")
+
+_SENTENCE_END = re.compile(r"[.!?]+[\"')\]]*\s+|\n+")
+
+
+def _create_engine():
+    # pyttsx3, Vosk and speech_recognition are imported where they are
+    # first used, so importing this module stays cheap.
+    import pyttsx3
+
+    return pyttsx3.init()
+
+
+def split_sentences(tokens: Iterable[str], min_length: int = 12) -> Iterator[str]:
+    """Regroup streamed tokens into sentences as soon as each one ends.
+
+    Pieces shorter than ``min_length`` are held back so abbreviations such
+    as "Mr." are not spoken on their own.
+    """
+    buffer = ""
+    for token in tokens:
+        buffer += token
+        start = 0
+        for match in _SENTENCE_END.finditer(buffer):
+            if match.end() - start >= min_length:
+                sentence = buffer[start:match.end()].strip()
+                if sentence:
+                    yield sentence
+                start = match.end()
+        buffer = buffer[start:]
+    if buffer.strip():
+        yield buffer.strip()
 
 
 class JarvisCore:
-    """Core functionality for the JARVIS assistant with ChatGPT integration."""
+    """Core functionality for the JARVIS assistant with ChatGPT integration.
+
+    The speech engine, the Vosk model and the database are initialised in
+    parallel on background threads, so construction returns at once.
+    :attr:`ready` is a future that resolves to this object once all of
+    them are available; :meth:`listen` waits for it.
+    """
 
     def __init__(
         self,
         log_callback: Optional[Callable[[str], None]] = None,
         speech_detected_callback: Optional[Callable[[], None]] = None,
         model_path: str | None = None,
+        partial_callback: Optional[Callable[[str], None]] = None,
     ):
-        self.recognizer = sr.Recognizer()
-        self.tts_engine = pyttsx3.init()
+        self._recognizer = None
         self.listening = False
         self.log_callback = log_callback
         self.speech_detected_callback = speech_detected_callback
+        self.partial_callback = partial_callback
+        self._capture: "Optional[AudioCapture]" = None
+        self._listener: Optional[Thread] = None
+        # Per-stage timings of each voice request; see latency_stats().
+        self.metrics = LatencyRecorder()
+        self._speech_started: Optional[float] = None
+        self._speech_ended: Optional[float] = None
+        # With barge-in the microphone stays live while JARVIS speaks and
+        # new speech cuts the reply short; otherwise it is muted meanwhile.
+        self.barge_in = BARGE_IN
+        model_path = model_path or os.getenv("VOSK_MODEL_PATH", "model")
+        # In pipeline mode capture, recognition and synthesis run in their
+        # own processes and this object only orchestrates them.
+        self.pipeline: Optional[VoicePipeline] = None
+        if PIPELINE:
+            self.pipeline = VoicePipeline(
+                model_path=model_path if os.path.exists(model_path) else None,
+                log_callback=log_callback,
+                on_busy=self._on_tts_busy,
+                on_speech=self._on_speech,
+                on_partial=partial_callback,
+                on_speech_end=self._on_speech_end,
+            )
+            self.tts = self.pipeline.speech
+            self.pipeline.start()
+        else:
+            self.tts = SpeechWorker(
+                engine_factory=_create_engine,
+                log_callback=log_callback,
+                on_busy=self._on_tts_busy,
+                phrases=make_phrase_cache(),
+            )
+            self.tts.start()
 
         from jarvis.data import DataManager
 
-        DataManager.init_db()
+        # Writes are committed in batches on the database writer thread, so
+        # the "db" stage times those commits rather than queueing a row.
+        DataManager.on_commit = lambda seconds: self.metrics.record("db", seconds)
 
-        self.chatgpt = ChatGPTModule(log_callback=log_callback)
+        # Opt-in reply cache: "1" keeps it in memory, "persist" also stores
+        # entries in the JARVIS database so they survive restarts. Persisted
+        # entries are loaded by _initialize once the database is ready.
+        cache_mode = os.getenv("JARVIS_RESPONSE_CACHE", "").lower()
+        cache = None
+        if cache_mode:
+            cache = ResponseCache(
+                ttl=float(os.getenv("JARVIS_RESPONSE_CACHE_TTL", "3600")),
+                db_path=DataManager.DB_PATH if cache_mode == "persist" else None,
+            )
+        # Spoken requests jump ahead of server and background traffic.
+        self.chatgpt = ChatGPTModule(
+            log_callback=log_callback, cache=cache, priority=INTERACTIVE
+        )
 
-        model_path = model_path or os.getenv("VOSK_MODEL_PATH", "model")
-        if os.path.exists(model_path):
-            try:
-                self.vosk_model = Model(model_path)
-            except Exception as exc:
-                self.vosk_model = None
-                if self.log_callback:
-                    self.log_callback(f"Vosk model error: {exc}")
-        else:
-            self.vosk_model = None
+        self.intents = IntentRouter(log_callback=log_callback)
+
+        self.vosk_model = None
+        self.ready: "Future[JarvisCore]" = Future()
+        Thread(
+            target=self._initialize, args=(model_path,), daemon=True, name="jarvis-init"
+        ).start()
+
+    def _initialize(self, model_path: str) -> None:
+        """Bring up the heavy resources concurrently and resolve :attr:`ready`."""
+        from jarvis.data import DataManager
+
+        from .asr import load_model
+
+        try:
+            with ThreadPoolExecutor(thread_name_prefix="jarvis-init") as pool:
+                database = pool.submit(DataManager.init_db)
+                model = None
+                if os.path.exists(model_path) and self.pipeline is None:
+                    model = pool.submit(load_model, model_path)
+                self.tts.ready.wait()
+                database.result()
+                if self.chatgpt.cache is not None:
+                    self.chatgpt.cache.load()
+                if model is not None:
+                    try:
+                        self.vosk_model = model.result()
+                    except Exception as exc:
+                        if self.log_callback:
+                            self.log_callback(f"Vosk model error: {exc}")
+        except Exception as exc:
+            if self.log_callback:
+                self.log_callback(f"Initialization error: {exc}")
+            self.ready.set_exception(exc)
+            return
+        self.ready.set_result(self)
+
+    @property
+    def recognizer(self):
+        """The ``speech_recognition`` recognizer used without a Vosk model."""
+        if self._recognizer is None:
+            import speech_recognition as sr
+
+            self._recognizer = sr.Recognizer()
+        return self._recognizer
+
+    def speak(
+        self, text: str, on_done: Optional[Callable[[Utterance], None]] = None
+    ) -> Utterance:
+        """Queue text for speech and return its handle without waiting."""
+        return self.tts.speak(text, on_done)
+
+    _speak = speak
 
-    def _speak(self, text: str):
-        """Speak text using text-to-speech."""
-        self.tts_engine.say(text)
-        self.tts_engine.runAndWait()
+    def _on_tts_busy(self, busy: bool) -> None:
+        capture = self._capture
+        if capture and not self.barge_in:
+            if busy:
+                capture.mute()
+            else:
+                capture.unmute()
+
+    def _on_speech(self) -> None:
+        self._speech_started = time.perf_counter()
+        self._speech_ended = None
+        if self.barge_in and self.tts.busy:
+            self.tts.interrupt()
+        if self.speech_detected_callback:
+            self.speech_detected_callback()
+
+    def _on_speech_end(self) -> None:
+        self._speech_ended = time.perf_counter()
+
+    def _record_heard(self, asr_seconds: Optional[float] = None) -> None:
+        """Record capture and recognition time for the command just heard."""
+        started = self._speech_started
+        if started is None:
+            return
+        now = time.perf_counter()
+        ended = self._speech_ended
+        if ended is None or ended < started:
+            # Vosk found the end of the utterance before the detector did.
+            ended = now
+        self.metrics.record("capture", ended - started)
+        self.metrics.record("asr", now - ended if asr_seconds is None else asr_seconds)
+
+    def latency_stats(self):
+        """Return per-stage latency percentiles over the rolling window.
+
+        Stages are ``capture``, ``asr``, ``intent``, ``llm`` (with
+        ``llm_retries``), ``first_sentence``, ``db``, ``tts`` and ``total``,
+        from the start of speech to the end of the spoken reply. ``db`` is
+        each batch commit on the database writer thread. Durations are in
+        seconds.
+        """
+        return self.metrics.snapshot()
+
+    def dump_latency(self, path: str) -> None:
+        """Write :meth:`latency_stats` to ``path`` as JSON."""
+        self.metrics.dump(path)
 
     def listen(self):
-        """Continuously listen for voice commands."""
-        self.listening = True
+        """Continuously listen for voice commands.
+
+        Runs on the thread made by :meth:`start`, which sets
+        :attr:`listening`; it returns at once if :meth:`stop_listening` ran
+        while the resources were still initialising.
+        """
+        try:
+            self.ready.result()
+        except Exception:
+            return
+        if not self.listening:
+            return
         greeting = "How may I assist you?"
         if self.log_callback:
             self.log_callback(f"JARVIS: {greeting}")
         self._speak(greeting)
-        while self.listening:
+        if self.pipeline is not None:
+            self._listen_pipeline()
+            return
+        import speech_recognition as sr
+
+        from .asr import StreamingRecognizer
+        from .audio import AudioCapture
+
+        # With a Vosk model, frames are decoded as they are captured and a
+        # command is ready as soon as Vosk detects the end of the utterance.
+        asr = None
+        if self.vosk_model:
+            asr = StreamingRecognizer(
+                self.vosk_model,
+                on_partial=self.partial_callback,
+                log_callback=self.log_callback,
+            )
+            asr.start()
+        capture = AudioCapture(
+            on_speech=self._on_speech,
+            log_callback=self.log_callback,
+            on_frame=asr.push if asr else None,
+            on_speech_end=self._on_speech_end,
+        )
+        self._capture = capture
+        self._on_tts_busy(self.tts.busy)
+        capture.start()
+        try:
+            while self.listening:
+                try:
+                    asr_seconds = None
+                    if asr:
+                        command = asr.get(timeout=0.5)
+                    else:
+                        audio = capture.get(timeout=0.5)
+                        command = None
+                        if audio:
+                            recognizing = time.perf_counter()
+                            command = self.recognizer.recognize_google(audio)
+                            asr_seconds = time.perf_counter() - recognizing
+                    if command:
+                        self._record_heard(asr_seconds)
+                        self._handle_command(command)
+                    elif capture.error or (asr and asr.error):
+                        raise capture.error or asr.error
+                except sr.UnknownValueError:
+                    self._speak("I beg your pardon, sir, I did not catch that.")
+                except Exception as exc:
+                    if self.log_callback:
+                        self.log_callback(f"Listening error: {exc}")
+                    self._speak(f"An error occurred: {exc}")
+                    self.listening = False
+        finally:
+            self._capture = None
+            capture.stop()
+            if asr:
+                asr.stop()
+            self._dump_latency()
+
+    def _listen_pipeline(self) -> None:
+        import speech_recognition as sr
+
+        pipeline = self.pipeline
+        pipeline.start_listening()
+        self._capture = pipeline
+        self._on_tts_busy(self.tts.busy)
+        try:
+            while self.listening:
+                try:
+                    command = pipeline.get_command(timeout=0.5)
+                    if command:
+                        self._record_heard()
+                        self._handle_command(command)
+                    elif pipeline.error:
+                        raise pipeline.error
+                except sr.UnknownValueError:
+                    self._speak("I beg your pardon, sir, I did not catch that.")
+                except Exception as exc:
+                    if self.log_callback:
+                        self.log_callback(f"Listening error: {exc}")
+                    self._speak(f"An error occurred: {exc}")
+                    self.listening = False
+        finally:
+            self._capture = None
+            pipeline.stop_listening()
+            self._dump_latency()
+
+    def _dump_latency(self) -> None:
+        if LATENCY_DUMP:
             try:
-                with sr.Microphone() as source:
-                    audio = self.recognizer.listen(source)
-                if self.speech_detected_callback:
-                    self.speech_detected_callback()
-                if self.vosk_model:
-                    result_json = self.recognizer.recognize_vosk(audio)
-                    try:
-                        command = json.loads(result_json).get("text", "")
-                    except Exception:
-                        command = result_json
-                else:
-                    command = self.recognizer.recognize_google(audio)
-                if command:
-                    self._handle_command(command)
-            except sr.UnknownValueError:
-                self._speak("I beg your pardon, sir, I did not catch that.")
-            except Exception as exc:
+                self.dump_latency(LATENCY_DUMP)
+            except OSError as exc:
                 if self.log_callback:
-                    self.log_callback(f"Listening error: {exc}")
-                self._speak(f"An error occurred: {exc}")
-                self.listening = False
+                    self.log_callback(f"Latency dump error: {exc}")
 
     def stop_listening(self):
         self.listening = False
 
+    def stop(self):
+        """Stop the assistant via the public interface."""
+        self.stop_listening()
+
+    def close(self, timeout: float = 5) -> None:
+        """Stop listening and shut down speech and any pipeline processes.
+
+        Queued speech is finished first. The assistant cannot be started
+        again afterwards.
+        """
+        self.stop_listening()
+        listener = self._listener
+        if listener is not None and listener is not current_thread():
+            listener.join(timeout)
+        if self.pipeline is not None:
+            self.pipeline.close()
+        else:
+            self.tts.stop()
+            self.tts.join(timeout)
+
     def _handle_command(self, command: str):
         """Process a recognized voice command."""
         command = command.lower()
+        heard, self._speech_started = self._speech_started, None
+        metrics = self.metrics
+        # Anything still being said belongs to the previous request.
+        self.tts.interrupt()
         if self.log_callback:
             self.log_callback(f"User: {command}")
         from jarvis.data import DataManager
@@ -95,15 +382,61 @@ class JarvisCore:
             DataManager.log_conversation("jarvis", reply)
             self._speak(reply)
             self.stop_listening()
+            return
+        with metrics.time("intent"):
+            reply = self.intents.route(command)
+        if reply is not None:
+            # Device and lab commands are answered without a ChatGPT round-trip.
+            if self.log_callback:
+                self.log_callback(f"JARVIS: {reply}")
+            self._time_reply([self._speak(reply)], heard)
+            DataManager.log_conversation("jarvis", reply)
         else:
-            response = self._chatgpt_response(command)
+            # Queue each sentence as soon as it is complete; playback
+            # overlaps with generating the rest of the reply.
+            asked = time.perf_counter()
+            spoken: List[Utterance] = []
+            for sentence in split_sentences(self.chatgpt.ask_stream(command)):
+                spoken.append(self._speak(sentence))
+                if len(spoken) == 1:
+                    metrics.record("first_sentence", time.perf_counter() - asked)
+            metrics.record("llm", time.perf_counter() - asked)
+            # None when the reply was cached or shared from another caller's
+            # request, so no retries of ours are involved.
+            if self.chatgpt.retries is not None:
+                metrics.record_count("llm_retries", self.chatgpt.retries)
+            if spoken:
+                self._time_reply(spoken, heard)
+            response = self.chatgpt.conversation[-1]["content"]
             if self.log_callback:
                 self.log_callback(f"JARVIS: {response}")
             DataManager.log_conversation("jarvis", response)
-            self._speak(response)
+
+    def _time_reply(self, spoken: List[Utterance], heard: Optional[float]) -> None:
+        """Record playback time once the reply's last sentence finishes.
+
+        ``tts`` adds up each sentence from the moment it started playing to
+        its done callback, so gaps spent waiting for ChatGPT between
+        sentences are not counted as playback.
+        """
+
+        def finished(last: Utterance) -> None:
+            if last.cancelled or last.error:
+                return
+            self.metrics.record(
+                "tts",
+                sum(u.finished - u.started for u in spoken if u.started is not None),
+            )
+            if heard is not None:
+                self.metrics.record("total", last.finished - heard)
+
+        spoken[-1].add_done_callback(finished)
 
     def start(self):
-        thread = Thread(target=self.listen, daemon=True)
+        # Set before the thread exists so a stop that arrives while the
+        # core is still initialising is not overwritten.
+        self.listening = True
+        thread = self._listener = Thread(target=self.listen, daemon=True)
         thread.start()
         return thread
 
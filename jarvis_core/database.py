@@ -1,48 +1,59 @@
-import os
-import sqlite3
-from typing import List, Tuple
+"""Chat history helpers backed by the shared :class:`~jarvis.data.DataManager` store.
 
-DB_PATH = os.environ.get("JARVIS_DB_PATH", "jarvis.db")
+Messages live in the ``conversations`` table alongside everything else
+JARVIS logs, so each exchange goes through one connection and one commit.
+Rows from the former ``history`` table are imported on first open.
+"""
+
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from jarvis.data import DataManager
+
+DB_PATH = DataManager.DB_PATH
 
 
 def init_db(db_path: str = DB_PATH) -> None:
     """Initialize the database and create tables if necessary."""
-    conn = sqlite3.connect(db_path)
-    cur = conn.cursor()
-    cur.execute(
-        """
-        CREATE TABLE IF NOT EXISTS history (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            role TEXT NOT NULL,
-            content TEXT NOT NULL
-        )
-        """
-    )
-    conn.commit()
-    conn.close()
+    DataManager.for_path(db_path).init_db()
 
 
 def insert_message(role: str, content: str, db_path: str = DB_PATH) -> None:
-    """Insert a chat message into the history table."""
-    conn = sqlite3.connect(db_path)
-    cur = conn.cursor()
-    cur.execute(
-        "INSERT INTO history (role, content) VALUES (?, ?)", (role, content)
-    )
-    conn.commit()
-    conn.close()
+    """Store a chat message; it is committed when this returns."""
+    store = DataManager.for_path(db_path)
+    store.log_conversation(role, content)
+    store.flush()
 
 
 def fetch_last_messages(limit: int = 10, db_path: str = DB_PATH) -> List[Tuple[str, str]]:
     """Fetch the most recent chat messages."""
-    conn = sqlite3.connect(db_path)
-    cur = conn.cursor()
-    cur.execute(
-        "SELECT role, content FROM history ORDER BY id DESC LIMIT ?", (limit,)
-    )
-    rows = cur.fetchall()
-    conn.close()
-    return rows
-
-
-__all__ = ["init_db", "insert_message", "fetch_last_messages"]
+    return DataManager.for_path(db_path).fetch_last_messages(limit)
+
+
+def search_history(
+    query: str,
+    limit: int = 10,
+    since: Optional[datetime] = None,
+    db_path: str = DB_PATH,
+) -> List[Tuple[str, str]]:
+    """Return ``(role, snippet)`` for the best-ranked messages matching ``query``."""
+    store = DataManager.for_path(db_path)
+    store.flush()
+    hits = store.search_conversations(query, limit, since)
+    return [(speaker, snippet) for _, speaker, snippet in hits]
+
+
+def prune_history(
+    days: float, db_path: str = DB_PATH, timeout: Optional[float] = None
+) -> int:
+    """Delete messages older than ``days`` and return how many were removed."""
+    return DataManager.for_path(db_path).prune({"conversations": days}, timeout)
+
+
+__all__ = [
+    "init_db",
+    "insert_message",
+    "fetch_last_messages",
+    "search_history",
+    "prune_history",
+]
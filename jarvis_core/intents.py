@@ -0,0 +1,189 @@
+import json
+import os
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional, Pattern, Tuple
+from urllib import request
+
+LAB_SERVER_URL = os.environ.get("LAB_SERVER_URL", "http://localhost:8000")
+# Devices wired to the lab server; anything else is sent over MQTT.
+LAB_DEVICES = {"pump": "pump", "light": "light", "lights": "light", "fan": "fan"}
+UNITS = {"temperature": "degrees", "humidity": "percent"}
+
+_NUMBERS = {
+    "a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5,
+    "six": 6, "seven": 7, "twelve": 12, "twenty four": 24, "thirty": 30,
+}
+_AMOUNT = r"(?P<amount>\d+|" + "|".join(sorted(_NUMBERS, key=len, reverse=True)) + r")"
+_WINDOW = (
+    rf"(?:\s+(?:over|for|in|during)\s+the\s+(?:last|past)\s+(?:{_AMOUNT}\s+)?"
+    r"(?P<unit>minute|hour|day|week)s?|\s+(?P<today>today))?"
+)
+_DEVICE = r"(?:the\s+)?(?P<device>[a-z][a-z0-9]*(?:\s[a-z0-9]+){0,3}?)"
+_STATE = r"(?P<state>on|off)"
+# A device name made only of these words, or joining several devices with
+# a conjunction, is left to ChatGPT rather than switched.
+_NOT_DEVICES = {
+    "the", "a", "an", "it", "this", "that", "them", "these", "those", "all",
+    "everything", "something", "my", "your", "our", "some", "of", "please",
+}
+_CONJUNCTIONS = {"and", "or", "then", "but"}
+_PLEASE = r"(?:\s+please)?[.!?]?"
+
+# Ordered, precompiled intent patterns; the first match wins.
+INTENTS: List[Tuple[str, Pattern[str]]] = [
+    (name, re.compile(rf"^(?:please\s+|jarvis,?\s+)?(?:{pattern}){_PLEASE}$"))
+    for name, pattern in [
+        ("switch", rf"(?:turn|switch)\s+{_STATE}\s+{_DEVICE}"),
+        ("switch", rf"(?:turn|switch)\s+{_DEVICE}\s+{_STATE}"),
+        ("average", rf"(?:what(?:'s|\s+is|\s+was)\s+)?(?:the\s+)?(?:average|mean)\s+"
+                    rf"(?P<metric>temperature|humidity){_WINDOW}"),
+        ("reading", r"(?:what(?:'s|\s+is)\s+)?(?:the\s+)?(?:current\s+)?"
+                    r"(?P<metric>temperature|humidity)(?:\s+(?:now|right\s+now|in\s+the\s+lab))?"),
+        ("reading", r"how\s+(?P<metric>hot|warm|cold|humid)\s+is\s+it(?:\s+in\s+the\s+lab)?"),
+        ("gas", r"(?:is\s+there\s+(?:a\s+)?|any\s+)?gas(?:\s+(?:alert|alarm|leak|levels?))?"),
+        ("status", r"(?:what(?:'s|\s+is)\s+the\s+)?device\s+status"),
+        ("time", r"what(?:'s|\s+is)\s+the\s+time|what\s+time\s+is\s+it"),
+        ("date", r"what(?:'s|\s+is)\s+(?:the\s+date|today'?s\s+date)|what\s+day\s+is\s+it"),
+    ]
+]
+
+_METRICS = {
+    "hot": "temperature", "warm": "temperature", "cold": "temperature", "humid": "humidity",
+}
+
+
+def _is_device(name: str) -> bool:
+    words = name.split()
+    return not _CONJUNCTIONS.intersection(words) and not set(words) <= _NOT_DEVICES
+
+
+def lab_request(path: str, method: str = "GET") -> Dict:
+    """Call the lab server and return its JSON reply."""
+    req = request.Request(f"{LAB_SERVER_URL}{path}", method=method)
+    with request.urlopen(req, timeout=1) as resp:
+        return json.load(resp)
+
+
+class IntentRouter:
+    """Answer common commands locally instead of asking ChatGPT.
+
+    :meth:`route` matches a command against :data:`INTENTS` and returns the
+    spoken reply, or ``None`` when nothing matches so the caller can fall
+    back to ChatGPT. Lab devices are switched through the lab server, other
+    devices over MQTT via ``iot``. Averages come from ``data`` (the
+    :class:`~jarvis.data.DataManager` by default).
+    """
+
+    def __init__(
+        self,
+        iot=None,
+        data=None,
+        lab: Callable[..., Dict] = lab_request,
+        log_callback: Optional[Callable[[str], None]] = None,
+    ) -> None:
+        self._iot = iot
+        self._data = data
+        self.lab = lab
+        self.log_callback = log_callback
+
+    @property
+    def iot(self):
+        if self._iot is None:
+            from jarvis.iot import IoTClient
+
+            self._iot = IoTClient(log_callback=self.log_callback)
+        return self._iot
+
+    @property
+    def data(self):
+        if self._data is None:
+            from jarvis.data import DataManager
+
+            self._data = DataManager
+        return self._data
+
+    def match(self, command: str) -> Optional[Tuple[str, Dict[str, str]]]:
+        """Return the matching intent name and its slots, if any."""
+        text = " ".join(command.lower().split())
+        for name, pattern in INTENTS:
+            found = pattern.match(text)
+            if found:
+                slots = {k: v for k, v in found.groupdict().items() if v is not None}
+                if "device" in slots and not _is_device(slots["device"]):
+                    continue
+                return name, slots
+        return None
+
+    def route(self, command: str) -> Optional[str]:
+        """Handle ``command`` locally and return the reply, or ``None``."""
+        matched = self.match(command)
+        if matched is None:
+            return None
+        name, slots = matched
+        try:
+            return getattr(self, f"_{name}")(**slots)
+        except Exception as exc:
+            if self.log_callback:
+                self.log_callback(f"Intent {name} failed: {exc}")
+            return "I'm afraid I couldn't complete that, sir."
+
+    def _switch(self, device: str, state: str) -> str:
+        lab_device = LAB_DEVICES.get(device)
+        if lab_device:
+            self.lab(f"/{lab_device}?state={state}", "POST")
+        elif not self.iot.publish_command(device, state):
+            return f"I'm unable to reach the {device} at the moment, sir."
+        return f"Turning {state} the {device}, sir."
+
+    def _reading(self, metric: str) -> str:
+        metric = _METRICS.get(metric, metric)
+        value = self.lab("/data").get(metric)
+        if value is None:
+            return f"I have no {metric} reading at the moment, sir."
+        return f"The {metric} is {value:.1f} {UNITS[metric]}, sir."
+
+    def _average(
+        self,
+        metric: str,
+        amount: Optional[str] = None,
+        unit: Optional[str] = None,
+        today: Optional[str] = None,
+    ) -> str:
+        window = None
+        period = ""
+        if unit:
+            count = int(amount) if amount and amount.isdigit() else _NUMBERS.get(amount, 1)
+            window = timedelta(**{f"{unit}s": count})
+            period = f" over the last {count} {unit}s" if count > 1 else f" over the last {unit}"
+        elif today:
+            # Readings are stored in UTC, so convert local midnight to UTC
+            # (with that day's own offset) before measuring back from now.
+            now = datetime.now(timezone.utc)
+            midnight = datetime.combine(now.astimezone().date(), datetime.min.time())
+            window = now - midnight.astimezone(timezone.utc)
+            period = " today"
+        value = getattr(self.data, f"average_{metric}")(window=window)
+        if value is None:
+            return f"I have no {metric} readings{period or ' yet'}, sir."
+        return f"The average {metric}{period} is {value:.1f} {UNITS[metric]}, sir."
+
+    def _gas(self) -> str:
+        if self.lab("/data").get("gas_alert"):
+            return "Warning: hazardous gas levels are detected in the lab, sir."
+        return "Gas levels in the lab are normal, sir."
+
+    def _status(self) -> str:
+        status = self.iot.get_status()
+        if not status:
+            return "I have no device status updates, sir."
+        return f"The latest device status is {status}."
+
+    def _time(self) -> str:
+        return f"It is {datetime.now():%H:%M}, sir."
+
+    def _date(self) -> str:
+        return f"Today is {datetime.now():%A, %B %d}, sir."
+
+
+__all__ = ["INTENTS", "IntentRouter", "lab_request"]
@@ -0,0 +1,114 @@
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+ASK_WORKERS = int(os.environ.get("JARVIS_ASK_WORKERS", "4"))
+JOB_TTL = float(os.environ.get("JARVIS_JOB_TTL", "300"))
+
+
+class Job:
+    """Tokens produced by one background request, readable while it runs."""
+
+    def __init__(self) -> None:
+        self.id = uuid.uuid4().hex
+        self.tokens: List[str] = []
+        self.response: Optional[str] = None
+        self.error: Optional[str] = None
+        self.done = False
+        self.finished_at: Optional[float] = None
+        self._cond = threading.Condition()
+
+    @property
+    def status(self) -> str:
+        if not self.done:
+            return "running"
+        return "error" if self.error else "done"
+
+    def append(self, token: str) -> None:
+        with self._cond:
+            self.tokens.append(token)
+            self._cond.notify_all()
+
+    def finish(self, response: Optional[str] = None, error: Optional[str] = None) -> None:
+        with self._cond:
+            self.response = response if response is not None else "".join(self.tokens)
+            self.error = error
+            self.done = True
+            self.finished_at = time.monotonic()
+            self._cond.notify_all()
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """Block until the job finishes and return whether it did."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self.done, timeout)
+
+    def wait(self, start: int, timeout: Optional[float] = None) -> Tuple[List[str], bool]:
+        """Return tokens from index ``start`` once any arrive, and whether the job is done."""
+        with self._cond:
+            self._cond.wait_for(lambda: len(self.tokens) > start or self.done, timeout)
+            return self.tokens[start:], self.done
+
+
+class JobRunner:
+    """Run jobs on a thread pool and keep finished ones for ``ttl`` seconds.
+
+    Submitting with a ``key`` that matches a job still running returns that
+    job instead of starting another, so a client retrying a request it gave
+    up on attaches to the original.
+    """
+
+    def __init__(self, max_workers: int = ASK_WORKERS, ttl: float = JOB_TTL) -> None:
+        self.ttl = ttl
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="jarvis-ask")
+        self._jobs: Dict[str, Job] = {}
+        self._running: Dict[Hashable, Job] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, work: Callable[[Job], str], key: Optional[Hashable] = None) -> Job:
+        """Start ``work(job)``; its return value becomes the job's response."""
+        with self._lock:
+            self._prune()
+            if key is not None and key in self._running:
+                return self._running[key]
+            job = Job()
+            self._jobs[job.id] = job
+            if key is not None:
+                self._running[key] = job
+        self._pool.submit(self._run, job, work, key)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            self._prune()
+            return self._jobs.get(job_id)
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, job: Job, work: Callable[[Job], str], key: Optional[Hashable]) -> None:
+        try:
+            response = work(job)
+        except Exception as exc:
+            response, error = None, str(exc)
+        else:
+            error = None
+        if key is not None:
+            with self._lock:
+                self._running.pop(key, None)
+        job.finish(response, error)
+
+    def _prune(self) -> None:
+        cutoff = time.monotonic() - self.ttl
+        expired = [
+            job_id
+            for job_id, job in self._jobs.items()
+            if job.finished_at is not None and job.finished_at < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+
+__all__ = ["Job", "JobRunner"]
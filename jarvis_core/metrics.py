@@ -0,0 +1,175 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Deque, Dict, Iterator, Optional, Tuple
+
+LATENCY_WINDOW = float(os.environ.get("JARVIS_LATENCY_WINDOW", "3600"))
+LATENCY_SLICES = 6
+PERCENTILES = (50, 90, 99)
+
+# Each power of two is split into 2 ** SUB_BUCKET_BITS linear buckets, so
+# recorded values keep about three significant percent of precision.
+SUB_BUCKET_BITS = 5
+_SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+
+
+def _index(value: int) -> int:
+    if value < _SUB_BUCKETS:
+        return value
+    shift = value.bit_length() - SUB_BUCKET_BITS - 1
+    return (shift + 1) * _SUB_BUCKETS + (value >> shift) - _SUB_BUCKETS
+
+
+def _highest(index: int) -> int:
+    """Largest value that falls in bucket ``index``."""
+    if index < _SUB_BUCKETS:
+        return index
+    shift = index // _SUB_BUCKETS - 1
+    sub = index % _SUB_BUCKETS + _SUB_BUCKETS
+    return ((sub + 1) << shift) - 1
+
+
+class Histogram:
+    """Log-linear histogram of non-negative integers, in the style of HDR.
+
+    Memory grows with the number of distinct magnitudes, not with the
+    number of values recorded, and recording is a dictionary increment.
+    """
+
+    def __init__(self) -> None:
+        self.counts: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0
+        self.min: Optional[int] = None
+        self.max: Optional[int] = None
+
+    def record(self, value: int) -> None:
+        value = max(0, int(value))
+        index = _index(value)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def merge(self, other: "Histogram") -> None:
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        for name, pick in (("min", min), ("max", max)):
+            theirs = getattr(other, name)
+            if theirs is not None:
+                mine = getattr(self, name)
+                setattr(self, name, theirs if mine is None else pick(mine, theirs))
+
+    def percentile(self, percent: float) -> Optional[int]:
+        """Value at or below which ``percent`` of the recorded values fall."""
+        if not self.count:
+            return None
+        rank = max(1, -(-self.count * percent // 100))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return min(_highest(index), self.max)
+        return self.max
+
+
+class LatencyRecorder:
+    """Rolling per-stage histograms of how long each step of a request took.
+
+    Durations are recorded in seconds with microsecond resolution; counts
+    such as retries are recorded with :meth:`record_count`. Each stage keeps
+    ``slices`` histograms covering ``window`` seconds between them, and the
+    oldest is dropped as time moves on, so :meth:`snapshot` reflects
+    roughly the last ``window`` seconds.
+    """
+
+    def __init__(
+        self,
+        window: float = LATENCY_WINDOW,
+        slices: int = LATENCY_SLICES,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.window = window
+        self.slice_length = window / slices
+        self.clock = clock
+        self._stages: Dict[str, Deque[Tuple[float, Histogram]]] = {}
+        self._scales: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, seconds: float) -> None:
+        """Add one duration for ``stage``."""
+        self._record(stage, seconds, 1_000_000)
+
+    def record_count(self, stage: str, count: int) -> None:
+        """Add one count, such as the retries a request needed, for ``stage``."""
+        self._record(stage, count, 1)
+
+    @contextmanager
+    def time(self, stage: str) -> Iterator[None]:
+        """Record how long the ``with`` block takes as ``stage``."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - started)
+
+    def _record(self, stage: str, value: float, scale: float) -> None:
+        now = self.clock()
+        with self._lock:
+            slices = self._stages.get(stage)
+            if slices is None:
+                slices = self._stages[stage] = deque()
+                self._scales[stage] = scale
+            if not slices or now - slices[-1][0] >= self.slice_length:
+                slices.append((now, Histogram()))
+            while now - slices[0][0] >= self.window:
+                slices.popleft()
+            slices[-1][1].record(round(value * scale))
+
+    def histogram(self, stage: str) -> Histogram:
+        """Merged histogram of ``stage`` over the rolling window."""
+        now = self.clock()
+        merged = Histogram()
+        with self._lock:
+            for started, part in self._stages.get(stage, ()):
+                if now - started < self.window:
+                    merged.merge(part)
+        return merged
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """Return count, mean, min, max and percentiles for every stage."""
+        stats = {}
+        for stage in list(self._stages):
+            histogram = self.histogram(stage)
+            if not histogram.count:
+                continue
+            scale = self._scales[stage]
+            entry = {
+                "count": histogram.count,
+                "mean": histogram.total / histogram.count / scale,
+                "min": histogram.min / scale,
+                "max": histogram.max / scale,
+            }
+            for percent in PERCENTILES:
+                entry[f"p{percent}"] = histogram.percentile(percent) / scale
+            stats[stage] = entry
+        return stats
+
+    def dump(self, path: str) -> None:
+        """Write :meth:`snapshot` to ``path`` as JSON."""
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump({"window": self.window, "stages": self.snapshot()}, file, indent=2)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stages.clear()
+            self._scales.clear()
+
+
+__all__ = ["Histogram", "LatencyRecorder"]
@@ -0,0 +1,229 @@
+import hashlib
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Iterable, List, Optional
+
+try:
+    import simpleaudio
+except Exception:  # pragma: no cover - optional dependency
+    simpleaudio = None
+
+PHRASE_CACHE = os.environ.get("JARVIS_PHRASE_CACHE", "1").lower() not in ("0", "false", "no")
+PHRASE_CACHE_DIR = os.environ.get(
+    "JARVIS_PHRASE_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "jarvis", "phrases"),
+)
+PHRASE_CACHE_MB = float(os.environ.get("JARVIS_PHRASE_CACHE_MB", "50"))
+# A phrase is rendered once it has been spoken this many times.
+PHRASE_MIN_USES = int(os.environ.get("JARVIS_PHRASE_MIN_USES", "2"))
+MAX_PHRASE_LENGTH = 160
+
+COMMON_PHRASES = [
+    "How may I assist you?",
+    "I beg your pardon, sir, I did not catch that.",
+    "Shutting down. Goodbye, sir.",
+    "Lab module online, sir.",
+]
+
+
+def _command_player() -> Optional[str]:
+    for command in ("aplay", "paplay", "afplay"):
+        path = shutil.which(command)
+        if path:
+            return path
+    return None
+
+
+def play_file(path: str, cancelled: Callable[[], bool], poll_interval: float = 0.02) -> None:
+    """Play an audio file, stopping early once ``cancelled()`` is true."""
+    if simpleaudio is not None:
+        playback = simpleaudio.WaveObject.from_wave_file(path).play()
+        while playback.is_playing():
+            if cancelled():
+                playback.stop()
+                return
+            time.sleep(poll_interval)
+        return
+    if sys.platform == "win32":
+        import winsound
+
+        # winsound cannot report when asynchronous playback ends, so this
+        # plays synchronously and cannot be interrupted.
+        winsound.PlaySound(path, winsound.SND_FILENAME)
+        return
+    command = _command_player()
+    if command is None:
+        raise RuntimeError("No audio player available")
+    process = subprocess.Popen(
+        [command, path], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    while process.poll() is None:
+        if cancelled():
+            process.terminate()
+            process.wait()
+            return
+        time.sleep(poll_interval)
+    if process.returncode:
+        raise RuntimeError(f"{os.path.basename(command)} exited with {process.returncode}")
+
+
+def can_play() -> bool:
+    return simpleaudio is not None or sys.platform == "win32" or _command_player() is not None
+
+
+class PhraseCache:
+    """Disk cache of pre-rendered speech for phrases that are said often.
+
+    Files are keyed by the text and the engine's voice, rate and volume, so
+    changing the voice renders them again. Phrases in ``preload`` and any
+    phrase spoken ``min_uses`` times are queued for rendering, which the
+    speech worker does while idle and abandons when new speech is queued.
+    The directory is kept under ``max_bytes`` by deleting the least recently
+    played files.
+    """
+
+    def __init__(
+        self,
+        directory: str = PHRASE_CACHE_DIR,
+        max_bytes: int = int(PHRASE_CACHE_MB * 1024 * 1024),
+        min_uses: int = PHRASE_MIN_USES,
+        preload: Iterable[str] = COMMON_PHRASES,
+        player: Callable[..., None] = play_file,
+    ) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.min_uses = min_uses
+        self.player = player
+        self._uses: "OrderedDict[str, int]" = OrderedDict()
+        self._pending: "OrderedDict[str, None]" = OrderedDict.fromkeys(preload)
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def _voice(engine) -> str:
+        return "|".join(str(engine.getProperty(name)) for name in ("voice", "rate", "volume"))
+
+    def path(self, text: str, engine) -> str:
+        key = hashlib.sha256(f"{self._voice(engine)}\n{text}".encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{key[:32]}.wav")
+
+    def lookup(self, text: str, engine) -> Optional[str]:
+        """Return the rendered file for ``text`` and mark it recently used."""
+        path = self.path(text, engine)
+        try:
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+
+    def note(self, text: str) -> None:
+        """Count a live rendering of ``text``; frequent phrases get queued."""
+        if len(text) > MAX_PHRASE_LENGTH:
+            return
+        with self._lock:
+            uses = self._uses.pop(text, 0) + 1
+            self._uses[text] = uses
+            while len(self._uses) > 512:
+                self._uses.popitem(last=False)
+            if uses >= self.min_uses:
+                self._pending[text] = None
+
+    def next_pending(self) -> Optional[str]:
+        with self._lock:
+            if not self._pending:
+                return None
+            return self._pending.popitem(last=False)[0]
+
+    def render(
+        self,
+        engine,
+        text: str,
+        cancelled: Optional[Callable[[], bool]] = None,
+        poll_interval: float = 0.02,
+    ) -> Optional[str]:
+        """Synthesise ``text`` to the cache with ``engine.save_to_file``.
+
+        With ``cancelled``, the engine is driven in its external loop and
+        stopped as soon as ``cancelled()`` is true; the partial file is
+        discarded and ``text`` goes back to the front of the queue.
+        """
+        path = self.path(text, engine)
+        if os.path.exists(path):
+            return path
+        # Keep the extension; some drivers choose the format from it.
+        partial = f"{path[:-4]}.part.wav"
+        engine.save_to_file(text, partial)
+        if cancelled is None:
+            engine.runAndWait()
+        elif not self._drive(engine, cancelled, poll_interval):
+            try:
+                os.remove(partial)
+            except OSError:
+                pass
+            with self._lock:
+                self._pending[text] = None
+                self._pending.move_to_end(text, last=False)
+            return None
+        if not os.path.exists(partial) or not os.path.getsize(partial):
+            return None
+        os.replace(partial, path)
+        self._evict()
+        return path
+
+    @staticmethod
+    def _drive(engine, cancelled: Callable[[], bool], poll_interval: float) -> bool:
+        """Run the engine until it is idle; ``False`` if it had to be stopped."""
+        engine.startLoop(False)
+        try:
+            while True:
+                engine.iterate()
+                if cancelled():
+                    engine.stop()
+                    return False
+                if not engine.isBusy():
+                    return True
+                time.sleep(poll_interval)
+        finally:
+            engine.endLoop()
+
+    def play(self, path: str, cancelled: Callable[[], bool]) -> None:
+        try:
+            self.player(path, cancelled)
+        except Exception:
+            # Drop the file so the phrase is synthesised live next time.
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            raise
+
+    def _evict(self) -> None:
+        files: List[os.DirEntry] = [
+            entry
+            for entry in os.scandir(self.directory)
+            if entry.name.endswith(".wav") and not entry.name.endswith(".part.wav")
+        ]
+        total = sum(entry.stat().st_size for entry in files)
+        for entry in sorted(files, key=lambda e: e.stat().st_mtime):
+            if total <= self.max_bytes:
+                break
+            total -= entry.stat().st_size
+            os.remove(entry.path)
+
+
+def make_phrase_cache() -> Optional[PhraseCache]:
+    """Return the configured phrase cache, or ``None`` if it cannot be used."""
+    if not PHRASE_CACHE or not can_play():
+        return None
+    try:
+        return PhraseCache()
+    except OSError:
+        return None
+
+
+__all__ = ["COMMON_PHRASES", "PhraseCache", "make_phrase_cache", "play_file"]
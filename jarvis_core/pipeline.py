@@ -0,0 +1,504 @@
+import itertools
+import multiprocessing
+import os
+import queue
+import struct
+import threading
+import time
+from collections import deque
+from multiprocessing import shared_memory
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .audio import FRAME_MS, PRE_ROLL_MS, SAMPLE_RATE
+from .tts import Utterance
+
+PIPELINE = os.environ.get("JARVIS_PIPELINE", "").lower() in ("1", "true", "yes", "process")
+# About ten seconds of 30 ms frames; recognition may lag capture this far.
+RING_SLOTS = int(os.environ.get("JARVIS_PIPELINE_RING_SLOTS", "320"))
+
+# Markers sent between frame numbers on the capture -> recognition queue.
+SPEECH_START = "start"
+SPEECH_END = "end"
+RESET = "reset"
+
+_HEADER = struct.Struct("<qI")
+
+
+class AudioRing:
+    """Ring of fixed-size audio frames in shared memory.
+
+    The capture process writes each frame into the next slot and sends only
+    its sequence number to the recogniser, so frames are not pickled
+    through a pipe. Every slot starts with the sequence number of the frame
+    it holds; a reader that fell more than ``slots`` frames behind sees a
+    newer number and gets ``None`` instead of overwritten audio.
+    """
+
+    def __init__(self, frame_bytes: int, slots: int = RING_SLOTS, name: Optional[str] = None):
+        self.frame_bytes = frame_bytes
+        self.slots = slots
+        self._slot_size = _HEADER.size + frame_bytes
+        self._owner = name is None
+        if self._owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=slots * self._slot_size)
+            for slot in range(slots):
+                _HEADER.pack_into(self.shm.buf, slot * self._slot_size, -1, 0)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self._next = 0
+
+    @property
+    def spec(self) -> Tuple[int, int, str]:
+        """Arguments that attach another process to this ring."""
+        return self.frame_bytes, self.slots, self.shm.name
+
+    def write(self, frame: bytes) -> int:
+        """Store ``frame`` and return its sequence number."""
+        if len(frame) > self.frame_bytes:
+            raise ValueError(f"Frame of {len(frame)} bytes exceeds {self.frame_bytes}")
+        seq = self._next
+        self._next += 1
+        offset = (seq % self.slots) * self._slot_size
+        buf = self.shm.buf
+        # Invalidate the slot while it is rewritten.
+        _HEADER.pack_into(buf, offset, -1, 0)
+        start = offset + _HEADER.size
+        buf[start:start + len(frame)] = frame
+        _HEADER.pack_into(buf, offset, seq, len(frame))
+        return seq
+
+    def read(self, seq: int) -> Optional[bytes]:
+        """Return frame ``seq``, or ``None`` if it has been overwritten."""
+        offset = (seq % self.slots) * self._slot_size
+        buf = self.shm.buf
+        stored, length = _HEADER.unpack_from(buf, offset)
+        if stored != seq:
+            return None
+        start = offset + _HEADER.size
+        frame = bytes(buf[start:start + length])
+        if _HEADER.unpack_from(buf, offset)[0] != seq:
+            return None
+        return frame
+
+    def close(self) -> None:
+        self.shm.close()
+        if self._owner:
+            self.shm.unlink()
+
+
+class RemoteSpeech:
+    """Stand-in for :class:`~jarvis_core.tts.SpeechWorker` whose speech
+    plays in the pipeline's synthesis process.
+
+    Handles are finished when that process reports the utterance done.
+    """
+
+    def __init__(self, commands, on_busy: Optional[Callable[[bool], None]] = None) -> None:
+        self.on_busy = on_busy
+        self.busy = False
+        self.ready = threading.Event()
+        self._commands = commands
+        self._ids = itertools.count()
+        self._pending: Dict[int, Utterance] = {}
+        self._lock = threading.Lock()
+
+    def speak(
+        self, text: str, on_done: Optional[Callable[[Utterance], None]] = None
+    ) -> Utterance:
+        """Send ``text`` to the synthesis process and return its handle."""
+        utterance = Utterance(text, on_done)
+        uid = next(self._ids)
+        utterance._on_cancel = lambda: self._commands.put(("cancel", uid))
+        with self._lock:
+            self._pending[uid] = utterance
+        self._commands.put(("say", uid, text))
+        return utterance
+
+    def interrupt(self) -> None:
+        """Barge-in: drop everything queued and stop what is playing."""
+        with self._lock:
+            pending = list(self._pending.values())
+        for utterance in pending:
+            utterance.cancelled = True
+        self._commands.put(("interrupt",))
+
+    def stop(self) -> None:
+        self._commands.put(None)
+
+    def _done(
+        self, uid: int, cancelled: bool, error: Optional[str], seconds: Optional[float] = None
+    ) -> None:
+        with self._lock:
+            utterance = self._pending.pop(uid, None)
+        if utterance is not None:
+            utterance.cancelled = utterance.cancelled or cancelled
+            if seconds is not None:
+                # Clocks are not shared between processes; only the
+                # playback time itself is reported.
+                utterance.started = time.perf_counter() - seconds
+            utterance._finish(RuntimeError(error) if error else None)
+
+    def _fail(self, error: Exception) -> None:
+        with self._lock:
+            pending, self._pending = list(self._pending.values()), {}
+        for utterance in pending:
+            utterance._finish(error)
+        self.ready.set()
+        self._set_busy(False)
+
+    def _set_busy(self, busy: bool) -> None:
+        if busy != self.busy:
+            self.busy = busy
+            if self.on_busy:
+                self.on_busy(busy)
+
+
+def _capture_main(ring_spec, frames, events, control, sample_rate: int, frame_ms: int) -> None:
+    from .audio import AudioCapture
+
+    ring = AudioRing(*ring_spec)
+
+    def on_speech() -> None:
+        frames.put(SPEECH_START)
+        events.put(("speech",))
+
+    def on_speech_end() -> None:
+        frames.put(SPEECH_END)
+        events.put(("speech_end",))
+
+    capture = AudioCapture(
+        sample_rate=sample_rate,
+        frame_ms=frame_ms,
+        on_speech=on_speech,
+        on_speech_end=on_speech_end,
+        on_frame=lambda frame: frames.put(ring.write(frame)),
+        log_callback=lambda message: events.put(("log", message)),
+    )
+    capture.start()
+    try:
+        while capture.is_alive():
+            try:
+                command = control.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            if command == "stop":
+                break
+            if command == "mute":
+                capture.mute()
+                frames.put(RESET)
+            elif command == "unmute":
+                capture.unmute()
+        if capture.error:
+            events.put(("error", "capture", str(capture.error)))
+    finally:
+        capture.stop()
+        capture.join(timeout=1)
+        frames.put(None)
+        ring.close()
+
+
+def _recognize_main(
+    ring_spec, frames, events, model_path: Optional[str], sample_rate: int, pre_roll: int
+) -> None:
+    ring = AudioRing(*ring_spec)
+    try:
+        asr = None
+        if model_path:
+            from .asr import StreamingRecognizer, load_model
+
+            asr = StreamingRecognizer(
+                load_model(model_path),
+                sample_rate,
+                on_partial=lambda text: events.put(("partial", text)),
+            )
+        else:
+            import speech_recognition as sr
+
+            recognizer = sr.Recognizer()
+        # Without Vosk, utterances are rebuilt from the capture markers the
+        # same way the capture process's segmenter cut them.
+        recent: deque = deque(maxlen=pre_roll)
+        segment: Optional[List[bytes]] = None
+        dropped = 0
+        while True:
+            item = frames.get()
+            if item is None:
+                break
+            if item == SPEECH_START:
+                segment = list(recent)
+                recent.clear()
+            elif item == RESET:
+                segment = None
+                recent.clear()
+            elif item == SPEECH_END:
+                if asr is None and segment:
+                    audio = sr.AudioData(b"".join(segment), sample_rate, 2)
+                    try:
+                        events.put(("final", recognizer.recognize_google(audio)))
+                    except sr.UnknownValueError:
+                        events.put(("unrecognized",))
+                    except Exception as exc:
+                        events.put(("log", f"Error recognizing speech: {exc}"))
+                segment = None
+            else:
+                frame = ring.read(item)
+                if frame is None:
+                    dropped += 1
+                    if dropped == 1 or dropped % 100 == 0:
+                        events.put(("log", f"Recognition is falling behind; {dropped} frames lost."))
+                elif asr is not None:
+                    asr.feed(frame)
+                elif segment is not None:
+                    segment.append(frame)
+                else:
+                    recent.append(frame)
+            while asr is not None and (text := asr.get(timeout=0)):
+                events.put(("final", text))
+        if asr is not None:
+            asr.finish()
+            while text := asr.get(timeout=0):
+                events.put(("final", text))
+    except Exception as exc:
+        events.put(("error", "recognition", str(exc)))
+    finally:
+        ring.close()
+
+
+def _speech_main(commands, events) -> None:
+    import pyttsx3
+
+    from .phrases import make_phrase_cache
+    from .tts import SpeechWorker
+
+    worker = SpeechWorker(
+        engine_factory=pyttsx3.init,
+        log_callback=lambda message: events.put(("log", message)),
+        on_busy=lambda busy: events.put(("busy", busy)),
+        phrases=make_phrase_cache(),
+    )
+    worker.start()
+    worker.ready.wait()
+    events.put(("ready",))
+    playing: Dict[int, Utterance] = {}
+    lock = threading.Lock()
+
+    def done(uid: int, utterance: Utterance) -> None:
+        with lock:
+            playing.pop(uid, None)
+        error = str(utterance.error) if utterance.error else None
+        seconds = None
+        if utterance.started is not None:
+            seconds = utterance.finished - utterance.started
+        events.put(("done", uid, utterance.cancelled, error, seconds))
+
+    while True:
+        command = commands.get()
+        if command is None:
+            worker.stop()
+            worker.join()
+            break
+        kind = command[0]
+        if kind == "say":
+            uid, text = command[1], command[2]
+            # Held so done() cannot drop this uid before it is recorded.
+            with lock:
+                playing[uid] = worker.speak(text, on_done=lambda u, uid=uid: done(uid, u))
+        elif kind == "cancel":
+            utterance = playing.get(command[1])
+            if utterance is not None:
+                utterance.cancel()
+        elif kind == "interrupt":
+            worker.interrupt()
+
+
+class VoicePipeline:
+    """Run capture, recognition and speech synthesis in worker processes.
+
+    The stages talk over :mod:`multiprocessing` queues: captured frames go
+    through an :class:`AudioRing` in shared memory, recognised commands and
+    status updates come back on one event queue, and text to speak goes to
+    the synthesis process. A dispatcher thread in this process turns the
+    events into ``on_speech``, ``on_speech_end``, ``on_partial`` and
+    ``on_busy`` calls and queues commands for :meth:`get_command`.
+    Processes are spawned rather than forked so they do not inherit the Qt
+    event loop or open handles.
+    """
+
+    def __init__(
+        self,
+        model_path: Optional[str] = None,
+        sample_rate: int = SAMPLE_RATE,
+        frame_ms: int = FRAME_MS,
+        log_callback: Optional[Callable[[str], None]] = None,
+        on_busy: Optional[Callable[[bool], None]] = None,
+        on_speech: Optional[Callable[[], None]] = None,
+        on_partial: Optional[Callable[[str], None]] = None,
+        on_speech_end: Optional[Callable[[], None]] = None,
+    ) -> None:
+        self.model_path = model_path
+        self.sample_rate = sample_rate
+        self.frame_ms = frame_ms
+        self.log_callback = log_callback
+        self.on_speech = on_speech
+        self.on_partial = on_partial
+        self.on_speech_end = on_speech_end
+        self._ctx = multiprocessing.get_context("spawn")
+        self._events = self._ctx.Queue()
+        self._speech_commands = self._ctx.Queue()
+        self.speech = RemoteSpeech(self._speech_commands, on_busy=on_busy)
+        self._commands: "queue.Queue" = queue.Queue()
+        self._error: Optional[Exception] = None
+        self._synthesis = None
+        self._dispatcher: Optional[threading.Thread] = None
+        self._listeners: List = []
+        self._ring: Optional[AudioRing] = None
+        self._control = None
+
+    def start(self) -> None:
+        """Start the synthesis process and the event dispatcher."""
+        self._synthesis = self._ctx.Process(
+            target=_speech_main,
+            args=(self._speech_commands, self._events),
+            name="jarvis-tts",
+            daemon=True,
+        )
+        self._synthesis.start()
+        self._dispatcher = threading.Thread(
+            target=self._dispatch, name="jarvis-pipeline", daemon=True
+        )
+        self._dispatcher.start()
+
+    def start_listening(self) -> None:
+        """Start the capture and recognition processes."""
+        self._error = None
+        frame_bytes = self.sample_rate * self.frame_ms // 1000 * 2
+        self._ring = AudioRing(frame_bytes)
+        frames = self._ctx.Queue()
+        self._control = self._ctx.Queue()
+        pre_roll = PRE_ROLL_MS // self.frame_ms + 3
+        self._listeners = [
+            self._ctx.Process(
+                target=_capture_main,
+                args=(self._ring.spec, frames, self._events, self._control,
+                      self.sample_rate, self.frame_ms),
+                name="jarvis-capture",
+                daemon=True,
+            ),
+            self._ctx.Process(
+                target=_recognize_main,
+                args=(self._ring.spec, frames, self._events, self.model_path,
+                      self.sample_rate, pre_roll),
+                name="jarvis-asr",
+                daemon=True,
+            ),
+        ]
+        for process in self._listeners:
+            process.start()
+
+    def stop_listening(self) -> None:
+        """Stop capture, let recognition drain, and release the ring."""
+        if self._control is not None:
+            self._control.put("stop")
+            self._control = None
+        for process in self._listeners:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        self._listeners = []
+        if self._ring is not None:
+            self._ring.close()
+            self._ring = None
+
+    def close(self) -> None:
+        """Stop every stage, finishing queued speech first."""
+        self.stop_listening()
+        if self._synthesis is not None:
+            self.speech.stop()
+            self._synthesis.join(timeout=10)
+            if self._synthesis.is_alive():
+                self._synthesis.terminate()
+        self._events.put(None)
+        if self._dispatcher is not None:
+            self._dispatcher.join(timeout=1)
+
+    def mute(self) -> None:
+        if self._control is not None:
+            self._control.put("mute")
+
+    def unmute(self) -> None:
+        if self._control is not None:
+            self._control.put("unmute")
+
+    @property
+    def error(self) -> Optional[Exception]:
+        """The error that stopped capture or recognition, if any."""
+        if self._error is None:
+            for process in self._listeners:
+                if process.exitcode is not None:
+                    return RuntimeError(f"{process.name} exited with code {process.exitcode}")
+        return self._error
+
+    def get_command(self, timeout: Optional[float] = None) -> Optional[str]:
+        """Return the next recognised command, or ``None`` if none arrives in time.
+
+        Raises :class:`speech_recognition.UnknownValueError` for speech
+        that could not be recognised.
+        """
+        try:
+            command = self._commands.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        if isinstance(command, Exception):
+            raise command
+        return command
+
+    def _dispatch(self) -> None:
+        while True:
+            try:
+                event = self._events.get(timeout=1)
+            except queue.Empty:
+                if self._synthesis is not None and not self._synthesis.is_alive():
+                    self.speech._fail(RuntimeError("Speech process exited"))
+                continue
+            if event is None:
+                break
+            try:
+                self._handle(event)
+            except Exception as exc:
+                if self.log_callback:
+                    self.log_callback(f"Pipeline error: {exc}")
+        self.speech._fail(RuntimeError("Pipeline closed"))
+
+    def _handle(self, event: tuple) -> None:
+        kind = event[0]
+        if kind == "ready":
+            self.speech.ready.set()
+        elif kind == "done":
+            self.speech._done(*event[1:])
+        elif kind == "busy":
+            self.speech._set_busy(event[1])
+        elif kind == "speech":
+            if self.on_speech:
+                self.on_speech()
+        elif kind == "speech_end":
+            if self.on_speech_end:
+                self.on_speech_end()
+        elif kind == "partial":
+            if self.on_partial:
+                self.on_partial(event[1])
+        elif kind == "final":
+            self._commands.put(event[1])
+        elif kind == "unrecognized":
+            import speech_recognition as sr
+
+            self._commands.put(sr.UnknownValueError())
+        elif kind == "error":
+            self._error = RuntimeError(f"{event[1]} failed: {event[2]}")
+            if self.log_callback:
+                self.log_callback(f"Pipeline {event[1]} error: {event[2]}")
+        elif kind == "log":
+            if self.log_callback:
+                self.log_callback(event[1])
+
+
+__all__ = ["AudioRing", "PIPELINE", "RemoteSpeech", "VoicePipeline"]
@@ -0,0 +1,176 @@
+import heapq
+import itertools
+import os
+import random
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+
+REQUESTS_PER_MINUTE = float(os.environ.get("JARVIS_OPENAI_RPM", "60"))
+TOKENS_PER_MINUTE = float(os.environ.get("JARVIS_OPENAI_TPM", "90000"))
+# Share of each budget that only interactive requests may use.
+INTERACTIVE_RESERVE = float(os.environ.get("JARVIS_OPENAI_RESERVE", "0.2"))
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 30.0
+
+# Priority lanes; lower values are served first.
+INTERACTIVE = 0
+BACKGROUND = 1
+
+
+def retry_after(exc: BaseException) -> Optional[float]:
+    """Return the ``Retry-After`` delay in seconds carried by an API error."""
+    headers = getattr(exc, "headers", None)
+    if headers is None:
+        headers = getattr(getattr(exc, "response", None), "headers", None)
+    if not headers:
+        return None
+    for name in ("retry-after-ms", "Retry-After-Ms"):
+        if headers.get(name):
+            try:
+                return float(headers[name]) / 1000
+            except ValueError:
+                pass
+    value = headers.get("retry-after") or headers.get("Retry-After")
+    try:
+        return max(0.0, float(value)) if value else None
+    except ValueError:
+        return None
+
+
+class TokenBucket:
+    """Budget of ``per_minute`` units refilled continuously."""
+
+    def __init__(self, per_minute: float, clock: Callable[[], float] = time.monotonic) -> None:
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.clock = clock
+        self.level = per_minute
+        self.updated = clock()
+
+    def _refill(self) -> None:
+        now = self.clock()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, amount: float, reserve: float = 0.0) -> float:
+        """Seconds until ``amount`` can be taken while leaving ``reserve`` spare."""
+        if self.capacity <= 0:
+            return 0.0
+        self._refill()
+        needed = min(amount + reserve * self.capacity, self.capacity)
+        return max(0.0, (needed - self.level) / self.rate)
+
+    def take(self, amount: float) -> None:
+        if self.capacity > 0:
+            self._refill()
+            self.level -= min(amount, self.capacity)
+
+
+class RateScheduler:
+    """Client-side limiter shared by every caller of the OpenAI API.
+
+    :meth:`acquire` blocks until both the request and token budgets allow a
+    call. Waiting callers are served by priority lane, then in arrival
+    order, and background callers leave ``reserve`` of each budget to
+    interactive ones. :meth:`throttle` pauses every caller after a rate
+    limit error, for the server's ``Retry-After`` delay or a jittered
+    exponential backoff.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float = REQUESTS_PER_MINUTE,
+        tokens_per_minute: float = TOKENS_PER_MINUTE,
+        reserve: float = INTERACTIVE_RESERVE,
+        clock: Callable[[], float] = time.monotonic,
+        jitter: Callable[[], float] = random.random,
+    ) -> None:
+        self.requests = TokenBucket(requests_per_minute, clock)
+        self.tokens = TokenBucket(tokens_per_minute, clock)
+        self.reserve = reserve
+        self.clock = clock
+        self.jitter = jitter
+        self.paused_until = 0.0
+        self._waiting: List[Tuple[int, int]] = []
+        self._order = itertools.count()
+        self._cond = threading.Condition()
+
+    def backoff(self, attempt: int) -> float:
+        """Return a jittered exponential delay for retry ``attempt`` (from 1)."""
+        delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (attempt - 1))
+        return delay / 2 + self.jitter() * delay / 2
+
+    def _delay(self, tokens: float, priority: int) -> float:
+        reserve = self.reserve if priority > INTERACTIVE else 0.0
+        return max(
+            self.paused_until - self.clock(),
+            self.requests.delay(1, reserve),
+            self.tokens.delay(tokens, reserve),
+        )
+
+    def acquire(
+        self, tokens: float = 0, priority: int = BACKGROUND, timeout: Optional[float] = None
+    ) -> bool:
+        """Wait for budget for one request of ``tokens`` tokens and take it."""
+        deadline = None if timeout is None else self.clock() + timeout
+        with self._cond:
+            ticket = (priority, next(self._order))
+            heapq.heappush(self._waiting, ticket)
+            try:
+                while True:
+                    wait = None
+                    if self._waiting[0] == ticket:
+                        wait = self._delay(tokens, priority)
+                        if wait <= 0:
+                            self.requests.take(1)
+                            self.tokens.take(tokens)
+                            return True
+                    if deadline is not None:
+                        remaining = deadline - self.clock()
+                        if remaining <= 0:
+                            return False
+                        wait = remaining if wait is None else min(wait, remaining)
+                    self._cond.wait(wait)
+            finally:
+                self._waiting.remove(ticket)
+                heapq.heapify(self._waiting)
+                self._cond.notify_all()
+
+    def throttle(self, attempt: int, delay: Optional[float] = None) -> float:
+        """Pause all callers after a rate limit error and return the pause."""
+        if delay is None:
+            delay = self.backoff(attempt)
+        with self._cond:
+            self.paused_until = max(self.paused_until, self.clock() + delay)
+            self._cond.notify_all()
+        return delay
+
+    def sleep(self, attempt: int) -> float:
+        """Back off the calling thread only, e.g. after a network error."""
+        delay = self.backoff(attempt)
+        time.sleep(delay)
+        return delay
+
+
+_shared: Optional[RateScheduler] = None
+_shared_lock = threading.Lock()
+
+
+def shared_scheduler() -> RateScheduler:
+    """Return the process-wide scheduler, creating it on first use."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = RateScheduler()
+        return _shared
+
+
+__all__ = [
+    "BACKGROUND",
+    "INTERACTIVE",
+    "RateScheduler",
+    "TokenBucket",
+    "retry_after",
+    "shared_scheduler",
+]
@@ -0,0 +1,104 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from .chatgpt import ChatGPTModule
+
+MAX_SESSIONS = int(os.environ.get("JARVIS_MAX_SESSIONS", "100"))
+SESSION_IDLE_TIMEOUT = float(os.environ.get("JARVIS_SESSION_IDLE_TIMEOUT", "1800"))
+REHYDRATE_MESSAGES = int(os.environ.get("JARVIS_REHYDRATE_MESSAGES", "20"))
+
+
+def load_session_history(session_id: str) -> List[Tuple[str, str]]:
+    """Return a session's stored ``(speaker, message)`` pairs, oldest first."""
+    from jarvis.data import DataManager
+
+    rows = DataManager.fetch_last_messages(REHYDRATE_MESSAGES, session=session_id)
+    return list(reversed(rows))
+
+
+class _Session:
+    __slots__ = ("module", "lock", "last_used")
+
+    def __init__(self, module: ChatGPTModule) -> None:
+        self.module = module
+        self.lock = threading.Lock()
+        self.last_used = time.monotonic()
+
+
+class SessionStore:
+    """Bounded LRU of per-client :class:`ChatGPTModule` conversations.
+
+    Sessions idle for longer than ``idle_timeout`` or beyond
+    ``max_sessions`` are dropped, least recently used first. A session that
+    is not in memory is rebuilt with ``factory`` and its recent messages
+    from ``history`` so a client can resume after eviction or a restart.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], ChatGPTModule],
+        max_sessions: int = MAX_SESSIONS,
+        idle_timeout: float = SESSION_IDLE_TIMEOUT,
+        history: Optional[Callable[[str], List[Tuple[str, str]]]] = load_session_history,
+    ) -> None:
+        self.factory = factory
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.history = history
+        self._sessions: "OrderedDict[str, _Session]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._sessions
+
+    @contextmanager
+    def acquire(self, session_id: str) -> Iterator[ChatGPTModule]:
+        """Yield the session's module, serialising requests for one session."""
+        session = self._get(session_id)
+        with session.lock:
+            yield session.module
+            session.last_used = time.monotonic()
+
+    def _get(self, session_id: str) -> _Session:
+        with self._lock:
+            self._evict_idle()
+            session = self._sessions.get(session_id)
+            if session is not None:
+                self._sessions.move_to_end(session_id)
+                session.last_used = time.monotonic()
+                return session
+        # Build outside the lock; rehydrating reads from the database.
+        session = _Session(self._build(session_id))
+        with self._lock:
+            session = self._sessions.setdefault(session_id, session)
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        return session
+
+    def _build(self, session_id: str) -> ChatGPTModule:
+        module = self.factory()
+        if self.history is not None:
+            for speaker, message in self.history(session_id):
+                role = "user" if speaker == "user" else "assistant"
+                module.conversation.append({"role": role, "content": message})
+            module.budget.trim(module.conversation)
+        return module
+
+    def _evict_idle(self) -> None:
+        cutoff = time.monotonic() - self.idle_timeout
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if session.last_used >= cutoff:
+                break
+            del self._sessions[session_id]
+
+
+__all__ = ["SessionStore", "load_session_history"]
@@ -0,0 +1,164 @@
+import os
+import threading
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from .jobs import Job
+
+# Seconds a follower waits without progress before making its own call.
+FLIGHT_TIMEOUT = float(os.environ.get("JARVIS_FLIGHT_TIMEOUT", "30"))
+
+
+class _Stalled(Exception):
+    pass
+
+
+class _Flight(Job):
+    """A shared call whose tokens are pulled by whichever reader needs one next.
+
+    No reader owns the underlying stream, so the caller that started it can
+    go away and the others keep it going.
+    """
+
+    def __init__(self, call: Callable[[], Iterator[str]], running: bool) -> None:
+        super().__init__()
+        self.call = call
+        self.source: Optional[Iterator[str]] = None
+        # Set for the whole call when a :meth:`SingleFlight.do` caller runs it.
+        self.producing = running
+        self.running = running
+        self.readers = 0
+
+
+class SingleFlight:
+    """Share one in-flight call among concurrent callers with the same key.
+
+    The first caller for a key runs the call; callers arriving while it is
+    still running wait for its result (or follow its tokens with
+    :meth:`stream`) instead of making their own. Nothing is remembered once
+    the call finishes; that is the job of :class:`~jarvis_core.cache.ResponseCache`.
+    A follower that sees no progress for ``timeout`` seconds makes its own
+    call instead.
+    """
+
+    def __init__(self, timeout: float = FLIGHT_TIMEOUT) -> None:
+        self.timeout = timeout
+        self.calls = 0
+        self.shared = 0
+        self._flights: Dict[str, _Flight] = {}
+        self._lock = threading.Lock()
+
+    def _join(
+        self, key: str, call: Callable, running: bool = False, reader: bool = False
+    ) -> Tuple[_Flight, bool]:
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight(call, running)
+                self.calls += 1
+            else:
+                self.shared += 1
+            if reader:
+                with flight._cond:
+                    flight.readers += 1
+            return flight, leader
+
+    def _land(self, key: str, flight: Job, error: str | None = None) -> None:
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+        flight.finish(error=error)
+
+    def do(self, key: str, call: Callable[[], str]) -> str:
+        """Return ``call()``, or the result of an identical call already running."""
+        flight, leader = self._join(key, call, running=True)
+        if not leader:
+            if flight.join(self.timeout) and flight.error is None:
+                return flight.response
+            return call()
+        try:
+            result = call()
+        except BaseException as exc:
+            self._land(key, flight, repr(exc))
+            raise
+        flight.append(result)
+        self._land(key, flight)
+        return result
+
+    def stream(self, key: str, call: Callable[[], Iterator[str]]) -> Iterator[str]:
+        """Yield the tokens of ``call()``, or of an identical stream already running.
+
+        If the caller that started the stream stops reading, the others carry
+        on pulling tokens from it. A caller that got nothing before the call
+        failed or stalled makes the call itself; one that got part of the
+        reply keeps just that part.
+        """
+        flight, _ = self._join(key, call, reader=True)
+        index = 0
+        fallback = False
+        try:
+            while True:
+                try:
+                    tokens, done = self._next(key, flight, index)
+                except _Stalled:
+                    fallback = index == 0
+                    break
+                yield from tokens
+                index += len(tokens)
+                if done and index >= len(flight.tokens):
+                    fallback = flight.error is not None and index == 0
+                    break
+        finally:
+            self._leave(key, flight)
+        if fallback:
+            yield from call()
+
+    def _next(self, key: str, flight: _Flight, index: int) -> Tuple[List[str], bool]:
+        """Return tokens from ``index``, producing the next one if nobody else is."""
+        with flight._cond:
+            while len(flight.tokens) <= index and not flight.done:
+                if not flight.producing:
+                    flight.producing = True
+                    break
+                if not flight._cond.wait(self.timeout):
+                    raise _Stalled()
+            else:
+                return flight.tokens[index:], flight.done
+        try:
+            if flight.source is None:
+                flight.source = iter(flight.call())
+            token = next(flight.source)
+        except StopIteration:
+            self._land(key, flight)
+        except BaseException as exc:
+            self._land(key, flight, repr(exc))
+            raise
+        else:
+            flight.append(token)
+        finally:
+            with flight._cond:
+                flight.producing = False
+                flight._cond.notify_all()
+        with flight._cond:
+            return flight.tokens[index:], flight.done
+
+    def _leave(self, key: str, flight: _Flight) -> None:
+        """Drop a reader; the last one to leave an unfinished stream closes it."""
+        with self._lock:
+            with flight._cond:
+                flight.readers -= 1
+                abandoned = flight.readers == 0 and not flight.done and not flight.running
+            if abandoned and self._flights.get(key) is flight:
+                del self._flights[key]
+        if abandoned:
+            if flight.source is not None and hasattr(flight.source, "close"):
+                flight.source.close()
+            flight.finish(error="abandoned")
+
+    def stats(self) -> Dict[str, int]:
+        """Return how many calls were made and how many callers shared one."""
+        with self._lock:
+            return {"calls": self.calls, "shared": self.shared, "in_flight": len(self._flights)}
+
+
+__all__ = ["SingleFlight"]
@@ -0,0 +1,217 @@
+import os
+import queue
+import threading
+import time
+from typing import Callable, List, Optional
+
+from .phrases import PhraseCache
+
+BARGE_IN = os.environ.get("JARVIS_BARGE_IN", "").lower() in ("1", "true", "yes")
+
+
+class Utterance:
+    """Handle for a queued piece of speech."""
+
+    def __init__(self, text: str, on_done: Optional[Callable[["Utterance"], None]] = None):
+        self.text = text
+        self.cancelled = False
+        self.error: Optional[Exception] = None
+        # time.perf_counter() when playback began and when the handle was
+        # finished; ``started`` stays None for speech that never played.
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self._done = threading.Event()
+        self._callbacks: List[Callable[["Utterance"], None]] = [on_done] if on_done else []
+        self._lock = threading.Lock()
+        # Set by handles whose speech plays elsewhere, e.g. in another process.
+        self._on_cancel: Optional[Callable[[], None]] = None
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def cancel(self) -> None:
+        """Skip this utterance, or cut it short if it is playing."""
+        self.cancelled = True
+        if self._on_cancel is not None:
+            self._on_cancel()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the utterance has played or been cancelled."""
+        return self._done.wait(timeout)
+
+    def add_done_callback(self, callback: Callable[["Utterance"], None]) -> None:
+        """Call ``callback(utterance)`` once it finishes, or now if it has."""
+        with self._lock:
+            if not self._done.is_set():
+                self._callbacks.append(callback)
+                return
+        callback(self)
+
+    def _finish(self, error: Optional[Exception] = None) -> None:
+        with self._lock:
+            self.error = error
+            self.finished = time.perf_counter()
+            self._done.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback(self)
+
+
+class SpeechWorker(threading.Thread):
+    """Play queued utterances on a dedicated text-to-speech thread.
+
+    The engine is created on this thread, because pyttsx3 engines must be
+    driven from the thread that made them. Speech runs in pyttsx3's external
+    loop so an utterance can be stopped part-way for barge-in. If the engine
+    cannot be created or fails, text is printed instead. ``on_busy(True)``
+    is called when playback starts and ``on_busy(False)`` when the queue
+    runs dry. :attr:`ready` is set once the engine has been created, or
+    has failed to be.
+
+    With a :class:`~jarvis_core.phrases.PhraseCache`, phrases already
+    rendered to disk are played from their files, and frequent phrases are
+    rendered while the queue is empty. A render is cut short when speech is
+    queued, so it never delays a reply.
+    """
+
+    def __init__(
+        self,
+        engine_factory: Optional[Callable[[], object]] = None,
+        log_callback: Optional[Callable[[str], None]] = None,
+        on_busy: Optional[Callable[[bool], None]] = None,
+        poll_interval: float = 0.02,
+        phrases: Optional[PhraseCache] = None,
+    ) -> None:
+        super().__init__(daemon=True, name="jarvis-tts")
+        self.engine_factory = engine_factory
+        self.log_callback = log_callback
+        self.on_busy = on_busy
+        self.poll_interval = poll_interval
+        self.phrases = phrases
+        self.engine = None
+        self.busy = False
+        self.ready = threading.Event()
+        self._queue: "queue.Queue[Optional[Utterance]]" = queue.Queue()
+        self._current: Optional[Utterance] = None
+
+    def speak(
+        self, text: str, on_done: Optional[Callable[[Utterance], None]] = None
+    ) -> Utterance:
+        """Queue ``text`` and return its handle without waiting."""
+        utterance = Utterance(text, on_done)
+        self._queue.put(utterance)
+        return utterance
+
+    def interrupt(self) -> None:
+        """Barge-in: drop everything queued and stop what is playing."""
+        while True:
+            try:
+                utterance = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if utterance is None:
+                self._queue.put(None)
+                break
+            utterance.cancel()
+            utterance._finish()
+        current = self._current
+        if current is not None:
+            current.cancel()
+
+    def stop(self) -> None:
+        """Finish the queued speech, then end the thread."""
+        self._queue.put(None)
+
+    def run(self) -> None:
+        if self.engine_factory is not None:
+            try:
+                self.engine = self.engine_factory()
+            except Exception as exc:
+                if self.log_callback:
+                    self.log_callback(f"TTS initialization error: {exc}")
+        self.ready.set()
+        while True:
+            self._render_pending()
+            utterance = self._queue.get()
+            if utterance is None:
+                break
+            if utterance.cancelled:
+                utterance._finish()
+                continue
+            self._set_busy(True)
+            self._current = utterance
+            utterance.started = time.perf_counter()
+            error = None
+            try:
+                self._say(utterance)
+            except Exception as exc:
+                error = exc
+                if self.log_callback:
+                    self.log_callback(f"TTS error: {exc}")
+                print(utterance.text)
+            finally:
+                self._current = None
+                utterance._finish(error)
+            if self._queue.empty():
+                self._set_busy(False)
+        self._set_busy(False)
+
+    def _set_busy(self, busy: bool) -> None:
+        if busy != self.busy:
+            self.busy = busy
+            if self.on_busy:
+                self.on_busy(busy)
+
+    def _render_pending(self) -> None:
+        if self.phrases is None or self.engine is None:
+            return
+        while self._queue.empty():
+            text = self.phrases.next_pending()
+            if text is None:
+                return
+            try:
+                # Stop rendering the moment speech is queued; the phrase is
+                # rendered again at the next idle moment.
+                self.phrases.render(
+                    self.engine,
+                    text,
+                    cancelled=lambda: not self._queue.empty(),
+                    poll_interval=self.poll_interval,
+                )
+            except Exception as exc:
+                if self.log_callback:
+                    self.log_callback(f"Phrase rendering error: {exc}")
+                return
+
+    def _say(self, utterance: Utterance) -> None:
+        engine = self.engine
+        if engine is None:
+            print(utterance.text)
+            return
+        if self.phrases is not None:
+            path = self.phrases.lookup(utterance.text, engine)
+            if path:
+                try:
+                    self.phrases.play(path, lambda: utterance.cancelled)
+                    return
+                except Exception as exc:
+                    if self.log_callback:
+                        self.log_callback(f"Cached phrase playback error: {exc}")
+            self.phrases.note(utterance.text)
+        engine.say(utterance.text)
+        engine.startLoop(False)
+        try:
+            while True:
+                engine.iterate()
+                if utterance.cancelled:
+                    engine.stop()
+                    break
+                if not engine.isBusy():
+                    break
+                time.sleep(self.poll_interval)
+        finally:
+            engine.endLoop()
+
+
+__all__ = ["BARGE_IN", "SpeechWorker", "Utterance"]
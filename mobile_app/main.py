@@ -1,10 +1,16 @@
+import json
+import threading
+
 import requests
 from kivy.app import App
+from kivy.clock import Clock
 from kivy.lang import Builder
 from kivy.properties import StringProperty
 from kivy.uix.boxlayout import BoxLayout
 
 SERVER_URL = 'http://localhost:5000'
+# Keeps the server's session cookie so follow-up questions share context.
+HTTP = requests.Session()
 
 KV = '''
 <RootWidget>:
@@ -44,24 +50,53 @@ class RootWidget(BoxLayout):
     def send_command(self, text: str) -> None:
         if not text:
             return
+        self.response = ''
+        # Read the reply off the UI thread so the label updates as it streams.
+        threading.Thread(target=self._ask, args=(text,), daemon=True).start()
+
+    def _ask(self, text: str) -> None:
         try:
-            resp = requests.post(f'{SERVER_URL}/ask', json={'q': text}, timeout=5)
-            if resp.ok:
-                self.response = resp.json().get('response', '')
-            else:
-                self.response = f'Error: {resp.status_code}'
+            resp = HTTP.post(f'{SERVER_URL}/ask', json={'q': text}, timeout=5)
+            if not resp.ok:
+                self._show(f'Error: {resp.status_code}')
+                return
+            job = resp.json()['job']
+            with HTTP.get(
+                f'{SERVER_URL}/ask/{job}/stream', stream=True, timeout=(5, 60)
+            ) as stream:
+                reply = ''
+                event = 'message'
+                for line in stream.iter_lines(decode_unicode=True):
+                    if line.startswith('event:'):
+                        event = line[len('event:'):].strip()
+                    elif line.startswith('data:'):
+                        data = json.loads(line[len('data:'):])
+                        if event == 'token':
+                            reply += data
+                            self._show(reply)
+                        elif event == 'done':
+                            self._show(data['response'])
+                            return
+                        elif event == 'error':
+                            self._show(f"Error: {data['error']}")
+                            return
+                    elif not line:
+                        event = 'message'
         except Exception as exc:
-            self.response = f'Error: {exc}'
+            self._show(f'Error: {exc}')
+
+    def _show(self, text: str) -> None:
+        Clock.schedule_once(lambda dt: setattr(self, 'response', text))
 
     def start_jarvis(self) -> None:
         try:
-            requests.post(f'{SERVER_URL}/start', timeout=5)
+            HTTP.post(f'{SERVER_URL}/start', timeout=5)
         except Exception as exc:
             self.response = f'Error: {exc}'
 
     def stop_jarvis(self) -> None:
         try:
-            requests.post(f'{SERVER_URL}/stop', timeout=5)
+            HTTP.post(f'{SERVER_URL}/stop', timeout=5)
         except Exception as exc:
             self.response = f'Error: {exc}'
 
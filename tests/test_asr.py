@@ -0,0 +1,65 @@
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from jarvis_core import asr as asr_module
+from jarvis_core.asr import StreamingRecognizer, load_model
+
+
+class FakeKaldi:
+    """Recognises one word per frame and ends the utterance on b"."."""
+
+    def __init__(self):
+        self.words = []
+
+    def AcceptWaveform(self, frame):
+        if frame == b".":
+            return True
+        self.words.append(frame.decode())
+        return False
+
+    def PartialResult(self):
+        return json.dumps({"partial": " ".join(self.words)})
+
+    def Result(self):
+        text, self.words = " ".join(self.words), []
+        return json.dumps({"text": text})
+
+    FinalResult = Result
+
+
+def test_partials_then_final_on_endpoint():
+    partials = []
+    asr = StreamingRecognizer(None, on_partial=partials.append, recognizer=FakeKaldi())
+    asr.start()
+    for frame in (b"lights", b"on", b".", b"status"):
+        asr.push(frame)
+    assert asr.get(timeout=5) == "lights on"
+    asr.stop()
+    assert asr.get(timeout=5) == "status"
+    asr.join(5)
+    assert partials == ["lights", "lights on", "status"]
+    assert asr.error is None
+
+
+def test_feed_and_finish_decode_on_the_calling_thread():
+    asr = StreamingRecognizer(None, recognizer=FakeKaldi())
+    for frame in (b"fan", b"off", b".", b"thanks"):
+        asr.feed(frame)
+    assert asr.get(timeout=0) == "fan off"
+    assert asr.get(timeout=0) is None
+    asr.finish()
+    assert asr.get(timeout=0) == "thanks"
+    assert not asr.is_alive()
+
+
+def test_load_model_once_per_path(monkeypatch, tmp_path):
+    loaded = []
+    monkeypatch.setattr(asr_module, "_models", {})
+    monkeypatch.setattr(asr_module, "Model", lambda path: loaded.append(path) or object())
+    first = load_model(str(tmp_path))
+    assert load_model(str(tmp_path / ".." / tmp_path.name)) is first
+    assert load_model(str(tmp_path / "other")) is not first
+    assert len(loaded) == 2
@@ -0,0 +1,76 @@
+import os
+import sys
+from array import array
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from jarvis_core.audio import AudioCapture, EnergyVAD, Segmenter, frame_rms
+
+QUIET = array("h", [10, -10] * 240).tobytes()
+LOUD = array("h", [3000, -3000] * 240).tobytes()
+
+
+class MarkerVAD:
+    def calibrate(self, frames):
+        pass
+
+    def is_speech(self, frame):
+        return frame.startswith(b"S")
+
+
+def test_segmenter_keeps_pre_roll_and_ends_on_silence():
+    segmenter = Segmenter(MarkerVAD(), pre_roll=2, start_frames=2, end_frames=2)
+    frames = [b"q1", b"q2", b"S1", b"S2", b"S3", b"q3", b"q4", b"q5"]
+    segments = [s for s in map(segmenter.feed, frames) if s is not None]
+    assert segments == [b"q1q2S1S2S3q3q4"]
+    assert not segmenter.active
+
+
+def test_energy_vad_calibrates_to_ambient():
+    assert frame_rms(LOUD) == 3000.0
+    vad = EnergyVAD()
+    vad.calibrate([QUIET] * 5)
+    assert vad.threshold == 50.0
+    assert vad.is_speech(LOUD) and not vad.is_speech(QUIET)
+
+
+def test_capture_queues_segments_and_signals_speech():
+    starts = []
+    capture = AudioCapture(
+        vad=MarkerVAD(), on_speech=lambda: starts.append(True), frame_ms=30
+    )
+    capture.segmenter = Segmenter(MarkerVAD(), pre_roll=1, start_frames=1, end_frames=1)
+    for _ in range(10):
+        for frame in (b"S1", b"q1"):
+            capture.feed(frame)
+    assert len(starts) == 10
+    assert capture.segments.qsize() == 8
+    audio = capture.get(timeout=0)
+    assert audio.get_raw_data() == b"S1q1"
+    capture.segments.queue.clear()
+    assert capture.get(timeout=0) is None
+
+
+def test_muted_capture_drops_frames():
+    frames = []
+    capture = AudioCapture(vad=MarkerVAD(), on_frame=frames.append)
+    capture.feed(b"S1")
+    capture.mute()
+    capture.feed(b"S2")
+    capture.unmute()
+    capture.feed(b"q1")
+    assert frames == [b"S1", b"q1"]
+    assert capture.get(timeout=0) is None
+
+
+def test_mute_discards_partial_utterance():
+    capture = AudioCapture(vad=MarkerVAD())
+    capture.segmenter = Segmenter(MarkerVAD(), pre_roll=1, start_frames=1, end_frames=1)
+    capture.feed(b"S1")
+    capture.mute()
+    assert capture.segmenter.active
+    capture.feed(b"S2")
+    assert not capture.segmenter.active
+    capture.unmute()
+    capture.feed(b"q1")
+    assert capture.get(timeout=0) is None
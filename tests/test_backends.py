@@ -0,0 +1,69 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pytest
+from jarvis_core.backends import (
+    BackendUnavailable,
+    FakeBackend,
+    OpenAIBackend,
+    RateLimited,
+    make_backend,
+)
+from jarvis_core.cache import ResponseCache
+from jarvis_core.chatgpt import ChatGPTModule
+from jarvis_core.ratelimit import RateScheduler
+
+MESSAGES = [{"role": "user", "content": "lights on"}]
+
+
+def test_fake_backend_is_deterministic():
+    backend = FakeBackend(latency=0, tokens_per_second=0, reply_words=3)
+    assert backend.complete("m", MESSAGES) == "Understood. lights on lights."
+    assert "".join(backend.stream("m", MESSAGES)) == "Understood. lights on lights."
+
+    def failures(seed):
+        backend = FakeBackend(latency=0, tokens_per_second=0, error_rate=0.5, seed=seed)
+        outcomes = []
+        for _ in range(20):
+            try:
+                backend.complete("m", MESSAGES)
+                outcomes.append("ok")
+            except (RateLimited, BackendUnavailable) as exc:
+                outcomes.append(type(exc).__name__)
+        return outcomes
+
+    assert failures(1) == failures(1)
+    assert {"ok", "RateLimited", "BackendUnavailable"} == set(failures(1))
+
+
+def test_module_retries_fake_errors(monkeypatch):
+    backend = FakeBackend(latency=0, tokens_per_second=0, reply_words=1)
+    errors = iter([BackendUnavailable("down")])
+    begin = backend._begin
+
+    def flaky():
+        begin()
+        for exc in errors:
+            raise exc
+
+    monkeypatch.setattr(backend, "_begin", flaky)
+    scheduler = RateScheduler(0, 0, jitter=lambda: 0.0)
+    monkeypatch.setattr(scheduler, "sleep", lambda attempt: 0.0)
+    cache = ResponseCache()
+    module = ChatGPTModule(api_key="key", backend=backend, scheduler=scheduler, cache=cache)
+    assert module.ask("hello") == "Understood. hello."
+    assert backend.requests == 2
+    assert module.retries == 1
+    # A cached reply involves no request, so no retry count either.
+    cached = ChatGPTModule(api_key="key", backend=backend, scheduler=scheduler, cache=cache)
+    assert cached.ask("hello") == "Understood. hello."
+    assert cached.retries is None
+
+
+def test_make_backend():
+    assert isinstance(make_backend("fake"), FakeBackend)
+    assert isinstance(make_backend("OpenAI"), OpenAIBackend)
+    with pytest.raises(ValueError):
+        make_backend("nope")
@@ -0,0 +1,72 @@
+import os
+import sys
+import types
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import openai
+from jarvis_core.cache import ResponseCache
+from jarvis_core.chatgpt import ChatGPTModule
+
+
+def test_lru_and_ttl(monkeypatch):
+    cache = ResponseCache(max_entries=2, ttl=10)
+    cache.put("a", "1")
+    cache.put("b", "2")
+    assert cache.get("a") == "1"
+    cache.put("c", "3")
+    assert cache.get("b") is None
+    cache.put("d", "4", ttl=-1)
+    assert cache.get("d") is None
+    assert cache.stats() == {"hits": 1, "misses": 2, "size": 1}
+    assert ResponseCache.make_key("Status report?") == ResponseCache.make_key(" status  REPORT ")
+
+
+def test_persistence(tmp_path):
+    db_file = str(tmp_path / "cache.db")
+    cache = ResponseCache(db_path=db_file)
+    cache.put("key", "value")
+    cache.put("stale", "old", ttl=-1)
+    reloaded = ResponseCache(db_path=db_file)
+    reloaded.load()
+    assert reloaded.stats()["size"] == 1
+    assert reloaded.get("key") == "value"
+
+
+def test_chatgpt_uses_cache(monkeypatch):
+    calls = []
+
+    class FakeResponse:
+        choices = [types.SimpleNamespace(message={"content": "At three, sir."})]
+
+    def fake_create(model, messages):
+        calls.append(messages)
+        return FakeResponse()
+
+    monkeypatch.setattr(openai.ChatCompletion, "create", fake_create)
+    cache = ResponseCache()
+    first = ChatGPTModule(api_key="key", cache=cache)
+    assert first.ask("What time is the meeting?") == "At three, sir."
+    # A fresh conversation has the same (empty) history, so it hits.
+    module = ChatGPTModule(api_key="key", cache=cache)
+    assert module.ask("what time is the meeting") == "At three, sir."
+    assert len(calls) == 1
+    assert module.conversation[-1]["content"] == "At three, sir."
+
+
+def test_cache_key_covers_earlier_turns(monkeypatch):
+    calls = []
+
+    def fake_create(model, messages):
+        calls.append(messages)
+        reply = f"Reply {len(calls)}."
+        return types.SimpleNamespace(choices=[types.SimpleNamespace(message={"content": reply})])
+
+    monkeypatch.setattr(openai.ChatCompletion, "create", fake_create)
+    cache = ResponseCache()
+    fan = ChatGPTModule(api_key="key", cache=cache)
+    fan.ask("Is the fan on?")
+    pump = ChatGPTModule(api_key="key", cache=cache)
+    pump.ask("Is the pump on?")
+    assert fan.ask("Why?") != pump.ask("Why?")
+    assert len(calls) == 4
@@ -32,3 +32,17 @@ def test_ask_with_api_key(monkeypatch):
     assert reply == "Hello"
     assert module.conversation[-1]["content"] == "Hello"
 
+
+def test_ask_stream_yields_tokens(monkeypatch):
+    module = ChatGPTModule(api_key="key")
+
+    def fake_create(model, messages, stream=False):
+        assert stream
+        return iter(
+            types.SimpleNamespace(choices=[types.SimpleNamespace(delta={"content": t})])
+            for t in ["Hel", "lo", " there."]
+        )
+
+    monkeypatch.setattr(openai.ChatCompletion, "create", fake_create)
+    assert list(module.ask_stream("Hi")) == ["Hel", "lo", " there."]
+    assert module.conversation[-1] == {"role": "assistant", "content": "Hello there."}
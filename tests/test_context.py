@@ -0,0 +1,37 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from jarvis_core.context import SUMMARY_PREFIX, TokenBudget
+
+
+def words(text):
+    return len(text.split())
+
+
+def test_trim_folds_old_turns_into_summary():
+    budget = TokenBudget(max_tokens=60, summary_tokens=20, counter=words)
+    messages = [{"role": "system", "content": "You are JARVIS."}]
+    for turn in range(6):
+        messages.append({"role": "user", "content": f"question {turn}. " + "word " * 5})
+        messages.append({"role": "assistant", "content": f"answer {turn}. " + "word " * 5})
+        budget.trim(messages)
+
+    assert messages[0]["content"] == "You are JARVIS."
+    assert messages[1]["content"].startswith(SUMMARY_PREFIX)
+    assert "user: question 4." in messages[1]["content"]
+    assert "question 0" not in messages[1]["content"]
+    assert messages[-1]["content"].startswith("answer 5.")
+    assert messages[2]["role"] == "user"
+    assert budget.total_tokens(messages) <= 60
+
+
+def test_trim_keeps_short_conversations():
+    budget = TokenBudget(max_tokens=100, counter=words)
+    messages = [
+        {"role": "system", "content": "You are JARVIS."},
+        {"role": "user", "content": "hello"},
+    ]
+    assert budget.trim(messages) == []
+    assert len(messages) == 2
@@ -0,0 +1,32 @@
+import os
+import sys
+from concurrent.futures import Future
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from jarvis_core.core import JarvisCore, split_sentences
+
+
+def test_split_sentences_from_tokens():
+    tokens = ["Good", " morning, sir", ". Mr.", " Stark is", " in the lab! ", "Anything else"]
+    assert list(split_sentences(tokens)) == [
+        "Good morning, sir.",
+        "Mr. Stark is in the lab!",
+        "Anything else",
+    ]
+
+
+def test_stop_before_ready_keeps_core_from_listening():
+    core = JarvisCore.__new__(JarvisCore)
+    core.ready = Future()
+    core.listening = False
+    core.log_callback = None
+    spoken = []
+    core._speak = spoken.append
+    thread = core.start()
+    core.stop_listening()
+    core.ready.set_result(core)
+    thread.join(5)
+    assert not thread.is_alive()
+    assert not core.listening
+    assert spoken == []
@@ -0,0 +1,208 @@
+import os
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from jarvis.data import DataManager, _Writer, _utc_timestamp
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    DataManager.close()
+    monkeypatch.setattr(DataManager, "DB_PATH", str(tmp_path / "test.db"))
+    yield DataManager
+    DataManager.close()
+
+
+def test_writes_are_batched_until_flush(manager):
+    manager.log_environment(20.0, 40.0, pump=True)
+    manager.log_environment(22.0, 60.0, gas_alert=False)
+    manager.log_conversation("user", "hello")
+    assert manager.flush(timeout=5)
+
+    conn = sqlite3.connect(manager.DB_PATH)
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert conn.execute("SELECT COUNT(*) FROM environment").fetchone()[0] == 2
+    assert conn.execute("SELECT speaker, message FROM conversations").fetchall() == [
+        ("user", "hello")
+    ]
+    conn.close()
+    assert manager.average_temperature() == pytest.approx(21.0)
+    assert manager.average_humidity() == pytest.approx(50.0)
+
+
+def test_close_commits_pending_rows(manager):
+    manager.log_environment(25.0, 55.0)
+    manager.close()
+
+    conn = sqlite3.connect(manager.DB_PATH)
+    assert conn.execute("SELECT temperature FROM environment").fetchall() == [(25.0,)]
+    conn.close()
+
+
+def test_averages_come_from_rollups(manager):
+    manager.init_db()
+    conn = sqlite3.connect(manager.DB_PATH)
+    conn.executemany(
+        "INSERT INTO environment (timestamp, temperature, humidity) VALUES (?, ?, ?)",
+        [
+            ("2000-01-01 00:00:00", 10.0, None),
+            (_utc_timestamp(), 20.0, 40.0),
+            (_utc_timestamp(), 30.0, 60.0),
+        ],
+    )
+    conn.commit()
+    conn.execute("DELETE FROM environment")
+    conn.commit()
+    conn.close()
+
+    assert manager.average_temperature() == pytest.approx(20.0)
+    assert manager.average_temperature(window=timedelta(hours=24)) == pytest.approx(25.0)
+    assert manager.average_humidity(window=timedelta(hours=24)) == pytest.approx(50.0)
+    summary = manager.environment_summary()
+    assert summary["temperature"]["count"] == 3
+    assert summary["temperature"]["min"] == 10.0
+    assert summary["humidity"]["max"] == 60.0
+
+
+def test_query_environment_downsamples(manager):
+    manager.init_db()
+    conn = sqlite3.connect(manager.DB_PATH)
+    conn.executemany(
+        "INSERT INTO environment (timestamp, temperature, humidity, gas_alert) "
+        "VALUES (?, ?, ?, ?)",
+        [
+            (f"2024-01-01 00:{minute:02d}:00", float(minute), 50.0, int(minute == 7))
+            for minute in range(10)
+        ],
+    )
+    conn.commit()
+    conn.close()
+    start = datetime(2024, 1, 1)
+    end = datetime(2024, 1, 1, 0, 10)
+
+    rows = list(manager.query_environment(start, end))
+    assert len(rows) == 10
+    assert rows[0] == ("2024-01-01 00:00:00", 0.0, 50.0, None, 0)
+
+    buckets = list(manager.query_environment(start, end, max_points=2))
+    assert buckets == [
+        ("2024-01-01 00:00:00", 2.0, 50.0, None, 0),
+        ("2024-01-01 00:05:00", 7.0, 50.0, None, 1),
+    ]
+
+
+def test_retention_prunes_old_rows_and_vacuums(manager, monkeypatch):
+    monkeypatch.setattr("jarvis.data.RETENTION_CHUNK", 50)
+    manager.init_db()
+    conn = sqlite3.connect(manager.DB_PATH)
+    assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+    conn.executemany(
+        "INSERT INTO environment (timestamp, temperature) VALUES (?, ?)",
+        [("2001-01-01 00:00:00", 1.0)] * 400 + [(_utc_timestamp(), 3.0)],
+    )
+    conn.commit()
+    conn.close()
+
+    assert manager.apply_retention(wait=True, timeout=5)
+    conn = sqlite3.connect(manager.DB_PATH)
+    assert conn.execute("SELECT temperature FROM environment").fetchall() == [(3.0,)]
+    assert conn.execute("SELECT COUNT(*) FROM environment_minute").fetchone()[0] == 1
+    assert conn.execute("PRAGMA freelist_count").fetchone()[0] == 0
+    conn.close()
+    assert manager.average_temperature() == pytest.approx((400 * 1.0 + 3.0) / 401)
+
+
+def test_search_conversations_ranks_hits(manager):
+    manager.log_conversation("user", "turn on the pump please")
+    manager.log_conversation("jarvis", "The lab temperature is fine.")
+    manager.log_conversation("user", "is the pump running? the pump seemed loud")
+    manager.flush(timeout=5)
+
+    hits = manager.search_conversations("pump")
+    assert [speaker for _, speaker, _ in hits] == ["user", "user"]
+    assert "[pump]" in hits[0][2]
+    assert manager.search_conversations("pump", since=datetime(2999, 1, 1)) == []
+
+
+def test_fetch_last_messages_by_session(manager):
+    manager.log_conversation("user", "one", session="a")
+    manager.log_conversation("user", "two", session="b")
+    manager.log_conversation("jarvis", "three", session="a")
+    assert manager.fetch_last_messages(5, session="a") == [("jarvis", "three"), ("user", "one")]
+    assert len(manager.fetch_last_messages(5)) == 3
+
+
+def test_writer_flush_times_out_on_full_queue(tmp_path):
+    writer = _Writer(str(tmp_path / "idle.db"), max_queue=1)
+    writer.queue.put(("SELECT 1", ()))
+    assert not writer.flush(timeout=0.05)
+
+
+def test_writer_survives_a_failing_job(manager):
+    def bad_job(conn):
+        raise TypeError("bad row")
+
+    manager.init_db()
+    manager._writer.submit_job(bad_job)
+    manager.log_conversation("user", "still logging")
+    assert manager.flush(timeout=5)
+    assert isinstance(manager._writer.last_error, TypeError)
+    assert manager.fetch_last_messages(1) == [("user", "still logging")]
+
+
+def test_dead_writer_fails_fast(tmp_path):
+    writer = _Writer(str(tmp_path / "dead.db"))
+    assert not writer.flush()
+    with pytest.raises(RuntimeError):
+        writer.submit("SELECT 1")
+
+
+def test_existing_database_converts_to_incremental_vacuum_on_writer(manager):
+    conn = sqlite3.connect(manager.DB_PATH)
+    conn.execute("CREATE TABLE legacy (value TEXT)")
+    conn.executemany("INSERT INTO legacy VALUES (?)", [("x" * 100,)] * 100)
+    conn.commit()
+    conn.close()
+
+    manager.init_db()
+    manager.log_conversation("user", "logged before the vacuum")
+    assert manager.fetch_last_messages(1) == [("user", "logged before the vacuum")]
+
+    def auto_vacuum():
+        conn = sqlite3.connect(manager.DB_PATH)
+        try:
+            return conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+        finally:
+            conn.close()
+
+    for _ in range(100):
+        if auto_vacuum() == 2:
+            break
+        time.sleep(0.05)
+    assert auto_vacuum() == 2
+
+
+def test_like_fallback_matches_wildcards_literally(manager, monkeypatch):
+    manager.log_conversation("user", "humidity at 50% today")
+    manager.log_conversation("user", "humidity at 500 today")
+    manager.log_conversation("user", "set pump_speed to low")
+    manager.flush(timeout=5)
+    monkeypatch.setattr(manager, "_fts", False)
+
+    assert [hit[2] for hit in manager.search_conversations("50%")] == ["humidity at 50% today"]
+    assert [hit[2] for hit in manager.search_conversations("pump_")] == ["set pump_speed to low"]
+    assert manager.search_conversations("p_mp") == []
+
+
+def test_batch_commits_are_reported(manager, monkeypatch):
+    commits = []
+    monkeypatch.setattr(manager, "on_commit", commits.append)
+    manager.log_conversation("user", "time this")
+    assert manager.flush(timeout=5)
+    assert len(commits) == 1 and commits[0] >= 0
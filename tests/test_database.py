@@ -1,4 +1,5 @@
 import os
+import sqlite3
 import sys
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
@@ -15,3 +16,50 @@ def test_database_roundtrip(tmp_path):
     assert rows[0] == ("assistant", "hi")
     assert rows[1] == ("user", "hello")
 
+
+def test_prune_history(tmp_path):
+    db_file = str(tmp_path / "test.db")
+    database.init_db(db_path=db_file)
+    database.insert_message("user", "old", db_path=db_file)
+    database.insert_message("user", "new", db_path=db_file)
+    conn = sqlite3.connect(db_file)
+    conn.execute("UPDATE conversations SET timestamp = '2000-01-01' WHERE message = 'old'")
+    conn.commit()
+    conn.close()
+    assert database.prune_history(30, db_path=db_file) == 1
+    assert database.fetch_last_messages(10, db_path=db_file) == [("user", "new")]
+
+
+def test_legacy_history_is_imported(tmp_path):
+    db_file = str(tmp_path / "legacy.db")
+    conn = sqlite3.connect(db_file)
+    conn.execute(
+        "CREATE TABLE history (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+        "role TEXT NOT NULL, content TEXT NOT NULL)"
+    )
+    conn.execute("INSERT INTO history (role, content) VALUES ('user', 'before')")
+    conn.commit()
+    conn.close()
+
+    database.init_db(db_path=db_file)
+    database.insert_message("assistant", "after", db_path=db_file)
+    assert database.fetch_last_messages(2, db_path=db_file) == [
+        ("assistant", "after"),
+        ("user", "before"),
+    ]
+    conn = sqlite3.connect(db_file)
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == 2
+    assert not conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = 'history'"
+    ).fetchone()
+    conn.close()
+
+
+def test_search_history(tmp_path):
+    db_file = str(tmp_path / "test.db")
+    database.init_db(db_path=db_file)
+    database.insert_message("user", "check the pump", db_path=db_file)
+    database.insert_message("assistant", "all good", db_path=db_file)
+    assert database.search_history("pump", db_path=db_file) == [
+        ("user", "check the [pump]")
+    ]
@@ -0,0 +1,70 @@
+import ast
+import csv
+import math
+import os
+import sqlite3
+import sys
+from array import array
+from datetime import datetime
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from jarvis.data import DataManager
+from jarvis.export import main
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    DataManager.close()
+    monkeypatch.setattr(DataManager, "DB_PATH", str(tmp_path / "test.db"))
+    DataManager.init_db()
+    conn = sqlite3.connect(DataManager.DB_PATH)
+    conn.executemany(
+        "INSERT INTO environment (timestamp, temperature, humidity, pump, gas_alert) "
+        "VALUES (?, ?, ?, ?, ?)",
+        [
+            ("2024-01-01 00:00:00", 20.5, 40.0, 1, 0),
+            ("2024-01-01 00:00:02", None, 41.0, None, 1),
+            ("2024-01-02 00:00:00", 22.0, 42.0, 0, 0),
+        ],
+    )
+    conn.commit()
+    conn.close()
+    yield DataManager
+    DataManager.close()
+
+
+def read_npy(path):
+    with open(path, "rb") as file:
+        assert file.read(8) == b"\x93NUMPY\x01\x00"
+        size = int.from_bytes(file.read(2), "little")
+        header = ast.literal_eval(file.read(size).decode("latin1"))
+        values = array({"<i8": "q", "<f8": "d", "|i1": "b"}[header["descr"]])
+        values.frombytes(file.read())
+    assert header["shape"] == (len(values),)
+    return list(values)
+
+
+def test_export_csv_range(manager, tmp_path):
+    out = tmp_path / "env.csv"
+    count = manager.export_environment(
+        str(out), "csv", start=datetime(2024, 1, 1), end=datetime(2024, 1, 2)
+    )
+    assert count == 2
+    with open(out, newline="") as file:
+        rows = list(csv.reader(file))
+    assert rows[0] == ["timestamp", "temperature", "humidity", "pump", "gas_alert"]
+    assert rows[2] == ["2024-01-01 00:00:02", "", "41.0", "", "1"]
+
+
+def test_export_npy_columns(manager, tmp_path, capsys):
+    out = tmp_path / "env"
+    main([str(out), "--format", "npy"])
+    assert "Exported 3 rows" in capsys.readouterr().out
+
+    assert read_npy(out / "timestamp.npy") == [1704067200, 1704067202, 1704153600]
+    temperature = read_npy(out / "temperature.npy")
+    assert temperature[0] == 20.5 and math.isnan(temperature[1])
+    assert read_npy(out / "pump.npy") == [1, -1, 0]
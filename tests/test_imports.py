@@ -0,0 +1,47 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+# Cumulative import time allowed for the server entry point, in milliseconds.
+# Generous by default because wall-clock timings vary between machines; set
+# the variable to hold a particular machine to a tighter budget.
+IMPORT_BUDGET_MS = float(os.environ.get("JARVIS_IMPORT_BUDGET_MS", "1500"))
+HEAVY_MODULES = ("openai", "pyttsx3", "speech_recognition", "vosk", "tiktoken")
+
+
+def _import(module: str) -> subprocess.CompletedProcess:
+    code = (
+        f"import sys, {module}; "
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    return subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def test_package_import_defers_heavy_dependencies():
+    for module in ("jarvis_core", "jarvis_core.database", "jarvis_core.core"):
+        assert _import(module).stdout.strip() == "", module
+
+
+def test_server_import_defers_heavy_dependencies():
+    assert _import("jarvis.server").stdout.strip() == ""
+
+
+def test_server_import_time_budget():
+    result = _import("jarvis.server")
+    cumulative = next(
+        int(line.split("|")[1])
+        for line in result.stderr.splitlines()
+        if line.rstrip().endswith("| jarvis.server")
+    )
+    assert cumulative / 1000 <= IMPORT_BUDGET_MS, (
+        f"importing jarvis.server took {cumulative / 1000:.0f} ms"
+    )
@@ -0,0 +1,97 @@
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from jarvis_core.intents import IntentRouter
+
+
+class FakeIoT:
+    def __init__(self, connected=True):
+        self.connected = connected
+        self.commands = []
+
+    def publish_command(self, device, state):
+        self.commands.append((device, state))
+        return self.connected
+
+    def get_status(self):
+        return None
+
+
+class FakeData:
+    windows = []
+
+    @classmethod
+    def average_humidity(cls, window=None):
+        cls.windows.append(window)
+        return 48.25
+
+
+def make_router():
+    calls = []
+
+    def lab(path, method="GET"):
+        calls.append((method, path))
+        return {"temperature": 22.04, "humidity": 51.0, "gas_alert": False}
+
+    return IntentRouter(iot=FakeIoT(), data=FakeData, lab=lab), calls
+
+
+def test_match_extracts_slots():
+    router, _ = make_router()
+    assert router.match("Turn on the kitchen light please") == (
+        "switch", {"state": "on", "device": "kitchen light"}
+    )
+    assert router.match("switch the fan off") == ("switch", {"device": "fan", "state": "off"})
+    assert router.match("what's the time")[0] == "time"
+    assert router.match("what's the time in Tokyo") is None
+    assert router.match("tell me a joke about the temperature") is None
+
+
+def test_route_resolves_locally():
+    router, calls = make_router()
+    assert router.route("turn on the pump") == "Turning on the pump, sir."
+    assert router.route("turn off the porch light") == "Turning off the porch light, sir."
+    assert router.iot.commands == [("porch light", "off")]
+    assert router.route("What is the temperature?") == "The temperature is 22.0 degrees, sir."
+    assert router.route("is there a gas leak") == "Gas levels in the lab are normal, sir."
+    assert calls == [("POST", "/pump?state=on"), ("GET", "/data"), ("GET", "/data")]
+    assert router.route("average humidity over the last two hours") == (
+        "The average humidity over the last 2 hours is 48.2 percent, sir."
+    )
+    assert FakeData.windows[-1] == timedelta(hours=2)
+    assert router.route("who are you") is None
+
+
+def test_switch_rejects_non_devices():
+    router, calls = make_router()
+    for command in ("turn on the", "turn off the lights and the fan", "switch it off"):
+        assert router.match(command) is None, command
+        assert router.route(command) is None, command
+    assert router.iot.commands == [] and calls == []
+
+
+def test_switch_reports_unreachable_mqtt():
+    router = IntentRouter(iot=FakeIoT(connected=False), data=FakeData, lab=None)
+    assert router.route("turn on the porch light") == (
+        "I'm unable to reach the porch light at the moment, sir."
+    )
+
+
+def test_failed_intent_apologises():
+    def lab(path, method="GET"):
+        raise OSError("unreachable")
+
+    router = IntentRouter(iot=FakeIoT(), data=FakeData, lab=lab)
+    assert "couldn't" in router.route("how hot is it")
+
+
+def test_today_window_starts_at_local_midnight():
+    router, _ = make_router()
+    router.route("average humidity today")
+    start = time.time() - FakeData.windows[-1].total_seconds()
+    midnight = datetime.combine(datetime.now().date(), datetime.min.time())
+    assert abs(start - time.mktime(midnight.timetuple())) < 60
@@ -0,0 +1,60 @@
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from jarvis_core.jobs import JobRunner
+
+
+def test_job_streams_tokens_and_result():
+    runner = JobRunner(max_workers=1)
+    release = threading.Event()
+
+    def work(job):
+        job.append("Hello")
+        release.wait(5)
+        job.append(" world")
+        return "Hello world"
+
+    job = runner.submit(work)
+    tokens, done = job.wait(0, timeout=5)
+    assert tokens == ["Hello"] and not done
+    release.set()
+    seen = list(tokens)
+    while not done:
+        tokens, done = job.wait(len(seen), timeout=5)
+        seen.extend(tokens)
+    assert seen == ["Hello", " world"]
+    assert job.status == "done" and job.response == "Hello world"
+    assert runner.get(job.id) is job
+    runner.shutdown()
+
+
+def test_failed_job_reports_error_and_expires():
+    runner = JobRunner(max_workers=1, ttl=0)
+
+    def work(job):
+        raise RuntimeError("boom")
+
+    job = runner.submit(work)
+    job.wait(0, timeout=5)
+    assert job.status == "error" and job.error == "boom"
+    assert runner.get(job.id) is None
+    runner.shutdown()
+
+
+def test_submit_with_running_key_reuses_job():
+    runner = JobRunner(max_workers=2)
+    release = threading.Event()
+
+    def work(job):
+        release.wait(5)
+        return "done"
+
+    first = runner.submit(work, key=("session", "hi"))
+    assert runner.submit(work, key=("session", "hi")) is first
+    release.set()
+    first.join(5)
+    assert runner.submit(work, key=("session", "hi")) is not first
+    runner.shutdown()
@@ -0,0 +1,50 @@
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from jarvis_core.metrics import Histogram, LatencyRecorder
+
+
+def test_histogram_percentiles_within_bucket_precision():
+    histogram = Histogram()
+    for value in range(1, 10001):
+        histogram.record(value)
+    assert histogram.count == 10000
+    assert histogram.min == 1 and histogram.max == 10000
+    assert histogram.percentile(50) == pytest.approx(5000, rel=0.04)
+    assert histogram.percentile(99) == pytest.approx(9900, rel=0.04)
+    assert histogram.percentile(100) == 10000
+    # Small values are exact.
+    small = Histogram()
+    for value in (3, 3, 7):
+        small.record(value)
+    assert small.percentile(50) == 3 and small.percentile(90) == 7
+
+
+def test_recorder_rolls_window_and_dumps_json(tmp_path):
+    now = [0.0]
+    recorder = LatencyRecorder(window=60, slices=3, clock=lambda: now[0])
+    recorder.record("asr", 2.0)
+    recorder.record_count("llm_retries", 1)
+    now[0] = 30
+    recorder.record("asr", 0.5)
+    stats = recorder.snapshot()
+    assert stats["asr"]["count"] == 2
+    assert stats["asr"]["max"] == 2.0
+    assert stats["asr"]["p50"] == pytest.approx(0.5, rel=0.04)
+    assert stats["llm_retries"] == {
+        "count": 1, "mean": 1.0, "min": 1.0, "max": 1.0, "p50": 1.0, "p90": 1.0, "p99": 1.0
+    }
+
+    now[0] = 65
+    assert recorder.snapshot()["asr"]["count"] == 1
+    assert "llm_retries" not in recorder.snapshot()
+
+    path = tmp_path / "latency.json"
+    recorder.dump(str(path))
+    data = json.loads(path.read_text())
+    assert data["window"] == 60 and data["stages"]["asr"]["max"] == 0.5
@@ -0,0 +1,114 @@
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from jarvis_core.phrases import PhraseCache
+from jarvis_core.tts import SpeechWorker
+
+
+class RenderingEngine:
+    def __init__(self):
+        self.properties = {"voice": "en", "rate": 200, "volume": 1.0}
+        self.live = []
+        self._target = None
+
+    def getProperty(self, name):
+        return self.properties[name]
+
+    def save_to_file(self, text, path):
+        self._target = (text, path)
+
+    def runAndWait(self):
+        self.iterate()
+
+    def iterate(self):
+        if self._target is not None:
+            text, path = self._target
+            self._target = None
+            with open(path, "wb") as handle:
+                handle.write(text.encode() * 10)
+
+    def say(self, text):
+        self.live.append(text)
+
+    def startLoop(self, use_driver_loop):
+        pass
+
+    def isBusy(self):
+        return False
+
+    def endLoop(self):
+        pass
+
+
+class SlowEngine(RenderingEngine):
+    """Renders never finish on their own; only ``stop()`` ends them."""
+
+    def __init__(self):
+        super().__init__()
+        self.rendering = threading.Event()
+
+    def save_to_file(self, text, path):
+        super().save_to_file(text, path)
+        open(path, "wb").close()
+        self.rendering.set()
+
+    def iterate(self):
+        pass
+
+    def isBusy(self):
+        return self._target is not None
+
+    def stop(self):
+        self._target = None
+
+
+def test_render_lookup_and_evict(tmp_path):
+    engine = RenderingEngine()
+    cache = PhraseCache(str(tmp_path), max_bytes=250, preload=["Hello, sir."])
+    first = cache.render(engine, cache.next_pending())
+    assert cache.lookup("Hello, sir.", engine) == first
+    engine.properties["rate"] = 150
+    assert cache.lookup("Hello, sir.", engine) is None
+    os.utime(first, (0, 0))
+    cache.render(engine, "Turning on the fan, sir.")
+    assert not os.path.exists(first)
+    assert len(os.listdir(tmp_path)) == 1
+
+
+def test_worker_plays_cached_phrases(tmp_path):
+    engine = RenderingEngine()
+    played = []
+    cache = PhraseCache(
+        str(tmp_path), min_uses=2, preload=[], player=lambda path, cancelled: played.append(path)
+    )
+    worker = SpeechWorker(lambda: engine, phrases=cache, poll_interval=0.001)
+    worker.start()
+    text = "Turning on the fan, sir."
+    for _ in range(2):
+        worker.speak(text).wait(5)
+    deadline = time.monotonic() + 5
+    while not os.path.exists(cache.path(text, engine)) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    worker.speak(text).wait(5)
+    worker.stop()
+    worker.join(5)
+    assert engine.live == [text] * 2
+    assert played == [cache.path(text, engine)]
+
+
+def test_queued_speech_interrupts_rendering(tmp_path):
+    engine = SlowEngine()
+    cache = PhraseCache(str(tmp_path), preload=["How may I assist you?"])
+    worker = SpeechWorker(lambda: engine, phrases=cache, poll_interval=0.001)
+    worker.start()
+    assert engine.rendering.wait(5)
+    assert worker.speak("Right away, sir.").wait(5)
+    worker.stop()
+    worker.join(5)
+    assert engine.live == ["Right away, sir."]
+    assert os.listdir(tmp_path) == []
+    assert cache.next_pending() == "How may I assist you?"
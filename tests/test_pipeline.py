@@ -0,0 +1,75 @@
+import os
+import queue
+import sys
+
+import pytest
+import speech_recognition as sr
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from jarvis_core.pipeline import AudioRing, RemoteSpeech, VoicePipeline
+
+
+def test_audio_ring_shares_frames_and_detects_overrun():
+    ring = AudioRing(frame_bytes=4, slots=3)
+    reader = AudioRing(*ring.spec)
+    try:
+        first = ring.write(b"aaaa")
+        second = ring.write(b"bb")
+        assert reader.read(first) == b"aaaa"
+        assert reader.read(second) == b"bb"
+        for frame in (b"cccc", b"dddd"):
+            ring.write(frame)
+        # Slot 0 now holds frame 3; frame 0 is gone.
+        assert reader.read(first) is None
+        assert reader.read(3) == b"dddd"
+        with pytest.raises(ValueError):
+            ring.write(b"too long")
+    finally:
+        reader.close()
+        ring.close()
+
+
+def test_remote_speech_forwards_and_finishes_utterances():
+    commands = queue.Queue()
+    busy = []
+    speech = RemoteSpeech(commands, on_busy=busy.append)
+    first = speech.speak("one")
+    second = speech.speak("two")
+    assert commands.get_nowait() == ("say", 0, "one")
+    assert commands.get_nowait() == ("say", 1, "two")
+
+    second.cancel()
+    assert commands.get_nowait() == ("cancel", 1)
+    speech._set_busy(True)
+    speech._done(0, False, None, 1.5)
+    speech._done(1, True, None)
+    assert first.done and not first.cancelled
+    assert first.finished - first.started >= 1.5
+    assert second.started is None
+    assert second.done and second.cancelled
+
+    speech.interrupt()
+    assert commands.get_nowait() == ("interrupt",)
+    pending = speech.speak("three")
+    speech._fail(RuntimeError("gone"))
+    assert pending.done and str(pending.error) == "gone"
+    assert busy == [True, False]
+
+
+def test_pipeline_events_drive_callbacks():
+    heard, partials = [], []
+    pipeline = VoicePipeline(on_speech=lambda: heard.append(True), on_partial=partials.append)
+    pipeline._handle(("speech",))
+    pipeline._handle(("partial", "turn on"))
+    pipeline._handle(("final", "turn on the fan"))
+    pipeline._handle(("unrecognized",))
+    assert heard == [True]
+    assert partials == ["turn on"]
+    assert pipeline.get_command(timeout=0) == "turn on the fan"
+    with pytest.raises(sr.UnknownValueError):
+        pipeline.get_command(timeout=0)
+    assert pipeline.get_command(timeout=0) is None
+
+    pipeline._handle(("error", "capture", "no device"))
+    assert "no device" in str(pipeline.error)
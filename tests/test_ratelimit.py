@@ -0,0 +1,81 @@
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from jarvis_core.ratelimit import (
+    BACKGROUND,
+    INTERACTIVE,
+    RateScheduler,
+    TokenBucket,
+    retry_after,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_token_bucket_refills_and_keeps_reserve():
+    clock = FakeClock()
+    bucket = TokenBucket(60, clock)
+    bucket.take(60)
+    assert bucket.delay(1) == 1.0
+    clock.now = 10
+    assert bucket.delay(10) == 0.0
+    assert bucket.delay(10, reserve=0.5) == 30.0
+
+
+def test_throttle_and_backoff():
+    clock = FakeClock()
+    scheduler = RateScheduler(60, 1000, clock=clock, jitter=lambda: 1.0)
+    assert scheduler.backoff(1) == 1.0
+    assert scheduler.backoff(3) == 4.0
+    assert scheduler.backoff(20) == 30.0
+    assert scheduler.throttle(1, 5.0) == 5.0
+    assert not scheduler.acquire(timeout=0)
+    clock.now = 5.0
+    assert scheduler.acquire(timeout=0)
+
+
+def test_interactive_requests_are_served_first():
+    clock = FakeClock()
+    scheduler = RateScheduler(1, 0, reserve=0, clock=clock)
+    scheduler.requests.take(1)
+    served = []
+
+    def call(name, priority):
+        scheduler.acquire(priority=priority)
+        served.append(name)
+
+    def advance(seconds, waiting):
+        while len(scheduler._waiting) < waiting:
+            threading.Event().wait(0.01)
+        with scheduler._cond:
+            clock.now += seconds
+            scheduler._cond.notify_all()
+
+    background = threading.Thread(target=call, args=("background", BACKGROUND))
+    background.start()
+    advance(0, 1)
+    voice = threading.Thread(target=call, args=("voice", INTERACTIVE))
+    voice.start()
+    advance(60, 2)
+    voice.join(5)
+    assert served == ["voice"]
+    advance(60, 1)
+    background.join(5)
+    assert served == ["voice", "background"]
+
+
+def test_retry_after_header():
+    class Error(Exception):
+        headers = {"retry-after": "7"}
+
+    assert retry_after(Error()) == 7.0
+    assert retry_after(Exception()) is None
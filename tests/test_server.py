@@ -0,0 +1,86 @@
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pytest
+from jarvis import server
+from jarvis.data import DataManager
+from jarvis_core.backends import FakeBackend
+from jarvis_core.chatgpt import ChatGPTModule
+from jarvis_core.jobs import JobRunner
+from jarvis_core.sessions import SessionStore
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    # ChatGPTModule sets the process-wide OpenAI key; keep it untouched.
+    monkeypatch.setattr("jarvis_core.chatgpt.set_api_key", lambda key: None)
+    DataManager.close()
+    monkeypatch.setattr(DataManager, "DB_PATH", str(tmp_path / "server.db"))
+    backend = FakeBackend(latency=0, tokens_per_second=0, error_rate=0, reply_words=1)
+    sessions = SessionStore(lambda: ChatGPTModule(backend=backend), history=None)
+    monkeypatch.setattr(server, "sessions", sessions)
+    monkeypatch.setattr(server, "jobs", JobRunner())
+    yield server.app.test_client()
+    DataManager.close()
+
+
+def _events(body):
+    """Parse Server-Sent Events into ``(event, id, data)`` tuples."""
+    events = []
+    for block in body.decode().split("\n\n"):
+        fields = dict(
+            line.split(": ", 1) for line in block.splitlines() if not line.startswith(":")
+        )
+        if fields:
+            events.append((fields["event"], fields.get("id"), json.loads(fields["data"])))
+    return events
+
+
+def _ask(client, prompt):
+    resp = client.post("/ask", json={"q": prompt}, headers={server.SESSION_HEADER: "s1"})
+    assert resp.status_code == 202
+    body = resp.get_json()
+    assert body["session"] == "s1"
+    assert body["stream"] == f"/ask/{body['job']}/stream"
+    server.jobs.get(body["job"]).join(5)
+    return body["job"]
+
+
+def test_ask_streams_tokens_then_done(client):
+    job_id = _ask(client, "hello")
+
+    resp = client.get(f"/ask/{job_id}/stream")
+    assert resp.mimetype == "text/event-stream"
+    assert _events(resp.get_data()) == [
+        ("token", "0", "Understood."),
+        ("token", "1", " hello"),
+        ("token", "2", "."),
+        ("done", None, {"response": "Understood. hello."}),
+    ]
+    assert client.get(f"/ask/{job_id}").get_json() == {
+        "status": "done",
+        "response": "Understood. hello.",
+    }
+    assert DataManager.fetch_last_messages(2, session="s1") == [
+        ("jarvis", "Understood. hello."),
+        ("user", "hello"),
+    ]
+
+
+def test_stream_resumes_after_last_event_id(client):
+    job_id = _ask(client, "hello")
+
+    resp = client.get(f"/ask/{job_id}/stream", headers={"Last-Event-ID": "1"})
+    assert _events(resp.get_data()) == [
+        ("token", "2", "."),
+        ("done", None, {"response": "Understood. hello."}),
+    ]
+
+
+def test_unknown_job_and_empty_prompt(client):
+    assert client.get("/ask/nope").status_code == 404
+    assert client.get("/ask/nope/stream").status_code == 404
+    assert client.post("/ask", json={"q": "  "}).status_code == 400
@@ -0,0 +1,46 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pytest
+from jarvis_core.backends import FakeBackend
+from jarvis_core.chatgpt import ChatGPTModule
+from jarvis_core.sessions import SessionStore
+
+
+@pytest.fixture
+def factory(monkeypatch):
+    # ChatGPTModule sets the process-wide OpenAI key; keep it untouched.
+    monkeypatch.setattr("jarvis_core.chatgpt.set_api_key", lambda key: None)
+    return lambda: ChatGPTModule(backend=FakeBackend(latency=0, tokens_per_second=0))
+
+
+def test_sessions_are_isolated_and_bounded(factory):
+    store = SessionStore(factory, max_sessions=2, history=None)
+    with store.acquire("a") as module:
+        module.conversation.append({"role": "user", "content": "from a"})
+    with store.acquire("b") as module:
+        assert module.conversation[-1]["role"] == "system"
+    with store.acquire("a") as module:
+        assert module.conversation[-1]["content"] == "from a"
+    with store.acquire("c"):
+        pass
+    assert "b" not in store and "a" in store and len(store) == 2
+
+
+def test_idle_sessions_are_rehydrated(factory):
+    history = {"a": [("user", "hello"), ("jarvis", "Good evening, sir.")]}
+    store = SessionStore(
+        factory,
+        idle_timeout=0,
+        history=lambda session_id: history.get(session_id, []),
+    )
+    with store.acquire("a") as first:
+        pass
+    with store.acquire("a") as second:
+        assert second is not first
+        assert second.conversation[-2:] == [
+            {"role": "user", "content": "hello"},
+            {"role": "assistant", "content": "Good evening, sir."},
+        ]
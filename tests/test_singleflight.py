@@ -0,0 +1,114 @@
+import os
+import sys
+import threading
+import types
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import openai
+from jarvis_core.chatgpt import ChatGPTModule
+from jarvis_core.singleflight import SingleFlight
+
+
+def test_concurrent_identical_asks_share_one_call(monkeypatch):
+    flight = SingleFlight()
+    calls = []
+    release = threading.Event()
+
+    def fake_create(model, messages, stream=False):
+        calls.append(messages[-1]["content"])
+        release.wait(5)
+        return iter(
+            types.SimpleNamespace(choices=[types.SimpleNamespace(delta={"content": t})])
+            for t in ["Good", " morning."]
+        )
+
+    monkeypatch.setattr(openai.ChatCompletion, "create", fake_create)
+    modules = [ChatGPTModule(api_key="key", flight=flight) for _ in range(3)]
+    replies = [None] * 3
+
+    def run(i):
+        replies[i] = "".join(modules[i].ask_stream("Good morning!"))
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(3)]
+    for thread in threads:
+        thread.start()
+    while flight.stats()["shared"] < 2:
+        threading.Event().wait(0.01)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert calls == ["Good morning!"]
+    assert replies == ["Good morning."] * 3
+    assert all(m.conversation[-1]["content"] == "Good morning." for m in modules)
+    assert flight.stats() == {"calls": 1, "shared": 2, "in_flight": 0}
+
+
+def test_follower_retries_when_leader_fails():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+
+    def failing():
+        started.set()
+        release.wait(5)
+        raise RuntimeError("boom")
+
+    errors = []
+
+    def lead():
+        try:
+            flight.do("k", failing)
+        except RuntimeError as exc:
+            errors.append(exc)
+
+    leader = threading.Thread(target=lead)
+    leader.start()
+    started.wait(5)
+    result = []
+    follower = threading.Thread(target=lambda: result.append(flight.do("k", lambda: "ok")))
+    follower.start()
+    while flight.stats()["shared"] < 1:
+        threading.Event().wait(0.01)
+    release.set()
+    leader.join(5)
+    follower.join(5)
+    assert errors and result == ["ok"]
+
+
+def test_followers_keep_streaming_when_leader_disconnects():
+    flight = SingleFlight()
+    calls = []
+
+    def reply():
+        calls.append(1)
+        yield from ["Good", " morning", ", sir."]
+
+    leader = flight.stream("k", reply)
+    assert next(leader) == "Good"
+    follower = flight.stream("k", reply)
+    assert next(follower) == "Good"
+    leader.close()
+    assert "".join(follower) == " morning, sir."
+    assert calls == [1]
+    assert flight.stats() == {"calls": 1, "shared": 1, "in_flight": 0}
+
+
+def test_follower_makes_its_own_call_when_leader_stalls():
+    flight = SingleFlight(timeout=0.05)
+    started = threading.Event()
+    release = threading.Event()
+
+    def stuck():
+        started.set()
+        release.wait(5)
+        yield "late"
+
+    leader = threading.Thread(target=lambda: list(flight.stream("k", stuck)))
+    leader.start()
+    started.wait(5)
+    assert list(flight.stream("k", lambda: iter(["own"]))) == ["own"]
+    assert flight.do("k", lambda: "direct") == "direct"
+    release.set()
+    leader.join(5)
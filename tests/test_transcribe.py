@@ -0,0 +1,74 @@
+import json
+import os
+import sqlite3
+import sys
+import wave
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from jarvis import transcribe
+from jarvis.data import DataManager
+
+
+class FakeRecognizer:
+    def __init__(self, model, rate):
+        assert model == "model-dir"
+        self.frames = 0
+
+    def AcceptWaveform(self, data):
+        self.frames += len(data) // 2
+        return False
+
+    def FinalResult(self):
+        text = "" if self.frames < 8000 else f"note of {self.frames} samples"
+        return json.dumps({"text": text})
+
+
+def write_wav(path, samples, channels=1):
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(2)
+        wav.setframerate(16000)
+        wav.writeframes(b"\0\0" * samples * channels)
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    DataManager.close()
+    monkeypatch.setattr(DataManager, "DB_PATH", str(tmp_path / "test.db"))
+    monkeypatch.setattr(transcribe, "Model", lambda path: path)
+    monkeypatch.setattr(transcribe, "KaldiRecognizer", FakeRecognizer)
+    DataManager.init_db()
+    yield DataManager
+    DataManager.close()
+
+
+def test_transcribe_directory_stores_transcripts(manager, tmp_path):
+    recordings = tmp_path / "recordings"
+    (recordings / "day2").mkdir(parents=True)
+    write_wav(recordings / "a.wav", 16000)
+    write_wav(recordings / "day2" / "b.WAV", 32000)
+    write_wav(recordings / "quiet.wav", 100)
+    write_wav(recordings / "stereo.wav", 16000, channels=2)
+    (recordings / "notes.txt").write_text("ignored")
+    errors = []
+
+    stats = transcribe.transcribe_directory(
+        str(recordings), "model-dir", workers=1, session="lab-notes", log_callback=errors.append
+    )
+
+    assert stats["files"] == 3 and stats["empty"] == 1 and stats["failed"] == 1
+    assert stats["audio_seconds"] == pytest.approx(3.00625)
+    assert stats["speed"] > 0
+    assert len(errors) == 1 and "stereo.wav" in errors[0]
+    conn = sqlite3.connect(DataManager.DB_PATH)
+    rows = conn.execute(
+        "SELECT speaker, message, session FROM conversations ORDER BY message"
+    ).fetchall()
+    conn.close()
+    assert rows == [
+        ("user", "note of 16000 samples", "lab-notes"),
+        ("user", "note of 32000 samples", "lab-notes"),
+    ]
@@ -0,0 +1,77 @@
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from jarvis_core.tts import SpeechWorker
+
+
+class FakeEngine:
+    """Speaks until released, one iterate() call at a time."""
+
+    def __init__(self):
+        self.spoken = []
+        self.stopped = []
+        self.release = threading.Event()
+        self.started = threading.Event()
+
+    def say(self, text):
+        self.text = text
+        self.started.set()
+
+    def startLoop(self, use_driver_loop):
+        assert use_driver_loop is False
+
+    def iterate(self):
+        pass
+
+    def isBusy(self):
+        if self.release.is_set():
+            self.spoken.append(self.text)
+            return False
+        return True
+
+    def stop(self):
+        self.stopped.append(self.text)
+
+    def endLoop(self):
+        pass
+
+
+def test_speak_is_non_blocking_and_calls_back():
+    engine = FakeEngine()
+    busy = []
+    worker = SpeechWorker(lambda: engine, on_busy=busy.append, poll_interval=0.001)
+    worker.start()
+    assert worker.ready.wait(5) and worker.engine is engine
+    finished = []
+    first = worker.speak("Hello.", on_done=lambda u: finished.append(u.text))
+    second = worker.speak("Goodbye.")
+    assert not first.done
+    engine.release.set()
+    assert second.wait(5) and first.done
+    assert engine.spoken == ["Hello.", "Goodbye."]
+    assert finished == ["Hello."]
+    assert first.started <= first.finished <= second.started <= second.finished
+    worker.stop()
+    worker.join(5)
+    assert busy == [True, False]
+
+
+def test_interrupt_stops_current_and_drops_queue():
+    engine = FakeEngine()
+    worker = SpeechWorker(lambda: engine, poll_interval=0.001)
+    worker.start()
+    current = worker.speak("A long answer.")
+    queued = worker.speak("More of it.")
+    engine.started.wait(5)
+    worker.interrupt()
+    assert current.wait(5) and queued.wait(5)
+    assert current.cancelled and queued.cancelled
+    assert current.started is not None and queued.started is None
+    assert engine.stopped == ["A long answer."] and engine.spoken == []
+    late = []
+    queued.add_done_callback(late.append)
+    assert late == [queued]
+    worker.stop()